@@ -3,7 +3,7 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 from alembic import context
 from app.db.database import Base
-from app.models import user, patient, prescription
+from app.models import user, patient, prescription, medication, patient_medication, patient_allergy, control_visit, side_effect, job, catalog_change
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
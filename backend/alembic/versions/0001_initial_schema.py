@@ -0,0 +1,125 @@
+"""initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2024-01-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('hashed_password', sa.String(length=255), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('is_verified', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('full_name', sa.String(length=255), nullable=True),
+        sa.Column('specialty', sa.String(length=255), nullable=True),
+        sa.Column('workplace', sa.String(length=255), nullable=True),
+        sa.Column('medical_license', sa.String(length=255), nullable=True),
+        sa.Column('phone', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table(
+        'medications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('generic_name', sa.String(length=255), nullable=True),
+        sa.Column('drug_class', sa.String(length=255), nullable=True),
+        sa.Column('mechanism_of_action', sa.Text(), nullable=True),
+        sa.Column('available_dosages', sa.Text(), nullable=True),
+        sa.Column('indications', sa.Text(), nullable=True),
+        sa.Column('contraindications', sa.Text(), nullable=True),
+        sa.Column('side_effects', sa.Text(), nullable=True),
+        sa.Column('drug_interactions', sa.Text(), nullable=True),
+        sa.Column('monitoring_parameters', sa.Text(), nullable=True),
+        sa.Column('therapeutic_range', sa.Text(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_medications_id'), 'medications', ['id'], unique=False)
+    op.create_index(op.f('ix_medications_name'), 'medications', ['name'], unique=False)
+
+    op.create_table(
+        'patients',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(length=255), nullable=False),
+        sa.Column('age', sa.Integer(), nullable=False),
+        sa.Column('gender', sa.String(length=16), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=True),
+        sa.Column('height', sa.Float(), nullable=True),
+        sa.Column('phone', sa.String(length=255), nullable=True),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('diagnosis', sa.Text(), nullable=True),
+        sa.Column('comorbidities', sa.Text(), nullable=True),
+        sa.Column('lab_results', sa.Text(), nullable=True),
+        sa.Column('current_medications', sa.Text(), nullable=True),
+        sa.Column('allergies', sa.Text(), nullable=True),
+        sa.Column('previous_anticoagulants', sa.Text(), nullable=True),
+        sa.Column('lifestyle_factors', sa.Text(), nullable=True),
+        sa.Column('risk_factors', sa.Text(), nullable=True),
+        sa.Column('social_factors', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_patients_id'), 'patients', ['id'], unique=False)
+
+    op.create_table(
+        'prescriptions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('recommended_medications', sa.Text(), nullable=True),
+        sa.Column('dosage', sa.Text(), nullable=True),
+        sa.Column('duration', sa.String(length=255), nullable=True),
+        sa.Column('instructions', sa.Text(), nullable=True),
+        sa.Column('ai_recommendations', sa.Text(), nullable=True),
+        sa.Column('justification', sa.Text(), nullable=True),
+        sa.Column('alternative_options', sa.Text(), nullable=True),
+        sa.Column('warnings', sa.Text(), nullable=True),
+        sa.Column('monitoring_plan', sa.Text(), nullable=True),
+        sa.Column('patient_feedback', sa.Text(), nullable=True),
+        sa.Column('doctor_notes', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=32), nullable=True),
+        sa.Column('is_ai_generated', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_prescriptions_id'), 'prescriptions', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_prescriptions_id'), table_name='prescriptions')
+    op.drop_table('prescriptions')
+    op.drop_index(op.f('ix_patients_id'), table_name='patients')
+    op.drop_table('patients')
+    op.drop_index(op.f('ix_medications_name'), table_name='medications')
+    op.drop_index(op.f('ix_medications_id'), table_name='medications')
+    op.drop_table('medications')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
@@ -0,0 +1,66 @@
+"""native JSON columns with multi-valued indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-02-05 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = {
+    'patients': [
+        'comorbidities', 'lab_results', 'current_medications', 'allergies', 'previous_anticoagulants',
+        'lifestyle_factors', 'risk_factors', 'social_factors',
+    ],
+    'medications': [
+        'available_dosages', 'indications', 'contraindications', 'side_effects', 'drug_interactions',
+        'monitoring_parameters', 'therapeutic_range',
+    ],
+    'prescriptions': [
+        'recommended_medications', 'dosage', 'ai_recommendations', 'alternative_options', 'warnings',
+        'monitoring_plan',
+    ],
+}
+
+# Функциональные multi-valued индексы (MySQL 8.0.17+) над скрытыми генерируемыми столбцами;
+# используются условиями MEMBER OF / JSON_CONTAINS / JSON_OVERLAPS
+MULTI_VALUED_INDEXES = [
+    ('ix_patients_comorbidities', 'patients', "CAST(comorbidities AS CHAR(255) ARRAY)"),
+    ('ix_medications_contraindications', 'medications', "CAST(contraindications AS CHAR(255) ARRAY)"),
+    ('ix_prescriptions_medication_ids', 'prescriptions', "CAST(recommended_medications->'$[*].id' AS UNSIGNED ARRAY)"),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'mysql':
+        # SQLite хранит JSON как текст: данные и физический тип не меняются,
+        # SQLAlchemy JSON читает те же строки
+        return
+
+    for table, columns in JSON_COLUMNS.items():
+        # Пустые и битые строки не пройдут проверку типа JSON
+        for column in columns:
+            op.execute(f"UPDATE {table} SET {column} = NULL WHERE {column} = '' OR NOT JSON_VALID({column})")
+        # Один ALTER на таблицу - одна перестройка таблицы вместо N
+        op.execute(f"ALTER TABLE {table} " + ", ".join(f"MODIFY {column} JSON NULL" for column in columns))
+
+    for name, table, expression in MULTI_VALUED_INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {table} (({expression}))")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'mysql':
+        return
+
+    for name, table, _ in MULTI_VALUED_INDEXES:
+        op.drop_index(name, table_name=table)
+    for table, columns in JSON_COLUMNS.items():
+        op.execute(f"ALTER TABLE {table} " + ", ".join(f"MODIFY {column} TEXT NULL" for column in columns))
@@ -0,0 +1,109 @@
+"""normalized patient_medications and patient_allergies
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-02-19 15:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+BACKFILL = {
+    'mysql': [
+        """INSERT IGNORE INTO patient_medications (patient_id, name, dosage, frequency)
+           SELECT p.id, LEFT(TRIM(jt.name), 255), LEFT(jt.dosage, 255), LEFT(jt.frequency, 255)
+           FROM patients p,
+                JSON_TABLE(p.current_medications, '$[*]' COLUMNS (
+                    name VARCHAR(1024) PATH '$.name',
+                    dosage VARCHAR(1024) PATH '$.dosage',
+                    frequency VARCHAR(1024) PATH '$.frequency')) jt
+           WHERE jt.name IS NOT NULL AND TRIM(jt.name) <> ''""",
+        """INSERT IGNORE INTO patient_allergies (patient_id, allergen, severity, reaction)
+           SELECT p.id, LEFT(TRIM(jt.allergen), 255), LEFT(jt.severity, 64), LEFT(jt.reaction, 255)
+           FROM patients p,
+                JSON_TABLE(p.allergies, '$[*]' COLUMNS (
+                    allergen VARCHAR(1024) PATH '$.allergen',
+                    severity VARCHAR(1024) PATH '$.severity',
+                    reaction VARCHAR(1024) PATH '$.reaction')) jt
+           WHERE jt.allergen IS NOT NULL AND TRIM(jt.allergen) <> ''""",
+        """UPDATE patient_medications pm JOIN medications m ON m.name = pm.name
+           SET pm.medication_id = m.id""",
+        """UPDATE patient_allergies pa JOIN medications m ON m.name = pa.allergen
+           SET pa.medication_id = m.id""",
+    ],
+    'sqlite': [
+        """INSERT OR IGNORE INTO patient_medications (patient_id, name, dosage, frequency)
+           SELECT p.id, TRIM(json_extract(j.value, '$.name')),
+                  json_extract(j.value, '$.dosage'), json_extract(j.value, '$.frequency')
+           FROM patients p, json_each(p.current_medications) j
+           WHERE TRIM(COALESCE(json_extract(j.value, '$.name'), '')) <> ''""",
+        """INSERT OR IGNORE INTO patient_allergies (patient_id, allergen, severity, reaction)
+           SELECT p.id, TRIM(json_extract(j.value, '$.allergen')),
+                  json_extract(j.value, '$.severity'), json_extract(j.value, '$.reaction')
+           FROM patients p, json_each(p.allergies) j
+           WHERE TRIM(COALESCE(json_extract(j.value, '$.allergen'), '')) <> ''""",
+        """UPDATE patient_medications
+           SET medication_id = (SELECT MIN(m.id) FROM medications m WHERE m.name = patient_medications.name)""",
+        """UPDATE patient_allergies
+           SET medication_id = (SELECT MIN(m.id) FROM medications m WHERE m.name = patient_allergies.allergen)""",
+    ],
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'patient_medications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.Column('medication_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('dosage', sa.String(length=255), nullable=True),
+        sa.Column('frequency', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['medication_id'], ['medications.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('patient_id', 'name', name='uq_patient_medications_patient_name')
+    )
+    op.create_index(op.f('ix_patient_medications_id'), 'patient_medications', ['id'], unique=False)
+    op.create_index(op.f('ix_patient_medications_medication_id'), 'patient_medications', ['medication_id'], unique=False)
+    op.create_index(op.f('ix_patient_medications_name'), 'patient_medications', ['name'], unique=False)
+
+    op.create_table(
+        'patient_allergies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.Column('medication_id', sa.Integer(), nullable=True),
+        sa.Column('allergen', sa.String(length=255), nullable=False),
+        sa.Column('severity', sa.String(length=64), nullable=True),
+        sa.Column('reaction', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['medication_id'], ['medications.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('patient_id', 'allergen', name='uq_patient_allergies_patient_allergen')
+    )
+    op.create_index(op.f('ix_patient_allergies_id'), 'patient_allergies', ['id'], unique=False)
+    op.create_index(op.f('ix_patient_allergies_medication_id'), 'patient_allergies', ['medication_id'], unique=False)
+    op.create_index(op.f('ix_patient_allergies_allergen'), 'patient_allergies', ['allergen'], unique=False)
+
+    # Перенос существующих данных из JSON одним INSERT ... SELECT на таблицу
+    dialect = op.get_bind().dialect.name
+    for statement in BACKFILL.get(dialect, BACKFILL['sqlite']):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_patient_allergies_allergen'), table_name='patient_allergies')
+    op.drop_index(op.f('ix_patient_allergies_medication_id'), table_name='patient_allergies')
+    op.drop_index(op.f('ix_patient_allergies_id'), table_name='patient_allergies')
+    op.drop_table('patient_allergies')
+    op.drop_index(op.f('ix_patient_medications_name'), table_name='patient_medications')
+    op.drop_index(op.f('ix_patient_medications_medication_id'), table_name='patient_medications')
+    op.drop_index(op.f('ix_patient_medications_id'), table_name='patient_medications')
+    op.drop_table('patient_medications')
@@ -0,0 +1,34 @@
+"""composite indexes for keyset pagination
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-02-26 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# WHERE <фильтр> = :x AND id > :cursor ORDER BY id LIMIT n - поиск по индексу без сортировки
+INDEXES = [
+    ('ix_patients_doctor_id_id', 'patients', ['doctor_id', 'id']),
+    ('ix_prescriptions_doctor_id_id', 'prescriptions', ['doctor_id', 'id']),
+    ('ix_medications_is_active_id', 'medications', ['is_active', 'id']),
+    ('ix_medications_drug_class_id', 'medications', ['drug_class', 'id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
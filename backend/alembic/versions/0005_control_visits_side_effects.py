@@ -0,0 +1,59 @@
+"""control_visits and side_effects
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-03-04 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'control_visits',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=32), nullable=False),
+        sa.Column('scheduled_date', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_control_visits_id'), 'control_visits', ['id'], unique=False)
+    op.create_index(op.f('ix_control_visits_patient_id'), 'control_visits', ['patient_id'], unique=False)
+    op.create_table(
+        'side_effects',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.Column('medication_name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('severity', sa.String(length=32), nullable=True),
+        sa.Column('status', sa.String(length=32), nullable=True),
+        sa.Column('reported_date', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_side_effects_id'), 'side_effects', ['id'], unique=False)
+    op.create_index(op.f('ix_side_effects_patient_id'), 'side_effects', ['patient_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_side_effects_patient_id'), table_name='side_effects')
+    op.drop_index(op.f('ix_side_effects_id'), table_name='side_effects')
+    op.drop_table('side_effects')
+    op.drop_index(op.f('ix_control_visits_patient_id'), table_name='control_visits')
+    op.drop_index(op.f('ix_control_visits_id'), table_name='control_visits')
+    op.drop_table('control_visits')
@@ -0,0 +1,49 @@
+"""jobs table and prescriptions.patient_id index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-03-11 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('doctor_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=32), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('processed', sa.Integer(), nullable=False),
+        sa.Column('last_patient_id', sa.Integer(), nullable=True),
+        sa.Column('elapsed_seconds', sa.Float(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_jobs_doctor_id'), 'jobs', ['doctor_id'], unique=False)
+    # Последнее открытое назначение пациента - поиск по индексу, а не проход по таблице
+    op.create_index('ix_prescriptions_patient_id', 'prescriptions', ['patient_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_prescriptions_patient_id', table_name='prescriptions')
+    op.drop_index(op.f('ix_jobs_doctor_id'), table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
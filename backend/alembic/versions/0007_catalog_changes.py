@@ -0,0 +1,30 @@
+"""catalog_changes log for catalog hot reload
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-03-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'catalog_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('medication_id', sa.Integer(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('catalog_changes')
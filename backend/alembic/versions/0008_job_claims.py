@@ -0,0 +1,26 @@
+"""jobs.worker / jobs.heartbeat: claim of a job by one app process
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-03-25 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('worker', sa.String(length=128), nullable=True))
+    op.add_column('jobs', sa.Column('heartbeat', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'heartbeat')
+    op.drop_column('jobs', 'worker')
@@ -0,0 +1,37 @@
+"""catalog_version counter: catalog versions in commit order
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-04-01 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    version_table = op.create_table(
+        'catalog_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # Уже записанные изменения получают версию, равную id: прежняя версия каталога - max(id)
+    op.add_column('catalog_changes', sa.Column('version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.execute("UPDATE catalog_changes SET version = id")
+    op.create_index(op.f('ix_catalog_changes_version'), 'catalog_changes', ['version'], unique=False)
+    op.bulk_insert(version_table, [{'id': 1, 'version': 0}])
+    op.execute("UPDATE catalog_version SET version = (SELECT COALESCE(MAX(id), 0) FROM catalog_changes)")
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_catalog_changes_version'), table_name='catalog_changes')
+    op.drop_column('catalog_changes', 'version')
+    op.drop_table('catalog_version')
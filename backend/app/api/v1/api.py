@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, patients, prescriptions, medications
+from app.api.v1.endpoints import auth, patients, prescriptions, medications, jobs
 
 api_router = APIRouter()
 
@@ -7,3 +7,4 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(patients.router, prefix="/patients", tags=["patients"])
 api_router.include_router(prescriptions.router, prefix="/prescriptions", tags=["prescriptions"])
 api_router.include_router(medications.router, prefix="/medications", tags=["medications"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
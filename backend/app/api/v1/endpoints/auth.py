@@ -1,106 +1,84 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from jose import JWTError, jwt
+from sqlalchemy import event
 from app.models.user import User
-from app.schemas.user import UserCreate, User, Token
-from app.core.security import verify_password, get_password_hash, create_access_token
-from datetime import timedelta, datetime
+from app.schemas.user import UserCreate, User as UserSchema, Token
+from app.core.security import PasswordHasherBusy, create_access_token, password_hasher
+from datetime import timedelta
 from app.core.config import settings
-from app.mock_data import MOCK_USERS, get_mock_user_by_id, generate_mock_id
-import jwt
-from jwt import PyJWTError
+from app.core.token_cache import token_cache
+from app.repositories import DuplicateKeyError, Repositories, get_repositories
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-@router.post("/register", response_model=User)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    # В режиме моков проверяем существование пользователя в моковых данных
-    if settings.MOCK_MODE:
-        for mock_user in MOCK_USERS:
-            if mock_user["email"] == user.email:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Пользователь с таким email уже зарегистрирован"
-                )
-        
-        # Создаем нового пользователя в моковых данных
-        new_user = {
-            "id": generate_mock_id(),
-            "email": user.email,
-            "full_name": user.full_name,
-            "specialty": user.specialty,
-            "workplace": user.workplace,
-            "is_active": True,
-            "is_verified": True,
-            "created_at": datetime.now(),
-        }
-        MOCK_USERS.append(new_user)
-        return User(**new_user)
-    
-    # Обычная логика для работы с БД
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+async def run_password_hasher(operation, *args):
+    # Пул bcrypt переполнен (массовый вход) - быстрый отказ вместо ожидания в очереди
+    try:
+        return await operation(*args)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_tokens(mapper, connection, target):
+    # Изменение или деактивация пользователя сбрасывает его токены в кеше
+    token_cache.invalidate_user(target.id)
+
+@router.post("/register", response_model=UserSchema)
+async def register(user: UserCreate, repos: Repositories = Depends(get_repositories)):
+    # bcrypt занимает сотни миллисекунд CPU - в отдельном пуле процессов
+    hashed_password = await run_password_hasher(password_hasher.hash, user.password)
+    try:
+        # email - уникальный ключ в любом бэкенде
+        new_user = await repos.users.create({
+            **user.dict(exclude={"password"}),
+            "hashed_password": hashed_password,
+        })
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=400,
             detail="Пользователь с таким email уже зарегистрирован"
         )
-    
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        hashed_password=hashed_password,
-        full_name=user.full_name,
-        specialty=user.specialty,
-        workplace=user.workplace,
-        medical_license=user.medical_license,
-        phone=user.phone
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return UserSchema.model_validate(new_user.model_dump())
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    if settings.MOCK_MODE:
-        # В режиме моков проверяем пользователя в моковых данных
-        user = None
-        for mock_user in MOCK_USERS:
-            if mock_user["email"] == form_data.username:
-                user = mock_user
-                break
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Неверный email или пароль",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        # В моковом режиме принимаем любой пароль
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            subject=user["id"], expires_delta=access_token_expires
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), repos: Repositories = Depends(get_repositories)):
+    user = await repos.users.get_by_email(form_data.username)
+    verified, new_hash = False, None
+    if user is not None and user.hashed_password is None:
+        # Демо-пользователи моков без пароля: в режиме моков принимаем любой пароль
+        verified = settings.MOCK_MODE
+    elif user is not None:
+        verified, new_hash = await run_password_hasher(
+            password_hasher.verify_and_update, form_data.password, user.hashed_password
         )
-        return {"access_token": access_token, "token_type": "bearer"}
-    
-    # Обычная логика для работы с БД
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash is not None:
+        # Стоимость bcrypt в настройках изменилась - сохраняем пересчитанный хеш
+        await repos.users.set_password_hash(user.id, new_hash)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         subject=user.id, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), repos: Repositories = Depends(get_repositories)):
+    # Уже проверенный токен - без проверки подписи и без запроса к хранилищу
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached.user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -111,22 +89,18 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         user_id: int = int(payload.get("sub"))
         if user_id is None:
             raise credentials_exception
-    except (PyJWTError, ValueError, TypeError):
+    except (JWTError, ValueError, TypeError):
         raise credentials_exception
     
-    if settings.MOCK_MODE:
-        # В режиме моков ищем пользователя в моковых данных
-        user_data = get_mock_user_by_id(user_id)
-        if user_data is None:
-            raise credentials_exception
-        return User(**user_data)
-    
-    # Обычная логика для работы с БД
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    user_data = await repos.users.get(user_id)
+    if user_data is None or not user_data.is_active:
         raise credentials_exception
+    # В кеш попадает снимок без хеша пароля
+    user = UserSchema.model_validate(user_data.model_dump())
+    
+    token_cache.put(token, user_id, payload, user)
     return user
 
-@router.get("/me", response_model=User)
-def read_users_me(current_user: User = Depends(get_current_user)):
+@router.get("/me", response_model=UserSchema)
+async def read_users_me(current_user: UserSchema = Depends(get_current_user)):
     return current_user
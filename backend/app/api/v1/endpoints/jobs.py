@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.schemas.user import User
+from app.schemas.job import Job as JobSchema, RecommendationCohort
+from app.api.v1.endpoints.auth import get_current_user
+from app.repositories import Repositories, get_repositories
+from app.services.recommendation_jobs import recommendation_jobs
+
+router = APIRouter()
+
+@router.post("/recommendations", response_model=JobSchema, status_code=202)
+async def create_recommendation_job(
+    cohort: RecommendationCohort,
+    repos: Repositories = Depends(get_repositories),
+    current_user: User = Depends(get_current_user)
+):
+    """Пересчет ИИ-рекомендаций для когорты пациентов в фоне; прогресс - GET /jobs/{id}"""
+    if cohort.doctor_id is not None and cohort.doctor_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Пересчет доступен только для своих пациентов")
+    # Когорта всегда ограничена пациентами текущего врача
+    job = await repos.jobs.create(current_user.id, "recommendations", {**cohort.dict(), "doctor_id": current_user.id})
+    recommendation_jobs.start(job.id)
+    return job
+
+@router.get("/{job_id}", response_model=JobSchema)
+async def read_job(
+    job_id: int,
+    repos: Repositories = Depends(get_repositories),
+    current_user: User = Depends(get_current_user)
+):
+    job = await repos.jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задание не найдено")
+    return job
@@ -1,104 +1,124 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.db.database import get_db
-from app.models.medication import Medication
-from app.schemas.medication import Medication as MedicationSchema, MedicationSearchResult
-from app.mock_data import MOCK_MEDICATIONS, get_mock_medication_by_id
-from app.core.config import settings
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import Dict, List, Optional
+from pydantic import TypeAdapter
+from app.schemas.user import User
+from app.schemas.medication import (
+    Medication as MedicationSchema, MedicationCreate, MedicationUpdate, MedicationSearchResult,
+    MedicationSuggestion,
+)
+from app.api.v1.endpoints.auth import get_current_user
+from app.repositories import Repositories, get_repositories
+from app.repositories.loaders import Loaders, get_loaders
+from app.services.catalog import on_medication_changed
+from app.services.search import medication_search_index
+from app.services.autocomplete import autocomplete_service
+from app.core.pagination import decode_cursor, parse_ids, set_next_cursor
+from app.core.responses import schema_response
+from app.core.etag import CATALOG_CACHE_CONTROL, cached_response, catalog_response_cache
 
 router = APIRouter()
 
+medications_adapter = TypeAdapter(List[MedicationSchema])
+medications_by_id_adapter = TypeAdapter(Dict[int, MedicationSchema])
+drug_classes_adapter = TypeAdapter(List[str])
+
 @router.get("/search", response_model=List[MedicationSearchResult])
-def search_medications(
+async def search_medications(
     q: str = Query(..., description="Search query"),
-    limit: int = Query(10, le=50),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, le=50)
 ):
     """Поиск лекарственных препаратов по названию"""
-    if settings.MOCK_MODE:
-        # В режиме моков ищем в моковых данных
-        results = []
-        for med in MOCK_MEDICATIONS:
-            if q.lower() in med["name"].lower():
-                results.append(MedicationSearchResult(
-                    id=med["id"],
-                    name=med["name"],
-                    generic_name=med["name"],  # В моках используем name как generic_name
-                    drug_class="Лекарственный препарат",
-                    available_dosages=[med["strength"]]
-                ))
-                if len(results) >= limit:
-                    break
-        return results
-    
-    # Обычная логика для работы с БД
-    medications = db.query(Medication).filter(
-        Medication.name.ilike(f"%{q}%")
-    ).limit(limit).all()
-    
-    return [
-        MedicationSearchResult(
-            id=med.id,
-            name=med.name,
-            generic_name=med.generic_name,
-            drug_class=med.drug_class,
-            available_dosages=med.available_dosages
-        )
-        for med in medications
-    ]
+    # Поиск идет по триграммному индексу каталога, который общий для режима моков и БД
+    return [MedicationSearchResult(**result) for result in medication_search_index.search(q, limit)]
+
+@router.get("/autocomplete", response_model=List[MedicationSuggestion])
+async def autocomplete_medications(
+    q: str = Query(..., min_length=1, description="Prefix"),
+    limit: int = Query(10, le=50)
+):
+    """Подсказки по префиксу для мастера назначения (без обращения к БД)"""
+    return autocomplete_service.complete(q, limit)
 
 @router.get("/", response_model=List[MedicationSchema])
-def get_medications(
+async def get_medications(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Курсор из X-Next-Cursor предыдущей страницы"),
     drug_class: Optional[str] = None,
-    db: Session = Depends(get_db)
+    repos: Repositories = Depends(get_repositories)
+):
+    """Получить список лекарственных препаратов (готовый ответ из кеша каталога, ETag/304)"""
+    after_id = decode_cursor(cursor)
+    key = ("list", drug_class, after_id, skip, limit)
+    cached = catalog_response_cache.get(key)
+    if cached is None:
+        # Поколение читается до запроса к данным: изменение каталога в это время не закеширует старый ответ
+        generation = catalog_response_cache.generation
+        medications = await repos.medications.list(drug_class, after_id, skip, limit)
+        page = Response()
+        set_next_cursor(page, medications, limit)
+        cached = catalog_response_cache.put(key, medications_adapter.dump_json(medications), generation, dict(page.headers))
+    return cached_response(request, cached, CATALOG_CACHE_CONTROL)
+
+@router.post("/", response_model=MedicationSchema)
+async def create_medication(
+    medication: MedicationCreate,
+    repos: Repositories = Depends(get_repositories),
+    current_user: User = Depends(get_current_user)
+):
+    """Добавить препарат в каталог"""
+    created = await repos.medications.create(medication.dict())
+    on_medication_changed(created)
+    return created
+
+@router.put("/{medication_id}", response_model=MedicationSchema)
+async def update_medication(
+    medication_id: int,
+    medication: MedicationUpdate,
+    repos: Repositories = Depends(get_repositories),
+    current_user: User = Depends(get_current_user)
+):
+    """Обновить препарат (в том числе деактивировать через is_active)"""
+    updated = await repos.medications.update(medication_id, medication.dict(exclude_unset=True))
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Препарат не найден")
+    on_medication_changed(updated)
+    return updated
+
+@router.get("/batch", response_model=Dict[int, MedicationSchema])
+async def get_medications_batch(
+    ids: List[str] = Query(..., description="id препаратов: ids=1&ids=2 или ids=1,2"),
+    loaders: Loaders = Depends(get_loaders)
 ):
-    """Получить список лекарственных препаратов"""
-    if settings.MOCK_MODE:
-        # В режиме моков возвращаем моковые данные
-        medications = MOCK_MEDICATIONS[skip:skip + limit]
-        return [MedicationSchema(**med) for med in medications]
-    
-    # Обычная логика для работы с БД
-    query = db.query(Medication).filter(Medication.is_active == True)
-    
-    if drug_class:
-        query = query.filter(Medication.drug_class == drug_class)
-    
-    medications = query.offset(skip).limit(limit).all()
-    return medications
+    """Несколько препаратов одним запросом к БД; ответ - {id: препарат}, ненайденные id пропускаются"""
+    medication_ids = parse_ids(ids)
+    medications = await loaders.medications.load_many(medication_ids)
+    return schema_response(medications_by_id_adapter, {m.id: m for m in medications if m is not None})
 
 @router.get("/{medication_id}", response_model=MedicationSchema)
-def get_medication(
+async def get_medication(
     medication_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    repos: Repositories = Depends(get_repositories)
 ):
     """Получить информацию о конкретном препарате"""
-    if settings.MOCK_MODE:
-        # В режиме моков ищем в моковых данных
-        medication_data = get_mock_medication_by_id(medication_id)
-        if medication_data is None:
+    key = ("medication", medication_id)
+    cached = catalog_response_cache.get(key)
+    if cached is None:
+        generation = catalog_response_cache.generation
+        medication = await repos.medications.get(medication_id)
+        if medication is None:
             raise HTTPException(status_code=404, detail="Препарат не найден")
-        return MedicationSchema(**medication_data)
-    
-    # Обычная логика для работы с БД
-    medication = db.query(Medication).filter(Medication.id == medication_id).first()
-    if medication is None:
-        raise HTTPException(status_code=404, detail="Препарат не найден")
-    return medication
+        cached = catalog_response_cache.put(key, medication.model_dump_json().encode(), generation)
+    return cached_response(request, cached, CATALOG_CACHE_CONTROL)
 
 @router.get("/classes/", response_model=List[str])
-def get_drug_classes(db: Session = Depends(get_db)):
+async def get_drug_classes(request: Request, repos: Repositories = Depends(get_repositories)):
     """Получить список классов препаратов"""
-    if settings.MOCK_MODE:
-        # В режиме моков возвращаем фиксированные классы
-        return ["Антигипертензивные", "Гипогликемические", "Противовоспалительные", "Антибиотики"]
-    
-    # Обычная логика для работы с БД
-    classes = db.query(Medication.drug_class).filter(
-        Medication.drug_class.isnot(None),
-        Medication.is_active == True
-    ).distinct().all()
-    return [cls[0] for cls in classes if cls[0]]
+    cached = catalog_response_cache.get(("classes",))
+    if cached is None:
+        generation = catalog_response_cache.generation
+        classes = await repos.medications.drug_classes()
+        cached = catalog_response_cache.put(("classes",), drug_classes_adapter.dump_json(classes), generation)
+    return cached_response(request, cached, CATALOG_CACHE_CONTROL)
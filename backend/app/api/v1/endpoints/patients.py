@@ -1,142 +1,136 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
-from app.models.user import User
-from app.models.patient import Patient
-from app.schemas.patient import Patient as PatientSchema, PatientCreate, PatientUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Dict, List, Optional
+from pydantic import TypeAdapter
+from app.schemas.user import User
+from app.schemas.patient import (
+    Patient as PatientSchema, PatientCreate, PatientUpdate, PatientSummary, PatientHistoryEvent, PatientImportResult,
+    PatientBatchRequest,
+)
 from app.api.v1.endpoints.auth import get_current_user
-from app.mock_data import MOCK_PATIENTS, get_mock_patient_by_id, generate_mock_id
-from app.core.config import settings
-from datetime import datetime
+from app.repositories import Repositories, get_repositories
+from app.repositories.loaders import Loaders, get_loaders
+from app.core.pagination import decode_cursor, parse_ids
+from app.core.responses import page_response, schema_response
+from app.services.export import export_response
+from app.services.patient_import import import_format, import_patients
+from app.core.etag import etag_response
+from app.services.patient_summary import patient_history
+from app.services.recommendations import patient_feature_cache
 
 router = APIRouter()
+patient_adapter = TypeAdapter(PatientSchema)
+patients_adapter = TypeAdapter(List[PatientSchema])
+patients_by_id_adapter = TypeAdapter(Dict[int, PatientSchema])
+history_adapter = TypeAdapter(List[PatientHistoryEvent])
 
 @router.post("/", response_model=PatientSchema)
-def create_patient(
+async def create_patient(
     patient: PatientCreate,
-    db: Session = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков создаем пациента в моковых данных
-        new_patient = {
-            "id": generate_mock_id(),
-            "doctor_id": current_user.id,
-            **patient.dict(),
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-        }
-        MOCK_PATIENTS.append(new_patient)
-        return PatientSchema(**new_patient)
-    
-    # Обычная логика для работы с БД
-    db_patient = Patient(
-        doctor_id=current_user.id,
-        **patient.dict()
-    )
-    db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
-    return db_patient
+    return await repos.patients.create(current_user.id, patient.dict())
+
+@router.post("/bulk", response_model=PatientImportResult)
+async def bulk_create_patients(
+    request: Request,
+    repos: Repositories = Depends(get_repositories),
+    current_user: User = Depends(get_current_user)
+):
+    """Массовый импорт: тело - JSON-массив, NDJSON или CSV (по Content-Type), читается потоком"""
+    body_format = import_format(request.headers.get("content-type"))
+    return await import_patients(repos, current_user.id, request.stream(), body_format)
+
+@router.post("/batch", response_model=Dict[int, PatientSchema])
+async def read_patients_batch(
+    batch: PatientBatchRequest,
+    loaders: Loaders = Depends(get_loaders),
+    current_user: User = Depends(get_current_user)
+):
+    """Несколько пациентов врача одним запросом к БД; ответ - {id: пациент}, чужие и ненайденные пропускаются"""
+    patients = await loaders.patients(current_user.id).load_many(parse_ids(batch.ids))
+    return schema_response(patients_by_id_adapter, {p.id: p for p in patients if p is not None})
 
 @router.get("/", response_model=List[PatientSchema])
-def read_patients(
+async def read_patients(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсор из X-Next-Cursor предыдущей страницы"),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков возвращаем всех пациентов (в реальном приложении фильтровали бы по doctor_id)
-        patients = MOCK_PATIENTS[skip:skip + limit]
-        return [PatientSchema(**patient) for patient in patients]
-    
-    # Обычная логика для работы с БД
-    patients = db.query(Patient).filter(Patient.doctor_id == current_user.id).offset(skip).limit(limit).all()
-    return patients
+    # Пациенты врача в порядке id: keyset по курсору или OFFSET по skip
+    patients = await repos.patients.list(current_user.id, decode_cursor(cursor), skip, limit)
+    return page_response(patients_adapter, patients, limit)
+
+@router.get("/export")
+async def export_patients(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Сжать поток (Content-Encoding: gzip)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Выгрузка всех пациентов врача потоком (NDJSON или CSV), без загрузки в память"""
+    return export_response("patients", current_user.id, export_format, gzip)
 
 @router.get("/{patient_id}", response_model=PatientSchema)
-def read_patient(
+async def read_patient(
     patient_id: int,
-    db: Session = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков ищем пациента в моковых данных
-        patient_data = get_mock_patient_by_id(patient_id)
-        if patient_data is None:
-            raise HTTPException(status_code=404, detail="Пациент не найден")
-        return PatientSchema(**patient_data)
-    
-    # Обычная логика для работы с БД
-    patient = db.query(Patient).filter(
-        Patient.id == patient_id,
-        Patient.doctor_id == current_user.id
-    ).first()
+    patient = await repos.patients.get(patient_id, current_user.id)
     if patient is None:
         raise HTTPException(status_code=404, detail="Пациент не найден")
-    return patient
+    return schema_response(patient_adapter, patient)
+
+async def get_patient_summary(patient_id: int, repos: Repositories, current_user: User) -> PatientSummary:
+    summary = await repos.patients.summary(patient_id, current_user.id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Пациент не найден")
+    return summary
+
+@router.get("/{patient_id}/summary", response_model=PatientSummary)
+async def read_patient_summary(
+    patient_id: int,
+    request: Request,
+    repos: Repositories = Depends(get_repositories),
+    current_user: User = Depends(get_current_user)
+):
+    """Карточка пациента одним запросом (с ETag: повторная загрузка без изменений - 304)"""
+    summary = await get_patient_summary(patient_id, repos, current_user)
+    return etag_response(request, summary.model_dump_json().encode())
+
+@router.get("/{patient_id}/history", response_model=List[PatientHistoryEvent])
+async def read_patient_history(
+    patient_id: int,
+    request: Request,
+    repos: Repositories = Depends(get_repositories),
+    current_user: User = Depends(get_current_user)
+):
+    """История пациента: назначения, визиты и побочные эффекты от новых к старым"""
+    summary = await get_patient_summary(patient_id, repos, current_user)
+    return etag_response(request, history_adapter.dump_json(patient_history(summary)))
 
 @router.put("/{patient_id}", response_model=PatientSchema)
-def update_patient(
+async def update_patient(
     patient_id: int,
     patient: PatientUpdate,
-    db: Session = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков обновляем пациента в моковых данных
-        patient_data = get_mock_patient_by_id(patient_id)
-        if patient_data is None:
-            raise HTTPException(status_code=404, detail="Пациент не найден")
-        
-        update_data = patient.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            patient_data[field] = value
-        patient_data["updated_at"] = datetime.now()
-        
-        return PatientSchema(**patient_data)
-    
-    # Обычная логика для работы с БД
-    db_patient = db.query(Patient).filter(
-        Patient.id == patient_id,
-        Patient.doctor_id == current_user.id
-    ).first()
-    if db_patient is None:
+    updated = await repos.patients.update(patient_id, current_user.id, patient.dict(exclude_unset=True))
+    if updated is None:
         raise HTTPException(status_code=404, detail="Пациент не найден")
-    
-    update_data = patient.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_patient, field, value)
-    
-    db.commit()
-    db.refresh(db_patient)
-    return db_patient
+    patient_feature_cache.invalidate(patient_id)
+    return updated
 
 @router.delete("/{patient_id}")
-def delete_patient(
+async def delete_patient(
     patient_id: int,
-    db: Session = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков удаляем пациента из моковых данных
-        patient_data = get_mock_patient_by_id(patient_id)
-        if patient_data is None:
-            raise HTTPException(status_code=404, detail="Пациент не найден")
-        
-        MOCK_PATIENTS.remove(patient_data)
-        return {"message": "Пациент удален"}
-    
-    # Обычная логика для работы с БД
-    patient = db.query(Patient).filter(
-        Patient.id == patient_id,
-        Patient.doctor_id == current_user.id
-    ).first()
-    if patient is None:
+    if not await repos.patients.delete(patient_id, current_user.id):
         raise HTTPException(status_code=404, detail="Пациент не найден")
-    
-    db.delete(patient)
-    db.commit()
+    patient_feature_cache.invalidate(patient_id)
     return {"message": "Пациент удален"}
@@ -1,144 +1,135 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
-from app.models.user import User
-from app.models.prescription import Prescription
-from app.schemas.prescription import Prescription as PrescriptionSchema, PrescriptionCreate, PrescriptionUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from pydantic import TypeAdapter
+from app.schemas.user import User
+from app.schemas.prescription import (
+    Prescription as PrescriptionSchema, PrescriptionCreate, PrescriptionUpdate,
+    InteractionCheckRequest, InteractionCheckResult, InteractionWarning,
+)
 from app.api.v1.endpoints.auth import get_current_user
-from app.mock_data import MOCK_PRESCRIPTIONS, get_mock_prescription_by_id, generate_mock_id
-from app.core.config import settings
-from datetime import datetime
+from app.repositories import Repositories, get_repositories
+from app.repositories.loaders import Loaders, get_loaders
+from app.services.interactions import interaction_index, parse_json_list
+from app.services.catalog import on_prescription_created
+from app.services.recommendations import recommendation_engine
+from app.core.pagination import decode_cursor
+from app.core.responses import page_response, schema_response
+from app.services.export import export_response
 
 router = APIRouter()
+prescription_adapter = TypeAdapter(PrescriptionSchema)
+prescriptions_adapter = TypeAdapter(List[PrescriptionSchema])
 
 @router.post("/", response_model=PrescriptionSchema)
-def create_prescription(
+async def create_prescription(
     prescription: PrescriptionCreate,
-    db: Session = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков создаем назначение в моковых данных
-        new_prescription = {
-            "id": generate_mock_id(),
-            "doctor_id": current_user.id,
-            **prescription.dict(),
-            "created_at": datetime.now(),
-            "updated_at": datetime.now(),
-        }
-        MOCK_PRESCRIPTIONS.append(new_prescription)
-        return PrescriptionSchema(**new_prescription)
+    created = await repos.prescriptions.create(current_user.id, prescription.dict())
+    on_prescription_created(created.recommended_medications)
+    return created
+
+@router.post("/{prescription_id}/ai", response_model=PrescriptionSchema)
+async def generate_ai_recommendations(
+    prescription_id: int,
+    repos: Repositories = Depends(get_repositories),
+    loaders: Loaders = Depends(get_loaders),
+    current_user: User = Depends(get_current_user)
+):
+    """ИИ-рекомендации для пациента назначения: ранжирование каталога, риски, план мониторинга"""
+    prescription = await repos.prescriptions.get(prescription_id, current_user.id)
+    if prescription is None:
+        raise HTTPException(status_code=404, detail="Назначение не найдено")
+    patient = await loaders.patients(current_user.id).load(prescription.patient_id)
+    if patient is None:
+        raise HTTPException(status_code=404, detail="Пациент не найден")
     
-    # Обычная логика для работы с БД
-    db_prescription = Prescription(
-        doctor_id=current_user.id,
-        **prescription.dict()
+    recommendation = recommendation_engine.recommend(patient)
+    return await repos.prescriptions.update(
+        prescription_id, current_user.id, {**recommendation, "is_ai_generated": True}
+    )
+
+@router.post("/check-interactions", response_model=InteractionCheckResult)
+async def check_interactions(
+    request: InteractionCheckRequest,
+    loaders: Loaders = Depends(get_loaders),
+    current_user: User = Depends(get_current_user)
+):
+    """Проверка взаимодействий текущей терапии пациента и предлагаемых препаратов"""
+    current_medications = request.current_medications
+    if current_medications is None and request.patient_id is not None:
+        patient = await loaders.patients(current_user.id).load(request.patient_id)
+        if patient is None:
+            raise HTTPException(status_code=404, detail="Пациент не найден")
+        current_medications = patient.current_medications
+
+    medications = parse_json_list(current_medications) + request.recommended_medications
+    interactions = interaction_index.check(medications)
+    return InteractionCheckResult(
+        interactions=[
+            InteractionWarning(
+                medication_a=name_a,
+                medication_b=name_b,
+                severity=interaction.severity,
+                description=interaction.description,
+                management=interaction.management,
+            )
+            for name_a, name_b, interaction in interactions
+        ],
+        checked_medications=len(medications),
     )
-    db.add(db_prescription)
-    db.commit()
-    db.refresh(db_prescription)
-    return db_prescription
 
 @router.get("/", response_model=List[PrescriptionSchema])
-def read_prescriptions(
+async def read_prescriptions(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсор из X-Next-Cursor предыдущей страницы"),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков возвращаем все назначения
-        prescriptions = MOCK_PRESCRIPTIONS[skip:skip + limit]
-        return [PrescriptionSchema(**prescription) for prescription in prescriptions]
-    
-    # Обычная логика для работы с БД
-    prescriptions = db.query(Prescription).filter(
-        Prescription.doctor_id == current_user.id
-    ).offset(skip).limit(limit).all()
-    return prescriptions
+    # Назначения врача в порядке id: keyset по курсору или OFFSET по skip
+    prescriptions = await repos.prescriptions.list(current_user.id, decode_cursor(cursor), skip, limit)
+    return page_response(prescriptions_adapter, prescriptions, limit)
+
+@router.get("/export")
+async def export_prescriptions(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Сжать поток (Content-Encoding: gzip)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Выгрузка всех назначений врача потоком (NDJSON или CSV), без загрузки в память"""
+    return export_response("prescriptions", current_user.id, export_format, gzip)
 
 @router.get("/{prescription_id}", response_model=PrescriptionSchema)
-def read_prescription(
+async def read_prescription(
     prescription_id: int,
-    db: Session = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков ищем назначение в моковых данных
-        prescription_data = get_mock_prescription_by_id(prescription_id)
-        if prescription_data is None:
-            raise HTTPException(status_code=404, detail="Назначение не найдено")
-        return PrescriptionSchema(**prescription_data)
-    
-    # Обычная логика для работы с БД
-    prescription = db.query(Prescription).filter(
-        Prescription.id == prescription_id,
-        Prescription.doctor_id == current_user.id
-    ).first()
+    prescription = await repos.prescriptions.get(prescription_id, current_user.id)
     if prescription is None:
         raise HTTPException(status_code=404, detail="Назначение не найдено")
-    return prescription
+    return schema_response(prescription_adapter, prescription)
 
 @router.put("/{prescription_id}", response_model=PrescriptionSchema)
-def update_prescription(
+async def update_prescription(
     prescription_id: int,
     prescription: PrescriptionUpdate,
-    db: Session = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков обновляем назначение в моковых данных
-        prescription_data = get_mock_prescription_by_id(prescription_id)
-        if prescription_data is None:
-            raise HTTPException(status_code=404, detail="Назначение не найдено")
-        
-        update_data = prescription.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            prescription_data[field] = value
-        prescription_data["updated_at"] = datetime.now()
-        
-        return PrescriptionSchema(**prescription_data)
-    
-    # Обычная логика для работы с БД
-    db_prescription = db.query(Prescription).filter(
-        Prescription.id == prescription_id,
-        Prescription.doctor_id == current_user.id
-    ).first()
-    if db_prescription is None:
+    updated = await repos.prescriptions.update(prescription_id, current_user.id, prescription.dict(exclude_unset=True))
+    if updated is None:
         raise HTTPException(status_code=404, detail="Назначение не найдено")
-    
-    update_data = prescription.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_prescription, field, value)
-    
-    db.commit()
-    db.refresh(db_prescription)
-    return db_prescription
+    return updated
 
 @router.delete("/{prescription_id}")
-def delete_prescription(
+async def delete_prescription(
     prescription_id: int,
-    db: Session = Depends(get_db),
+    repos: Repositories = Depends(get_repositories),
     current_user: User = Depends(get_current_user)
 ):
-    if settings.MOCK_MODE:
-        # В режиме моков удаляем назначение из моковых данных
-        prescription_data = get_mock_prescription_by_id(prescription_id)
-        if prescription_data is None:
-            raise HTTPException(status_code=404, detail="Назначение не найдено")
-        
-        MOCK_PRESCRIPTIONS.remove(prescription_data)
-        return {"message": "Назначение удалено"}
-    
-    # Обычная логика для работы с БД
-    prescription = db.query(Prescription).filter(
-        Prescription.id == prescription_id,
-        Prescription.doctor_id == current_user.id
-    ).first()
-    if prescription is None:
+    if not await repos.prescriptions.delete(prescription_id, current_user.id):
         raise HTTPException(status_code=404, detail="Назначение не найдено")
-    
-    db.delete(prescription)
-    db.commit()
     return {"message": "Назначение удалено"}
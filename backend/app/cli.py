@@ -0,0 +1,70 @@
+"""Служебные команды MedAI.
+
+Запуск из каталога backend:
+    python -m app.cli catalog build [--output catalog.snapshot]
+    python -m app.cli catalog info [--path catalog.snapshot]
+
+catalog build собирает снимок каталога из таблицы medications (DATABASE_URL);
+путь по умолчанию - CATALOG_SNAPSHOT_PATH. Процессы API читают снимок при
+старте вместо таблицы и догружают изменения после его версии из журнала.
+"""
+import argparse
+import json
+import sys
+import time
+
+from app.core.config import settings
+
+DEFAULT_SNAPSHOT_PATH = "catalog.snapshot"
+
+
+def catalog_build(args) -> int:
+    from app.db.database import SessionLocal
+    from app.services.catalog import catalog_version, load_catalog_from_db
+    from app.services.catalog_snapshot import build_snapshot
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        # Версия - до чтения: изменение во время сборки процессы API догрузят из журнала повторно
+        version = catalog_version(db)
+        catalog = load_catalog_from_db(db)
+    header = build_snapshot(catalog, args.output, version)
+    print(f"{args.output}: {header['medications']} medications, {header['strings']} strings, "
+          f"{time.perf_counter() - started:.2f}s")
+    return 0
+
+
+def catalog_info(args) -> int:
+    from app.services.catalog_snapshot import CatalogSnapshot
+
+    started = time.perf_counter()
+    with CatalogSnapshot(args.path) as snapshot:
+        opened = time.perf_counter() - started
+        medications = snapshot.medications()
+        loaded = time.perf_counter() - started
+        header = {key: value for key, value in snapshot.header.items() if key != "sections"}
+    print(json.dumps(header, ensure_ascii=False, indent=1))
+    print(f"open {opened * 1e3:.2f}ms, {len(medications)} medications loaded in {loaded * 1e3:.1f}ms")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="medai", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    catalog = commands.add_parser("catalog", help="снимок каталога препаратов").add_subparsers(dest="action", required=True)
+    path = settings.CATALOG_SNAPSHOT_PATH or DEFAULT_SNAPSHOT_PATH
+
+    build = catalog.add_parser("build", help="собрать снимок из таблицы medications")
+    build.add_argument("--output", default=path)
+    build.set_defaults(handler=catalog_build)
+
+    info = catalog.add_parser("info", help="заголовок снимка и время загрузки")
+    info.add_argument("--path", default=path)
+    info.set_defaults(handler=catalog_info)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Union
+from typing import List, Optional, Union
 import os
 
 class Settings(BaseSettings):
@@ -10,11 +10,69 @@ class Settings(BaseSettings):
     # Database (disabled for mock mode)
     DATABASE_URL: str = "sqlite:///./mock.db"  # Using SQLite in-memory for mock mode
     MOCK_MODE: bool = True  # Enable mock mode without real database
+    MOCK_SYNTHETIC_PATIENTS: int = 0  # Сколько синтетических пациентов добавить к мокам при старте
+    # Асинхронный драйвер; по умолчанию выводится из DATABASE_URL (pymysql -> aiomysql, sqlite -> aiosqlite)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Хранилище репозиториев: memory | sql | sql_async (по умолчанию - по MOCK_MODE)
+    REPOSITORY_BACKEND: Optional[str] = None
+    
+    # Пул соединений (кроме SQLite в памяти)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # MySQL закрывает простаивающие соединения по wait_timeout
+    DB_POOL_PRE_PING: bool = True
     
     # Security
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # bcrypt: стоимость и пул процессов для хеширования (0 - пул потоков)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Кеш проверенных токенов: запись живет до exp, но не дольше TTL
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    
+    # Снимок каталога препаратов (python -m app.cli catalog build); пусто - каталог из БД
+    CATALOG_SNAPSHOT_PATH: Optional[str] = None
+    
+    # Как часто процесс API проверяет версию каталога в БД, секунд (0 - не проверять)
+    CATALOG_POLL_SECONDS: float = 2.0
+    
+    # Подсказки препаратов: после скольких назначений популярность пересчитывается в фоне
+    AUTOCOMPLETE_REBUILD_PRESCRIPTIONS: int = 100
+
+    # Кеш закодированных признаков пациентов для рекомендаций (0 - без кеша)
+    PATIENT_FEATURE_CACHE_SIZE: int = 10000
+    
+    # Готовые ответы каталога (байты + ETag) до изменения каталога; max-age для клиентов
+    CATALOG_RESPONSE_CACHE_SIZE: int = 1000
+    CATALOG_CACHE_MAX_AGE: int = 0
+    
+    # Массовый пересчет рекомендаций: процессы оценки (0 - в потоке задания),
+    # пациентов в фиксируемой пачке и в куске для одного процесса
+    JOB_WORKERS: int = 2
+    JOB_BATCH_SIZE: int = 1000
+    JOB_CHUNK_SIZE: int = 250
+    # Задание, чей процесс не отмечался дольше этого (секунды), считается брошенным
+    JOB_CLAIM_TIMEOUT: int = 300
+    
+    # Выгрузка пациентов и назначений: строк в пачке серверного курсора
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # Пакетное чтение по id (GET /medications/batch, POST /patients/batch): не больше id за запрос
+    BATCH_MAX_IDS: int = 500
+    
+    # Массовый импорт пациентов: записей в куске (одна транзакция на кусок)
+    IMPORT_CHUNK_SIZE: int = 1000
+    
+    # Трассировка SQL по запросам (app/db/query_tracer.py): N+1 и медленные выражения с EXPLAIN
+    QUERY_TRACE: bool = False
+    QUERY_TRACE_REPEAT_LIMIT: int = 10
+    SLOW_QUERY_MS: float = 200.0
     
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
@@ -35,5 +93,11 @@ class Settings(BaseSettings):
     
     class Config:
         env_file = ".env"
+    
+    @property
+    def repository_backend(self) -> str:
+        if self.REPOSITORY_BACKEND:
+            return self.REPOSITORY_BACKEND
+        return "memory" if self.MOCK_MODE else "sql_async"
 
 settings = Settings()
@@ -0,0 +1,72 @@
+import asyncio
+from operator import attrgetter
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """Склейка обращений по ключам в пределах одного запроса (как DataLoader в GraphQL).
+
+    load() не идет в хранилище сразу: ключ ждет следующего шага цикла событий,
+    и все ключи, запрошенные к этому моменту (параллельные задачи, gather,
+    load_many), уходят одним вызовом batch_fn - одним WHERE id IN (...).
+    Результат по ключу запоминается до конца жизни загрузчика; отсутствующий
+    ключ - None. batch_fn получает уникальные ключи и возвращает найденные
+    записи в любом порядке, key достает ключ из записи.
+    """
+
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Iterable[V]]],
+                 key: Callable[[V], K] = attrgetter("id"), max_batch_size: int = 500) -> None:
+        self.batch_fn = batch_fn
+        self.key = key
+        self.max_batch_size = max_batch_size
+        self._results: Dict[K, "asyncio.Future[Optional[V]]"] = {}
+        self._queue: List[K] = []
+        self.batches = 0
+
+    def load(self, key: K) -> "asyncio.Future[Optional[V]]":
+        future = self._results.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._results[key] = loop.create_future()
+            if not self._queue:
+                loop.call_soon(self._dispatch)
+            self._queue.append(key)
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> List[Optional[V]]:
+        """Записи в порядке keys (None - не найдено)"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: Optional[V]) -> None:
+        """Положить уже известную запись (например, только что созданную)"""
+        if key not in self._results:
+            future = self._results[key] = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        asyncio.ensure_future(self._load(queue))
+
+    async def _load(self, queue: List[K]) -> None:
+        # Пачки - по очереди: сессия запроса не допускает параллельных обращений
+        for start in range(0, len(queue), self.max_batch_size):
+            await self._load_batch(queue[start:start + self.max_batch_size])
+
+    async def _load_batch(self, keys: List[K]) -> None:
+        self.batches += 1
+        try:
+            found: Dict[Any, V] = {self.key(value): value for value in await self.batch_fn(keys)}
+        except Exception as exc:
+            for key in keys:
+                # Ошибка не запоминается: следующий load того же ключа повторит запрос
+                future = self._results.pop(key)
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key in keys:
+            future = self._results[key]
+            if not future.done():
+                future.set_result(found.get(key))
@@ -0,0 +1,104 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+ETAG_HEADER = "ETag"
+
+
+def compute_etag(body: bytes) -> str:
+    """Сильный ETag по содержимому ответа"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {value.strip() for value in if_none_match.split(",")}
+    # Слабое сравнение, как требует RFC 9110 для If-None-Match
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def etag_response(request: Request, body: bytes, cache_control: str = "private, no-cache") -> Response:
+    """Готовый JSON с ETag; при совпадении If-None-Match - 304 без тела"""
+    return cached_response(request, CachedBody.of(body), cache_control)
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+
+    @classmethod
+    def of(cls, body: bytes, headers: Optional[Dict[str, str]] = None) -> "CachedBody":
+        return cls(body, compute_etag(body), headers or {})
+
+
+def cached_response(request: Request, cached: CachedBody, cache_control: str) -> Response:
+    headers = {**cached.headers, ETAG_HEADER: cached.etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """LRU готовых ответов (сериализованные байты, ETag, заголовки) по ключу запроса.
+
+    Повторный запрос не обращается к БД и не сериализует ответ заново, а ETag
+    не пересчитывается. invalidate() сбрасывает все записи и повышает поколение:
+    ответ, собранный до сброса, уже не попадет в кеш (см. generation/put).
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def put(self, key: Hashable, body: bytes, generation: int, headers: Optional[Dict[str, str]] = None) -> CachedBody:
+        """Запомнить ответ, собранный при поколении generation (прочитанном до запроса к данным)"""
+        cached = CachedBody.of(body, headers)
+        if self.max_size <= 0:
+            return cached
+        with self._lock:
+            if generation == self.generation:
+                self._entries[key] = cached
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "invalidations": self.invalidations, "generation": self.generation,
+            }
+
+
+# Ответы GET /medications/*: сбрасываются при любом изменении каталога (services.catalog)
+catalog_response_cache = ResponseCache(settings.CATALOG_RESPONSE_CACHE_SIZE)
+CATALOG_CACHE_CONTROL = f"public, max-age={settings.CATALOG_CACHE_MAX_AGE}, must-revalidate"
@@ -0,0 +1,185 @@
+"""Метрики процесса в текстовом формате Prometheus (GET /metrics).
+
+Наблюдения пишутся без блокировок: у каждого потока свои счетчики
+(threading.local), блокировка берется только при первом наблюдении потока,
+чтобы зарегистрировать его счетчики. При выгрузке счетчики потоков
+суммируются. Гистограммы - с фиксированными границами корзин.
+
+- RequestMetricsMiddleware: длительность запросов по шаблону маршрута
+  (/api/v1/patients/{patient_id}, а не /api/v1/patients/42), методу и коду
+  ответа, плюс суммарное время SQL за запрос;
+- instrument_engine: время каждого SQL-выражения (события движка SQLAlchemy);
+- add_stats: значения stats() кешей и пулов на момент выгрузки.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Границы корзин, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+class Histogram:
+    """Гистограмма с метками: для каждого набора меток - счетчики корзин, сумма и число"""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, List[float]]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, List[float]]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # Корзины, +Inf, сумма
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> Dict[Labels, List[float]]:
+        with self._lock:
+            shards = list(self._shards)
+        merged: Dict[Labels, List[float]] = {}
+        for shard in shards:
+            for labels, series in list(shard.items()):
+                total = merged.setdefault(labels, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels((*labels, ('le', str(bound))))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(labels)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Iterable[Tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.request_duration = Histogram(
+            "medai_http_request_duration_seconds", "Длительность HTTP-запроса", LATENCY_BUCKETS
+        )
+        self.request_db_time = Histogram(
+            "medai_http_request_db_seconds", "Суммарное время SQL за HTTP-запрос", LATENCY_BUCKETS
+        )
+        self.statement_duration = Histogram(
+            "medai_db_statement_duration_seconds", "Длительность SQL-выражения", STATEMENT_BUCKETS
+        )
+        self._stats: List[Tuple[str, Callable[[], Dict[str, float]], Tuple[str, ...]]] = []
+
+    def add_stats(self, name: str, stats: Callable[[], Dict[str, float]], counters: Sequence[str] = ()) -> None:
+        """Выгружать stats() компонента как medai_<name>_<ключ>; counters - монотонные ключи"""
+        self._stats.append((name, stats, tuple(counters)))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for histogram in (self.request_duration, self.request_db_time, self.statement_duration):
+            lines.extend(histogram.render())
+        for name, stats, counters in self._stats:
+            for key, value in stats().items():
+                metric = f"medai_{name}_{key}"
+                kind = "counter" if key in counters else "gauge"
+                lines.extend((f"# TYPE {metric} {kind}", f"{metric} {value}"))
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# Время SQL текущего запроса: [секунды, выражения]. Список общий для потоков пула
+# и greenlet драйвера - контекст копируется в них вместе со ссылкой на него
+_request_db_time: ContextVar[Optional[List[float]]] = ContextVar("request_db_time", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Замер каждого SQL-выражения движка (для AsyncEngine - передавать engine.sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        conn.info["statement_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("statement_started", time.perf_counter())
+        metrics.statement_duration.observe(elapsed)
+        accumulated = _request_db_time.get()
+        if accumulated is not None:
+            accumulated[0] += elapsed
+            accumulated[1] += 1
+
+
+class RequestMetricsMiddleware:
+    """ASGI-middleware: длительность и время SQL каждого HTTP-запроса по шаблону маршрута"""
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self._templates: Dict[Callable, str] = {}
+
+    def _route(self, scope) -> str:
+        # Router кладет в scope обработчик совпавшего маршрута; шаблон пути берем у маршрута
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "<unmatched>"
+        template = self._templates.get(endpoint)
+        if template is None:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is not None:
+                    self._templates.setdefault(route.endpoint, route.path)
+            template = self._templates.setdefault(endpoint, "<unmatched>")
+        return template
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        db_time = [0.0, 0]
+        token = _request_db_time.set(db_time)
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_db_time.reset(token)
+            route = (("method", scope["method"]), ("route", self._route(scope)))
+            metrics.request_duration.observe(time.perf_counter() - started, (*route, ("status", str(status))))
+            metrics.request_db_time.observe(db_time[0], route)
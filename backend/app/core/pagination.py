@@ -0,0 +1,69 @@
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException, Response
+
+from app.core.config import settings
+
+# Заголовок, в котором клиент получает курсор следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Непрозрачный курсор: id последней записи страницы"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    return last_id
+
+
+def parse_ids(values: Iterable[Any]) -> List[int]:
+    """Уникальные id пакетного запроса (значения вида "1,2,3" допускаются) с проверкой лимита"""
+    ids: Dict[int, None] = {}
+    for value in values:
+        for part in str(value).split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                ids[int(part)] = None
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Некорректный id: {part!r}")
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Не больше {settings.BATCH_MAX_IDS} id за запрос")
+    return list(ids)
+
+
+def keyset(statement, id_column, after_id: Optional[int], skip: int, limit: int):
+    """Страница select() в порядке id.
+
+    С after_id - keyset (WHERE id > :last ORDER BY id LIMIT n): стоимость не
+    зависит от глубины страницы при индексе (фильтр, id). Без него - прежний
+    OFFSET ради обратной совместимости.
+    """
+    statement = statement.order_by(id_column)
+    if after_id is not None:
+        statement = statement.where(id_column > after_id)
+    elif skip:
+        statement = statement.offset(skip)
+    return statement.limit(limit)
+
+
+def set_next_cursor(response: Response, items: List[Any], limit: int) -> None:
+    """Курсор следующей страницы - в заголовок X-Next-Cursor (неполная страница - последняя)"""
+    if limit <= 0 or len(items) < limit:
+        return
+    last = items[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["id"] if isinstance(last, dict) else last.id)
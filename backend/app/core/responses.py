@@ -0,0 +1,26 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.core.pagination import set_next_cursor
+
+
+def schema_response(adapter: TypeAdapter, content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON уже провалидированных схем без второго прохода FastAPI.
+
+    Если эндпоинт возвращает Response, FastAPI не валидирует его по
+    response_model и не прогоняет через jsonable_encoder (response_model
+    остается для документации). Байты сериализует pydantic-core по схеме
+    adapter: без промежуточных словарей. Строки ORM (from_attributes)
+    предварительно проходят adapter.validate_python(rows, from_attributes=True).
+    """
+    return Response(content=adapter.dump_json(content), media_type="application/json", headers=headers)
+
+
+def page_response(adapter: TypeAdapter, items: List[Any], limit: int) -> Response:
+    """Страница списка с курсором следующей страницы в X-Next-Cursor"""
+    response = schema_response(adapter, items)
+    set_next_cursor(response, items, limit)
+    return response
+
@@ -1,10 +1,20 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Хеши с другой стоимостью помечаются устаревшими и пересчитываются при входе
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
@@ -24,3 +34,60 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверка пароля; второй элемент - новый хеш, если стоимость в настройках изменилась"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasherBusy(Exception):
+    """Очередь хеширования заполнена - запрос отклоняется сразу"""
+
+
+class PasswordHasher:
+    """bcrypt вне цикла событий и пула потоков FastAPI.
+
+    Хеширование идет в отдельном пуле из workers процессов, поэтому всплеск
+    входов нагружает только их и не отнимает GIL и потоки у остальных
+    эндпоинтов. Одновременно принимается не больше max_pending операций
+    (выполняемые + ожидающие), сверх этого - PasswordHasherBusy. При workers=0
+    хеширование идет в пуле потоков (без отдельных процессов).
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self.pending += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, int]:
+        return {"workers": self.workers, "max_pending": self.max_pending, "pending": self.pending, "rejected": self.rejected}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
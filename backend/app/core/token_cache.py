@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from app.core.config import settings
+
+
+class CachedToken(NamedTuple):
+    expires_at: float
+    user_id: int
+    claims: Dict[str, Any]
+    user: Any
+
+
+class TokenCache:
+    """LRU-кеш проверенных токенов: sha256(токен) -> claims и снимок пользователя.
+
+    Запись живет до exp токена, но не дольше ttl: изменения пользователя из
+    других процессов (где инвалидация не видна) подхватываются не позже ttl.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, CachedToken]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0  # токены, сброшенные из-за изменения пользователя
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # Сами токены в памяти процесса не храним
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user_id: int, claims: Dict[str, Any], user: Any) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = min(float(claims.get("exp", 0)), time.time() + self.ttl)
+        key = self._key(token)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = CachedToken(expires_at, user_id, claims, user)
+            self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Сбросить все токены пользователя (изменение, деактивация, удаление)"""
+        with self._lock:
+            keys = list(self._by_user.get(user_id, ()))
+            for key in keys:
+                self._drop(key)
+            self.invalidations += len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "invalidations": self.invalidations,
+            }
+
+    def _drop(self, key: bytes) -> None:
+        entry = self._entries.pop(key)
+        keys = self._by_user.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry.user_id]
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL_SECONDS)
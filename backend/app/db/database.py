@@ -1,16 +1,96 @@
+from typing import Any, Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.db.query_tracer import finish_session_trace, install_query_tracer, trace_session, tracing_enabled
+
+# Синхронные драйверы и их асинхронные аналоги
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def pool_options(url: str) -> Dict[str, Any]:
+    """Параметры пула из настроек (SQLite в памяти работает без пула соединений)"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "aiosqlite":
+        # По умолчанию у aiosqlite NullPool - новое соединение (и поток) на каждую сессию
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options
 
-engine = create_engine(settings.DATABASE_URL)
+
+def async_database_url(url: str) -> str:
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+
+# Синхронный движок - для миграций, старта приложения, скриптов и бенчмарков
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL))
+instrument_engine(engine)
+install_query_tracer(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Асинхронный движок создается при первом запросе: драйвер нужен только если к БД обращаются
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    global _async_session_factory
+    if _async_session_factory is None:
+        url = async_database_url(settings.DATABASE_URL)
+        async_engine = create_async_engine(url, **pool_options(url))
+        instrument_engine(async_engine.sync_engine)
+        install_query_tracer(async_engine.sync_engine)
+        # После commit объекты не истекают - иначе сериализация ответа полезла бы в БД вне await
+        _async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_session_factory
+
+
+async def dispose_async_engine() -> None:
+    """Закрыть асинхронный пул (при остановке приложения); следующий запрос создаст новый движок"""
+    global _async_session_factory
+    if _async_session_factory is not None:
+        factory, _async_session_factory = _async_session_factory, None
+        await factory.kw["bind"].dispose()
+
+
 def get_db():
     db = SessionLocal()
+    if tracing_enabled():
+        trace_session(db, "get_db")
     try:
         yield db
     finally:
+        finish_session_trace(db)
         db.close()
+
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        if tracing_enabled():
+            trace_session(db.sync_session, "get_async_db")
+        try:
+            yield db
+        finally:
+            finish_session_trace(db.sync_session)
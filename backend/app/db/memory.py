@@ -0,0 +1,145 @@
+import threading
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence
+
+
+class DuplicateKeyError(ValueError):
+    """Нарушение уникального индекса таблицы в памяти (репозитории SQL поднимают его же при IntegrityError)"""
+
+
+class MemoryTable:
+    """Таблица в памяти для режима моков: строки-словари с индексами.
+
+    Первичный индекс - dict по id плюс отсортированный список id (для страниц
+    по курсору). Вторичные индексы - значение поля -> отсортированный список id,
+    уникальные - значение -> id. id выдаются монотонно, поэтому вставка - это
+    дописывание в конец списков. Все изменения идут под блокировкой; чтение
+    одной строки по id блокировки не требует.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = (), indexes: Sequence[str] = (), unique: Sequence[str] = ()) -> None:
+        self._lock = threading.RLock()
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._ids: List[int] = []
+        self._indexes: Dict[str, Dict[Hashable, List[int]]] = {field: {} for field in indexes}
+        self._unique: Dict[str, Dict[Hashable, int]] = {field: {} for field in unique}
+        self._next_id = 1
+        for row in sorted(rows, key=lambda row: row["id"]):
+            self.insert(row)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        # Снимок списка id: итерация не ломается от параллельных вставок
+        rows = self._rows
+        return (rows[row_id] for row_id in list(self._ids) if row_id in rows)
+
+    def get(self, row_id: int) -> Optional[Dict[str, Any]]:
+        return self._rows.get(row_id)
+
+    def get_many(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        rows = self._rows
+        return [rows[row_id] for row_id in ids if row_id in rows]
+
+    def find_one(self, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        row_id = self._unique[field].get(value)
+        return None if row_id is None else self._rows.get(row_id)
+
+    def find(self, field: str, value: Any) -> List[Dict[str, Any]]:
+        return self.get_many(list(self._indexes[field].get(value, ())))
+
+    def page(self, after_id: Optional[int] = None, limit: int = 100, offset: int = 0,
+             field: Optional[str] = None, value: Any = None,
+             where: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """Строки в порядке id после after_id (или с offset).
+
+        field/value - выборка по вторичному индексу, where - дополнительный
+        фильтр (проверяется по строкам, начиная с позиции курсора).
+        """
+        with self._lock:
+            ids = self._ids if field is None else self._indexes[field].get(value, [])
+            start = bisect_right(ids, after_id) if after_id is not None else 0
+            skip = offset if after_id is None else 0
+            if where is None:
+                return self.get_many(ids[start + skip:start + skip + limit])
+            rows = self._rows
+            matched = (rows[ids[i]] for i in range(start, len(ids)) if where(rows[ids[i]]))
+            return list(islice(matched, skip, skip + limit))
+
+    def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Вставка строки; без id - выдается следующий. Возвращает сохраненную строку"""
+        with self._lock:
+            row = dict(row)
+            row_id = row.get("id")
+            if row_id is None:
+                row_id = row["id"] = self._next_id
+            elif row_id in self._rows:
+                raise DuplicateKeyError(f"id={row_id}")
+            for field, index in self._unique.items():
+                value = row.get(field)
+                if value is not None and value in index:
+                    raise DuplicateKeyError(f"{field}={value!r}")
+            self._rows[row_id] = row
+            self._next_id = max(self._next_id, row_id + 1)
+            self._insort(self._ids, row_id)
+            for field, index in self._unique.items():
+                if row.get(field) is not None:
+                    index[row[field]] = row_id
+            for field, index in self._indexes.items():
+                self._insort(index.setdefault(row.get(field), []), row_id)
+            return row
+
+    def update(self, row_id: int, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Изменение полей строки на месте с перестройкой затронутых индексов"""
+        with self._lock:
+            row = self._rows.get(row_id)
+            if row is None:
+                return None
+            for field, index in self._unique.items():
+                value = changes.get(field, row.get(field))
+                if field in changes and value is not None and index.get(value, row_id) != row_id:
+                    raise DuplicateKeyError(f"{field}={value!r}")
+            for field, value in changes.items():
+                old = row.get(field)
+                if field in self._unique and old != value:
+                    self._unique[field].pop(old, None)
+                    if value is not None:
+                        self._unique[field][value] = row_id
+                if field in self._indexes and old != value:
+                    self._discard(self._indexes[field], old, row_id)
+                    self._insort(self._indexes[field].setdefault(value, []), row_id)
+                row[field] = value
+            return row
+
+    def delete(self, row_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._rows.pop(row_id, None)
+            if row is None:
+                return None
+            del self._ids[bisect_left(self._ids, row_id)]
+            for field, index in self._unique.items():
+                index.pop(row.get(field), None)
+            for field, index in self._indexes.items():
+                self._discard(index, row.get(field), row_id)
+            return row
+
+    @staticmethod
+    def _insort(ids: List[int], row_id: int) -> None:
+        # Новые id больше всех прежних - обычно это просто append
+        if not ids or ids[-1] < row_id:
+            ids.append(row_id)
+        else:
+            ids.insert(bisect_left(ids, row_id), row_id)
+
+    @staticmethod
+    def _discard(index: Dict[Hashable, List[int]], value: Hashable, row_id: int) -> None:
+        ids = index.get(value)
+        if not ids:
+            return
+        position = bisect_left(ids, row_id)
+        if position < len(ids) and ids[position] == row_id:
+            del ids[position]
+        if not ids:
+            del index[value]
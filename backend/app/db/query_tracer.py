@@ -0,0 +1,181 @@
+"""Трассировка SQL в пределах запроса: счетчик выражений, N+1 и медленные запросы.
+
+Включается QUERY_TRACE=true (или внутри assert_queries). Трасса
+привязывается к сессии (trace_session): при начале транзакции сессия
+передает ее соединению через execution_options, и события курсора движка
+записывают каждое выражение в трассу своей сессии - независимо от того,
+в каком потоке или greenlet оно выполнилось. Выражения группируются по
+отпечатку (литералы и списки IN (...) заменены на ?): отпечаток, повторенный
+в одном запросе больше QUERY_TRACE_REPEAT_LIMIT раз, - признак N+1.
+Выражения дольше SLOW_QUERY_MS пишутся в журнал вместе с планом (EXPLAIN).
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STRINGS_AND_NUMBERS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETER_LISTS = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_ROW_LISTS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACES = re.compile(r"\s+")
+# План выражения: префикс EXPLAIN для диалекта
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "mysql": "EXPLAIN ", "postgresql": "EXPLAIN "}
+
+
+def fingerprint(statement: str) -> str:
+    """Текст выражения без значений: одинаковый для запросов, отличающихся только параметрами"""
+    statement = _STRINGS_AND_NUMBERS.sub("?", statement)
+    statement = _ROW_LISTS.sub("(?)", _PARAMETER_LISTS.sub("(?)", statement))
+    return _SPACES.sub(" ", statement).strip()
+
+
+class QueryTrace:
+    """Выражения одного запроса (или блока assert_queries)"""
+
+    def __init__(self, label: str = "", repeat_limit: Optional[int] = None, slow_ms: Optional[float] = None) -> None:
+        self.label = label
+        self.repeat_limit = settings.QUERY_TRACE_REPEAT_LIMIT if repeat_limit is None else repeat_limit
+        self.slow_ms = settings.SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self.statements = 0
+        self.seconds = 0.0
+        self.fingerprints: Counter = Counter()
+        self.slow: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        key = fingerprint(statement)
+        with self._lock:
+            self.statements += 1
+            self.seconds += elapsed
+            self.fingerprints[key] += 1
+            if elapsed * 1e3 >= self.slow_ms:
+                self.slow.append((elapsed, key))
+
+    def repeated(self) -> Dict[str, int]:
+        """Отпечатки, выполненные больше repeat_limit раз (кандидаты в N+1)"""
+        return {key: count for key, count in self.fingerprints.items() if count > self.repeat_limit}
+
+    def report(self) -> None:
+        for key, count in self.repeated().items():
+            logger.warning("%s: возможный N+1 - %s раз: %s", self.label, count, key)
+        logger.debug("%s: %s SQL-выражений, %.1f мс", self.label, self.statements, self.seconds * 1e3)
+
+
+# Трасса вне сессий запроса (блок assert_queries в том же потоке)
+_current_trace: ContextVar[Optional[QueryTrace]] = ContextVar("query_trace", default=None)
+# Наблюдатели завершенных трасс запросов (assert_queries в тестах через TestClient)
+_observers: List[Callable[[QueryTrace], None]] = []
+
+
+def tracing_enabled() -> bool:
+    return settings.QUERY_TRACE or bool(_observers)
+
+
+def trace_session(session: Session, label: str) -> QueryTrace:
+    """Начать трассу выражений сессии (для AsyncSession - передавать session.sync_session)"""
+    trace = session.info["query_trace"] = QueryTrace(label)
+    return trace
+
+
+def finish_session_trace(session: Session) -> None:
+    trace = session.info.pop("query_trace", None)
+    if trace is None:
+        return
+    trace.report()
+    for observer in list(_observers):
+        observer(trace)
+
+
+@event.listens_for(Session, "after_begin")
+def _attach_trace(session, transaction, connection) -> None:
+    trace = session.info.get("query_trace")
+    if trace is not None:
+        # Connection.execution_options в 2.0 меняет соединение на месте - до возврата в пул
+        connection.execution_options(query_trace=trace)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith("SELECT"):
+        return ""
+    try:
+        # Прямо через курсор DBAPI: мимо событий движка и без рекурсии трассировки
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return "\n".join(" | ".join(str(value) for value in row) for row in cursor.fetchall())
+        finally:
+            cursor.close()
+    except Exception as exc:
+        return f"EXPLAIN недоступен: {exc}"
+
+
+def install_query_tracer(engine) -> None:
+    """Запись выражений движка в трассы (для AsyncEngine - передавать engine.sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        if tracing_enabled():
+            conn.info["traced_statement_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("traced_statement_started", None)
+        if started is None:
+            return
+        trace = context.execution_options.get("query_trace") if context is not None else None
+        trace = trace or _current_trace.get()
+        if trace is None:
+            return
+        elapsed = time.perf_counter() - started
+        trace.record(statement, elapsed)
+        if elapsed * 1e3 >= trace.slow_ms:
+            plan = "" if executemany else _explain(conn, statement, parameters)
+            logger.warning("%s: медленный запрос %.1f мс: %s\n%s", trace.label, elapsed * 1e3, statement, plan)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос выполнил больше SQL-выражений (или повторов одного выражения), чем допускает тест"""
+
+
+@contextmanager
+def assert_queries(max_statements: Optional[int] = None, max_repeats: Optional[int] = None) -> Iterator[List[QueryTrace]]:
+    """Бюджет SQL для теста: каждый запрос в блоке (и код блока) не больше max_statements
+    выражений и не больше max_repeats выполнений одного отпечатка, иначе QueryBudgetExceeded.
+
+        with assert_queries(max_statements=4, max_repeats=1):
+            client.get(f"/api/v1/patients/{patient_id}/summary", headers=headers)
+    """
+    traces: List[QueryTrace] = []
+    local = QueryTrace("assert_queries")
+    token = _current_trace.set(local)
+    _observers.append(traces.append)
+    try:
+        yield traces
+    finally:
+        _observers.remove(traces.append)
+        _current_trace.reset(token)
+    if local.statements:
+        traces.append(local)
+    for trace in traces:
+        problems = []
+        if max_statements is not None and trace.statements > max_statements:
+            problems.append(f"{trace.statements} выражений (допустимо {max_statements})")
+        if max_repeats is not None:
+            problems.extend(
+                f"{count} повторов (допустимо {max_repeats}): {key}"
+                for key, count in trace.fingerprints.items() if count > max_repeats
+            )
+        if problems:
+            raise QueryBudgetExceeded(f"{trace.label}: " + "; ".join(problems))
@@ -1,13 +1,30 @@
-from fastapi import FastAPI
+import json
+from typing import Optional
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.etag import ETAG_HEADER, CachedBody, cached_response, catalog_response_cache
+from app.core.metrics import RequestMetricsMiddleware, metrics
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.security import password_hasher
+from app.core.token_cache import token_cache
+from app.db.database import SessionLocal, dispose_async_engine
+from app.repositories import DuplicateKeyError
+from app.services.catalog import catalog_watcher, load_catalog_indexes
+from app.services.recommendation_jobs import recommendation_jobs
+from app.services.recommendations import patient_feature_cache, recommendation_engine
+from app.mock_data import populate_synthetic_patients
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description="Система рекомендаций медикаментов для врачей",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    # Остальные ответы (после response_model) кодирует orjson вместо json.dumps
+    default_response_class=ORJSONResponse,
 )
 
 # Настройка CORS
@@ -17,10 +34,69 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER],
 )
+# Замер запросов - внешний слой, вместе с CORS и обработкой ошибок
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.exception_handler(DuplicateKeyError)
+async def duplicate_key_handler(request: Request, exc: DuplicateKeyError):
+    # Любое хранилище (memory, sql, sql_async) сообщает о нарушенном ограничении одним исключением
+    return ORJSONResponse(status_code=409, content={"detail": "Запись противоречит существующим данным"})
+
+CACHE_COUNTERS = ("hits", "misses", "evictions", "invalidations")
+metrics.add_stats("token_cache", token_cache.stats, CACHE_COUNTERS)
+metrics.add_stats("catalog_response_cache", catalog_response_cache.stats, CACHE_COUNTERS)
+metrics.add_stats("patient_feature_cache", patient_feature_cache.stats, CACHE_COUNTERS)
+metrics.add_stats("password_hasher", password_hasher.stats, ("rejected",))
+metrics.add_stats("recommendation_jobs", recommendation_jobs.stats)
+metrics.add_stats("recommendation_engine", recommendation_engine.stats, ("compiles", "compile_seconds"))
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Штатный маршрут FastAPI сериализует схему на каждый запрос; схема после
+# регистрации маршрутов не меняется - байты и ETag считаются один раз
+app.router.routes = [route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url]
+_openapi_body: Optional[CachedBody] = None
+
+@app.get(app.openapi_url, include_in_schema=False)
+async def openapi_json(request: Request):
+    global _openapi_body
+    if _openapi_body is None:
+        _openapi_body = CachedBody.of(json.dumps(app.openapi(), ensure_ascii=False, separators=(",", ":")).encode())
+    return cached_response(request, _openapi_body, "public, no-cache")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Метрики процесса в текстовом формате Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+def build_catalog_indexes():
+    in_memory = settings.repository_backend == "memory"
+    if in_memory and settings.MOCK_SYNTHETIC_PATIENTS:
+        populate_synthetic_patients(settings.MOCK_SYNTHETIC_PATIENTS)
+    # Индексы каталога строятся один раз при старте, дальше обновляются инкрементально
+    db = None if in_memory else SessionLocal()
+    try:
+        version = load_catalog_indexes(db)
+    finally:
+        if db is not None:
+            db.close()
+    if not in_memory:
+        catalog_watcher.start(version)
+        # Изменения после версии снимка (или во время загрузки) - сразу, не дожидаясь опроса
+        catalog_watcher.poll()
+    # Задания пересчета, прерванные остановкой или падением, продолжаются с последней пачки
+    recommendation_jobs.resume_unfinished()
+
+@app.on_event("shutdown")
+async def shutdown_pools():
+    catalog_watcher.stop()
+    recommendation_jobs.shutdown()
+    await dispose_async_engine()
+    password_hasher.shutdown()
+
 @app.get("/")
 async def root():
     return {"message": "MedAI API - Система рекомендаций медикаментов"}
@@ -1,9 +1,11 @@
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import random
 
+from app.db.memory import MemoryTable
+
 # Mock users data
-MOCK_USERS = [
+MOCK_USERS = MemoryTable([
     {
         "id": 1,
         "email": "doctor1@medai.com",
@@ -34,10 +36,10 @@ MOCK_USERS = [
         "is_verified": True,
         "created_at": datetime.now() - timedelta(days=20),
     }
-]
+], unique=("email",))
 
 # Mock patients data
-MOCK_PATIENTS = [
+MOCK_PATIENTS = MemoryTable([
     {
         "id": 1,
         "doctor_id": 1,
@@ -100,10 +102,10 @@ MOCK_PATIENTS = [
         "created_at": datetime.now() - timedelta(days=8),
         "updated_at": datetime.now() - timedelta(hours=12),
     }
-]
+], indexes=("doctor_id",))
 
 # Mock medications data
-MOCK_MEDICATIONS = [
+MOCK_MEDICATIONS = MemoryTable([
     {
         "id": 1,
         "name": "Аспирин",
@@ -172,11 +174,74 @@ MOCK_MEDICATIONS = [
         "is_active": True,
         "created_at": datetime.now() - timedelta(days=16),
         "updated_at": datetime.now() - timedelta(days=16),
+    },
+    {
+        "id": 4,
+        "name": "Варфарин",
+        "generic_name": "Варфарин натрия",
+        "drug_class": "Антикоагулянты",
+        "mechanism_of_action": "Антагонист витамина K",
+        "available_dosages": ["2.5 мг", "5 мг"],
+        "indications": ["Фибрилляция предсердий", "Тромбоз глубоких вен", "ТЭЛА"],
+        "contraindications": ["Активное кровотечение", "Беременность", "Печеночная недостаточность"],
+        "side_effects": ["Кровотечения", "Некроз кожи"],
+        "drug_interactions": [
+            {"medication": "Амиодарон", "severity": "высокий", "description": "Усиление антикоагулянтного эффекта", "management": "Снижение дозы, контроль МНО"}
+        ],
+        "monitoring_parameters": [
+            {"parameter": "МНО", "frequency": "еженедельно до стабилизации", "normal_range": "2.0-3.0", "critical_values": ">4.0"}
+        ],
+        "therapeutic_range": {"min": 2.0, "max": 3.0},
+        "is_active": True,
+        "created_at": datetime.now() - timedelta(days=14),
+        "updated_at": datetime.now() - timedelta(days=14),
+    },
+    {
+        "id": 5,
+        "name": "Эликвис",
+        "generic_name": "Апиксабан",
+        "drug_class": "Антикоагулянты",
+        "mechanism_of_action": "Прямой ингибитор фактора Xa",
+        "available_dosages": ["2.5 мг", "5 мг"],
+        "indications": ["Фибрилляция предсердий", "Тромбоз глубоких вен"],
+        "contraindications": ["Активное кровотечение", "Печеночная недостаточность"],
+        "side_effects": ["Кровотечения", "Анемия"],
+        "drug_interactions": [
+            {"medication": "Кетоконазол", "severity": "высокий", "description": "Повышение концентрации апиксабана", "management": "Избегать сочетания"}
+        ],
+        "monitoring_parameters": [
+            {"parameter": "Гемоглобин", "frequency": "1 раз в год", "normal_range": "120-160 г/л", "critical_values": "<90 г/л"}
+        ],
+        "therapeutic_range": {"min": 0, "max": 10},
+        "is_active": True,
+        "created_at": datetime.now() - timedelta(days=14),
+        "updated_at": datetime.now() - timedelta(days=14),
+    },
+    {
+        "id": 6,
+        "name": "Ксарелто",
+        "generic_name": "Ривароксабан",
+        "drug_class": "Антикоагулянты",
+        "mechanism_of_action": "Прямой ингибитор фактора Xa",
+        "available_dosages": ["15 мг", "20 мг"],
+        "indications": ["Фибрилляция предсердий", "Тромбоз глубоких вен", "ТЭЛА"],
+        "contraindications": ["Активное кровотечение", "Печеночная недостаточность", "Беременность"],
+        "side_effects": ["Кровотечения", "Тошнота"],
+        "drug_interactions": [
+            {"medication": "Кетоконазол", "severity": "высокий", "description": "Повышение концентрации ривароксабана", "management": "Избегать сочетания"}
+        ],
+        "monitoring_parameters": [
+            {"parameter": "Гемоглобин", "frequency": "1 раз в год", "normal_range": "120-160 г/л", "critical_values": "<90 г/л"}
+        ],
+        "therapeutic_range": {"min": 0, "max": 20},
+        "is_active": True,
+        "created_at": datetime.now() - timedelta(days=14),
+        "updated_at": datetime.now() - timedelta(days=14),
     }
-]
+], indexes=("drug_class",))
 
 # Mock prescriptions data
-MOCK_PRESCRIPTIONS = [
+MOCK_PRESCRIPTIONS = MemoryTable([
     {
         "id": 1,
         "patient_id": 1,
@@ -243,10 +308,10 @@ MOCK_PRESCRIPTIONS = [
         "created_at": datetime.now() - timedelta(days=10),
         "updated_at": datetime.now() - timedelta(days=3),
     }
-]
+], indexes=("patient_id", "doctor_id"))
 
 # Mock control visits data
-MOCK_CONTROL_VISITS = [
+MOCK_CONTROL_VISITS = MemoryTable([
     {
         "id": 1,
         "patient_id": 1,
@@ -265,10 +330,10 @@ MOCK_CONTROL_VISITS = [
         "notes": "Контроль глюкозы и HbA1c",
         "created_at": datetime.now() - timedelta(days=3),
     }
-]
+], indexes=("patient_id",))
 
 # Mock side effects data
-MOCK_SIDE_EFFECTS = [
+MOCK_SIDE_EFFECTS = MemoryTable([
     {
         "id": 1,
         "patient_id": 1,
@@ -289,49 +354,69 @@ MOCK_SIDE_EFFECTS = [
         "reported_date": datetime.now() - timedelta(days=5),
         "created_at": datetime.now() - timedelta(days=5),
     }
-]
+], indexes=("patient_id",))
+
+# Фоновые задания (массовый пересчет рекомендаций)
+MOCK_JOBS = MemoryTable(indexes=("doctor_id", "status"))
 
 # Helper functions
-def get_mock_user_by_id(user_id: int) -> Dict[str, Any]:
+def get_mock_user_by_id(user_id: int) -> Optional[Dict[str, Any]]:
     """Get mock user by ID"""
-    for user in MOCK_USERS:
-        if user["id"] == user_id:
-            return user
-    return None
+    return MOCK_USERS.get(user_id)
+
+def get_mock_user_by_email(email: str) -> Optional[Dict[str, Any]]:
+    """Get mock user by email"""
+    return MOCK_USERS.find_one("email", email)
 
-def get_mock_patient_by_id(patient_id: int) -> Dict[str, Any]:
+def get_mock_patient_by_id(patient_id: int) -> Optional[Dict[str, Any]]:
     """Get mock patient by ID"""
-    for patient in MOCK_PATIENTS:
-        if patient["id"] == patient_id:
-            return patient
-    return None
+    return MOCK_PATIENTS.get(patient_id)
 
-def get_mock_medication_by_id(medication_id: int) -> Dict[str, Any]:
+def get_mock_medication_by_id(medication_id: int) -> Optional[Dict[str, Any]]:
     """Get mock medication by ID"""
-    for medication in MOCK_MEDICATIONS:
-        if medication["id"] == medication_id:
-            return medication
-    return None
+    return MOCK_MEDICATIONS.get(medication_id)
 
-def get_mock_prescription_by_id(prescription_id: int) -> Dict[str, Any]:
+def get_mock_prescription_by_id(prescription_id: int) -> Optional[Dict[str, Any]]:
     """Get mock prescription by ID"""
-    for prescription in MOCK_PRESCRIPTIONS:
-        if prescription["id"] == prescription_id:
-            return prescription
-    return None
+    return MOCK_PRESCRIPTIONS.get(prescription_id)
 
 def get_mock_prescriptions_by_patient(patient_id: int) -> List[Dict[str, Any]]:
     """Get mock prescriptions by patient ID"""
-    return [p for p in MOCK_PRESCRIPTIONS if p["patient_id"] == patient_id]
+    return MOCK_PRESCRIPTIONS.find("patient_id", patient_id)
 
 def get_mock_control_visits_by_patient(patient_id: int) -> List[Dict[str, Any]]:
     """Get mock control visits by patient ID"""
-    return [v for v in MOCK_CONTROL_VISITS if v["patient_id"] == patient_id]
+    return MOCK_CONTROL_VISITS.find("patient_id", patient_id)
 
 def get_mock_side_effects_by_patient(patient_id: int) -> List[Dict[str, Any]]:
     """Get mock side effects by patient ID"""
-    return [s for s in MOCK_SIDE_EFFECTS if s["patient_id"] == patient_id]
+    return MOCK_SIDE_EFFECTS.find("patient_id", patient_id)
 
-def generate_mock_id() -> int:
-    """Generate a new mock ID"""
-    return random.randint(1000, 9999)
+def populate_synthetic_patients(count: int, seed: int = 42) -> None:
+    """Synthetic patients (and one prescription each) for demos and load tests"""
+    rng = random.Random(seed)
+    doctor_ids = [user["id"] for user in MOCK_USERS]
+    medications = list(MOCK_MEDICATIONS)
+    for i in range(count):
+        medication = rng.choice(medications)
+        patient = MOCK_PATIENTS.insert({
+            "doctor_id": rng.choice(doctor_ids),
+            "full_name": f"Пациент {i + 1}",
+            "age": rng.randint(18, 95),
+            "gender": rng.choice(["male", "female"]),
+            "comorbidities": [],
+            "current_medications": [{"name": medication["name"], "dosage": medication["available_dosages"][0]}],
+            "allergies": [],
+            "previous_anticoagulants": [],
+            "created_at": datetime.now(),
+            "updated_at": None,
+        })
+        MOCK_PRESCRIPTIONS.insert({
+            "patient_id": patient["id"],
+            "doctor_id": patient["doctor_id"],
+            "recommended_medications": [{"id": medication["id"], "name": medication["name"]}],
+            "status": "active",
+            "is_ai_generated": False,
+            "created_at": datetime.now(),
+            "updated_at": None,
+        })
@@ -2,3 +2,9 @@ from .user import User
 from .patient import Patient
 from .prescription import Prescription
 from .medication import Medication
+from .patient_medication import PatientMedication
+from .patient_allergy import PatientAllergy
+from .control_visit import ControlVisit
+from .side_effect import SideEffect
+from .job import Job
+from .catalog_change import CatalogChange, CatalogVersion
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class CatalogChange(Base):
+    """Журнал изменений каталога препаратов.
+
+    Каждая запись препарата через репозиторий добавляет строки в той же
+    транзакции, помечая их версией из счетчика CatalogVersion; процессы API
+    опрашивают счетчик и догружают только изменившиеся препараты
+    (см. app.services.catalog.CatalogWatcher).
+    """
+    __tablename__ = "catalog_changes"
+    
+    id = Column(Integer, primary_key=True)
+    # Без внешнего ключа: запись об удаленном препарате тоже нужна
+    medication_id = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, server_default="0", index=True)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<CatalogChange(id={self.id}, version={self.version}, medication_id={self.medication_id})>"
+
+
+class CatalogVersion(Base):
+    """Счетчик версий каталога - одна строка (id=1).
+
+    Автоинкрементный id назначается при вставке, а не при commit: запись с
+    меньшим id может зафиксироваться позже большей. Счетчик увеличивается
+    UPDATE в транзакции записи, и блокировка строки держится до commit -
+    версии фиксируются строго по порядку.
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CatalogVersion(version={self.version})>"
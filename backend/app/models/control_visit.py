@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+class ControlVisit(Base):
+    """Контрольный визит пациента"""
+    __tablename__ = "control_visits"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    type = Column(String(32), nullable=False)  # routine, follow_up, urgent
+    scheduled_date = Column(DateTime(timezone=True), nullable=False)
+    status = Column(String(32), default="scheduled")  # scheduled, completed, cancelled
+    notes = Column(Text, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Связи
+    patient = relationship("Patient", back_populates="control_visits")
+    
+    def __repr__(self):
+        return f"<ControlVisit(id={self.id}, patient_id={self.patient_id})>"
@@ -0,0 +1,38 @@
+from sqlalchemy import JSON, Column, Integer, String, DateTime, Text, ForeignKey, Float
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+class Job(Base):
+    """Фоновое задание (массовый пересчет рекомендаций по когорте пациентов)"""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)  # кто запустил
+    
+    kind = Column(String(32), nullable=False)  # recommendations
+    status = Column(String(16), nullable=False, default="pending")  # pending, running, completed, failed
+    params = Column(JSON, nullable=True)  # фильтр когорты
+    error = Column(Text, nullable=True)
+    
+    # Прогресс; last_patient_id - курсор последней зафиксированной пачки (с него задание продолжается)
+    total = Column(Integer, nullable=True)
+    processed = Column(Integer, nullable=False, default=0)
+    last_patient_id = Column(Integer, nullable=True)
+    elapsed_seconds = Column(Float, nullable=False, default=0.0)
+    
+    # Процесс, выполняющий задание, и время его последней отметки: задание с
+    # устаревшей отметкой (процесс упал) может забрать другой процесс
+    worker = Column(String(128), nullable=True)
+    heartbeat = Column(DateTime(timezone=True), nullable=True)
+    
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Связи
+    doctor = relationship("User")
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}')>"
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime
+from sqlalchemy import JSON, Column, Integer, String, Text, Float, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
 class Medication(Base):
     __tablename__ = "medications"
+    __table_args__ = (
+        # Keyset-пагинация каталога, в том числе с фильтром по классу
+        Index("ix_medications_is_active_id", "is_active", "id"),
+        Index("ix_medications_drug_class_id", "drug_class", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
@@ -12,19 +17,19 @@ class Medication(Base):
     mechanism_of_action = Column(Text, nullable=True)
     
     # Дозировки
-    available_dosages = Column(Text, nullable=True)  # JSON string
+    available_dosages = Column(JSON, nullable=True)
     
     # Показания и противопоказания
-    indications = Column(Text, nullable=True)  # JSON string
-    contraindications = Column(Text, nullable=True)  # JSON string
-    side_effects = Column(Text, nullable=True)  # JSON string
+    indications = Column(JSON, nullable=True)
+    contraindications = Column(JSON, nullable=True)
+    side_effects = Column(JSON, nullable=True)
     
     # Взаимодействия
-    drug_interactions = Column(Text, nullable=True)  # JSON string
+    drug_interactions = Column(JSON, nullable=True)
     
     # Мониторинг
-    monitoring_parameters = Column(Text, nullable=True)  # JSON string
-    therapeutic_range = Column(Text, nullable=True)  # JSON string
+    monitoring_parameters = Column(JSON, nullable=True)
+    therapeutic_range = Column(JSON, nullable=True)
     
     # Метаданные
     is_active = Column(Boolean, default=True)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float
+from sqlalchemy import JSON, Column, Integer, String, DateTime, Text, ForeignKey, Float, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        # Keyset-пагинация списка пациентов врача
+        Index("ix_patients_doctor_id_id", "doctor_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -22,20 +26,22 @@ class Patient(Base):
     
     # Клинические данные
     diagnosis = Column(Text, nullable=True)
-    comorbidities = Column(Text, nullable=True)  # JSON string
+    comorbidities = Column(JSON, nullable=True)
     
     # Лабораторные показатели
-    lab_results = Column(Text, nullable=True)  # JSON string
+    lab_results = Column(JSON, nullable=True)
     
     # Текущая терапия
-    current_medications = Column(Text, nullable=True)  # JSON string
-    allergies = Column(Text, nullable=True)  # JSON string
-    previous_anticoagulants = Column(Text, nullable=True)  # JSON string
+    # Для выборок по препаратам и аллергенам есть нормализованные таблицы
+    # patient_medications / patient_allergies (см. app.services.patient_sync)
+    current_medications = Column(JSON, nullable=True)
+    allergies = Column(JSON, nullable=True)
+    previous_anticoagulants = Column(JSON, nullable=True)
     
     # Дополнительные факторы
-    lifestyle_factors = Column(Text, nullable=True)  # JSON string (smoking, alcohol, physical_activity)
-    risk_factors = Column(Text, nullable=True)  # JSON string (bleeding, falls, surgeries)
-    social_factors = Column(Text, nullable=True)  # JSON string (compliance, support)
+    lifestyle_factors = Column(JSON, nullable=True)  # smoking, alcohol, physical_activity
+    risk_factors = Column(JSON, nullable=True)  # bleeding, falls, surgeries
+    social_factors = Column(JSON, nullable=True)  # compliance, support
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -43,6 +49,10 @@ class Patient(Base):
     # Связи
     doctor = relationship("User", back_populates="patients")
     prescriptions = relationship("Prescription", back_populates="patient")
+    medication_entries = relationship("PatientMedication", back_populates="patient", cascade="all, delete-orphan")
+    allergy_entries = relationship("PatientAllergy", back_populates="patient", cascade="all, delete-orphan")
+    control_visits = relationship("ControlVisit", back_populates="patient", cascade="all, delete-orphan")
+    side_effects = relationship("SideEffect", back_populates="patient", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Patient(id={self.id}, name='{self.full_name}')>"
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+class PatientAllergy(Base):
+    """Аллергия пациента (нормализованная копия Patient.allergies)"""
+    __tablename__ = "patient_allergies"
+    __table_args__ = (
+        UniqueConstraint("patient_id", "allergen", name="uq_patient_allergies_patient_allergen"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
+    # Если аллерген - препарат каталога, проверка аллергии идет по medication_id
+    medication_id = Column(Integer, ForeignKey("medications.id", ondelete="SET NULL"), nullable=True, index=True)
+    allergen = Column(String(255), nullable=False, index=True)
+    severity = Column(String(64), nullable=True)
+    reaction = Column(String(255), nullable=True)
+    
+    # Связи
+    patient = relationship("Patient", back_populates="allergy_entries")
+    medication = relationship("Medication")
+    
+    def __repr__(self):
+        return f"<PatientAllergy(patient_id={self.patient_id}, allergen='{self.allergen}')>"
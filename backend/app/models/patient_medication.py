@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+class PatientMedication(Base):
+    """Строка текущей терапии пациента (нормализованная копия Patient.current_medications)"""
+    __tablename__ = "patient_medications"
+    __table_args__ = (
+        UniqueConstraint("patient_id", "name", name="uq_patient_medications_patient_name"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
+    # Препарата может не быть в каталоге - тогда связь только по названию
+    medication_id = Column(Integer, ForeignKey("medications.id", ondelete="SET NULL"), nullable=True, index=True)
+    name = Column(String(255), nullable=False, index=True)
+    dosage = Column(String(255), nullable=True)
+    frequency = Column(String(255), nullable=True)
+    
+    # Связи
+    patient = relationship("Patient", back_populates="medication_entries")
+    medication = relationship("Medication")
+    
+    def __repr__(self):
+        return f"<PatientMedication(patient_id={self.patient_id}, name='{self.name}')>"
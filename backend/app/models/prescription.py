@@ -1,27 +1,33 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Float, Boolean
+from sqlalchemy import JSON, Column, Integer, String, DateTime, Text, ForeignKey, Float, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
 class Prescription(Base):
     __tablename__ = "prescriptions"
+    __table_args__ = (
+        # Keyset-пагинация списка назначений врача
+        Index("ix_prescriptions_doctor_id_id", "doctor_id", "id"),
+        # Назначения пациента (карточка, последнее открытое назначение в заданиях пересчета)
+        Index("ix_prescriptions_patient_id", "patient_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
     doctor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Рекомендации
-    recommended_medications = Column(Text, nullable=True)  # JSON string
-    dosage = Column(Text, nullable=True)  # JSON string
+    recommended_medications = Column(JSON, nullable=True)
+    dosage = Column(JSON, nullable=True)
     duration = Column(String, nullable=True)
     instructions = Column(Text, nullable=True)
     
     # AI-рекомендации
-    ai_recommendations = Column(Text, nullable=True)  # JSON string
+    ai_recommendations = Column(JSON, nullable=True)
     justification = Column(Text, nullable=True)  # Обоснование выбора
-    alternative_options = Column(Text, nullable=True)  # JSON string
-    warnings = Column(Text, nullable=True)  # JSON string
-    monitoring_plan = Column(Text, nullable=True)  # JSON string
+    alternative_options = Column(JSON, nullable=True)
+    warnings = Column(JSON, nullable=True)
+    monitoring_plan = Column(JSON, nullable=True)
     
     # Обратная связь
     patient_feedback = Column(Text, nullable=True)
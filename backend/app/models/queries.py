@@ -0,0 +1,62 @@
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Query, Session
+
+from app.models.medication import Medication
+from app.models.patient import Patient
+from app.models.patient_allergy import PatientAllergy
+from app.models.patient_medication import PatientMedication
+from app.models.prescription import Prescription
+
+
+def _json_array_contains(db: Session, column: str, key: Optional[str], param: str, value):
+    """Условие «JSON-массив column содержит value» (по полю key, если элементы - объекты).
+
+    В MySQL это MEMBER OF над тем же выражением, что и multi-valued индекс из
+    миграции 0002, поэтому выполняется поиском по индексу. В SQLite индекса по
+    JSON нет - используется json_each (проход по таблице, но без разбора в Python).
+    """
+    if db.get_bind().dialect.name == "mysql":
+        expression = column if key is None else f"{column}->'$[*].{key}'"
+        clause = text(f":{param} MEMBER OF ({expression})")
+    else:
+        element = "j.value" if key is None else f"json_extract(j.value, '$.{key}')"
+        clause = text(f"EXISTS (SELECT 1 FROM json_each({column}) AS j WHERE {element} = :{param})")
+    return clause.bindparams(**{param: value})
+
+
+def patients_on_medication(db: Session, name: str) -> Query:
+    """Пациенты, у которых препарат name есть в текущей терапии (индекс patient_medications.name)"""
+    return db.query(Patient).join(PatientMedication).filter(PatientMedication.name == name)
+
+
+def patients_on_medication_id(db: Session, medication_id: int) -> Query:
+    """Пациенты, принимающие препарат каталога medication_id"""
+    return db.query(Patient).join(PatientMedication).filter(PatientMedication.medication_id == medication_id)
+
+
+def patients_allergic_to(db: Session, allergen: str) -> Query:
+    """Пациенты с аллергией на allergen (индекс patient_allergies.allergen)"""
+    return db.query(Patient).join(PatientAllergy).filter(PatientAllergy.allergen == allergen)
+
+
+def patients_with_comorbidity(db: Session, comorbidity: str) -> Query:
+    """Пациенты с сопутствующим заболеванием comorbidity"""
+    return db.query(Patient).filter(
+        _json_array_contains(db, "patients.comorbidities", None, "comorbidity", comorbidity)
+    )
+
+
+def prescriptions_with_medication(db: Session, medication_id: int) -> Query:
+    """Назначения, в recommended_medications которых есть препарат medication_id"""
+    return db.query(Prescription).filter(
+        _json_array_contains(db, "prescriptions.recommended_medications", "id", "medication_id", medication_id)
+    )
+
+
+def medications_contraindicated_in(db: Session, condition: str) -> Query:
+    """Препараты, противопоказанные при condition"""
+    return db.query(Medication).filter(
+        _json_array_contains(db, "medications.contraindications", None, "condition", condition)
+    )
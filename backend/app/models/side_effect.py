@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+
+class SideEffect(Base):
+    """Побочный эффект терапии, отмеченный у пациента"""
+    __tablename__ = "side_effects"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, ForeignKey("patients.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    medication_name = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    severity = Column(String(32), nullable=True)  # mild, moderate, severe
+    status = Column(String(32), default="monitoring")  # monitoring, resolved
+    reported_date = Column(DateTime(timezone=True), server_default=func.now())
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Связи
+    patient = relationship("Patient", back_populates="side_effects")
+    
+    def __repr__(self):
+        return f"<SideEffect(id={self.id}, patient_id={self.patient_id})>"
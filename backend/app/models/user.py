@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
 from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
 from app.db.database import Base
 
 class User(Base):
@@ -20,5 +21,8 @@ class User(Base):
     medical_license = Column(String, nullable=True)
     phone = Column(String, nullable=True)
     
+    # Связи
+    patients = relationship("Patient", back_populates="doctor")
+    
     def __repr__(self):
         return f"<User(id={self.id}, email='{self.email}')>"
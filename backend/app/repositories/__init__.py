@@ -0,0 +1,43 @@
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.memory import DuplicateKeyError
+from app.db.query_tracer import finish_session_trace, trace_session, tracing_enabled
+from app.repositories.base import (
+    JobRepository, MedicationRepository, PatientRepository, PrescriptionRepository, Repositories, UserRepository,
+)
+
+REPOSITORY_BACKENDS = ("memory", "sql", "sql_async")
+
+
+async def get_repositories(request: Request):
+    """Репозитории запроса для бэкенда из настроек (REPOSITORY_BACKEND)"""
+    backend = settings.repository_backend
+    label = f"{request.method} {request.url.path}"
+    if backend == "memory":
+        from app.repositories.memory import memory_repositories
+        yield memory_repositories
+    elif backend == "sql_async":
+        from app.db.database import get_async_session_factory
+        from app.repositories.sql import AsyncSessionRunner, sql_repositories
+        async with get_async_session_factory()() as session:
+            if tracing_enabled():
+                trace_session(session.sync_session, label)
+            try:
+                yield sql_repositories(AsyncSessionRunner(session))
+            finally:
+                finish_session_trace(session.sync_session)
+    elif backend == "sql":
+        from app.db.database import SessionLocal
+        from app.repositories.sql import SessionRunner, sql_repositories
+        session = SessionLocal()
+        if tracing_enabled():
+            trace_session(session, label)
+        try:
+            yield sql_repositories(SessionRunner(session))
+        finally:
+            finish_session_trace(session)
+            await run_in_threadpool(session.close)
+    else:
+        raise ValueError(f"Неизвестный REPOSITORY_BACKEND: {backend!r}, ожидается один из {REPOSITORY_BACKENDS}")
@@ -0,0 +1,137 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.schemas.job import Job
+from app.schemas.medication import Medication
+from app.schemas.patient import Patient, PatientSummary
+from app.schemas.prescription import Prescription
+from app.schemas.user import UserInDB
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    async def get(self, user_id: int) -> Optional[UserInDB]: ...
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[UserInDB]: ...
+
+    @abstractmethod
+    async def create(self, data: Dict[str, Any]) -> UserInDB:
+        """Новый пользователь; при занятом email - DuplicateKeyError"""
+
+    @abstractmethod
+    async def set_password_hash(self, user_id: int, hashed_password: str) -> None: ...
+
+
+class PatientRepository(ABC):
+    """Пациенты; все выборки ограничены пациентами врача doctor_id"""
+
+    @abstractmethod
+    async def get(self, patient_id: int, doctor_id: int) -> Optional[Patient]: ...
+
+    @abstractmethod
+    async def get_many(self, ids: Sequence[int], doctor_id: int) -> List[Patient]:
+        """Пачка пациентов одним обращением, в порядке ids (отсутствующие пропускаются)"""
+
+    @abstractmethod
+    async def list(self, doctor_id: int, after_id: Optional[int], skip: int, limit: int) -> List[Patient]:
+        """Страница в порядке id: после after_id (keyset) или с пропуском skip"""
+
+    @abstractmethod
+    async def create(self, doctor_id: int, data: Dict[str, Any]) -> Patient: ...
+
+    @abstractmethod
+    async def create_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> List[Patient]:
+        """Массовая вставка одной транзакцией"""
+
+    @abstractmethod
+    async def import_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> int:
+        """Массовая вставка одной транзакцией без возврата записей (импорт); число вставленных"""
+
+    @abstractmethod
+    async def update(self, patient_id: int, doctor_id: int, changes: Dict[str, Any]) -> Optional[Patient]: ...
+
+    @abstractmethod
+    async def delete(self, patient_id: int, doctor_id: int) -> bool: ...
+
+    @abstractmethod
+    async def summary(self, patient_id: int, doctor_id: int) -> Optional[PatientSummary]:
+        """Пациент с назначениями, визитами и побочными эффектами за постоянное число запросов"""
+
+
+class PrescriptionRepository(ABC):
+    """Назначения; все выборки ограничены назначениями врача doctor_id"""
+
+    @abstractmethod
+    async def get(self, prescription_id: int, doctor_id: int) -> Optional[Prescription]: ...
+
+    @abstractmethod
+    async def get_many(self, ids: Sequence[int], doctor_id: int) -> List[Prescription]: ...
+
+    @abstractmethod
+    async def list(self, doctor_id: int, after_id: Optional[int], skip: int, limit: int) -> List[Prescription]: ...
+
+    @abstractmethod
+    async def list_by_patient(self, patient_id: int, doctor_id: int) -> List[Prescription]: ...
+
+    @abstractmethod
+    async def create(self, doctor_id: int, data: Dict[str, Any]) -> Prescription: ...
+
+    @abstractmethod
+    async def create_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> List[Prescription]: ...
+
+    @abstractmethod
+    async def update(self, prescription_id: int, doctor_id: int, changes: Dict[str, Any]) -> Optional[Prescription]: ...
+
+    @abstractmethod
+    async def delete(self, prescription_id: int, doctor_id: int) -> bool: ...
+
+
+class MedicationRepository(ABC):
+    """Каталог препаратов (общий для всех врачей)"""
+
+    @abstractmethod
+    async def get(self, medication_id: int) -> Optional[Medication]: ...
+
+    @abstractmethod
+    async def get_many(self, ids: Sequence[int]) -> List[Medication]: ...
+
+    @abstractmethod
+    async def list(self, drug_class: Optional[str], after_id: Optional[int], skip: int, limit: int) -> List[Medication]:
+        """Активные препараты в порядке id, опционально одного класса"""
+
+    @abstractmethod
+    async def drug_classes(self) -> List[str]: ...
+
+    @abstractmethod
+    async def create(self, data: Dict[str, Any]) -> Medication: ...
+
+    @abstractmethod
+    async def create_many(self, items: Sequence[Dict[str, Any]]) -> List[Medication]: ...
+
+    @abstractmethod
+    async def update(self, medication_id: int, changes: Dict[str, Any]) -> Optional[Medication]: ...
+
+
+class JobRepository(ABC):
+    """Фоновые задания; выполняет их app.services.recommendation_jobs"""
+
+    @abstractmethod
+    async def create(self, doctor_id: int, kind: str, params: Dict[str, Any]) -> Job: ...
+
+    @abstractmethod
+    async def get(self, job_id: int, doctor_id: int) -> Optional[Job]:
+        """Задание, запущенное врачом doctor_id"""
+
+
+class Repositories:
+    """Набор репозиториев одного запроса"""
+
+    def __init__(self, users: UserRepository, patients: PatientRepository,
+                 prescriptions: PrescriptionRepository, medications: MedicationRepository,
+                 jobs: JobRepository) -> None:
+        self.users = users
+        self.patients = patients
+        self.prescriptions = prescriptions
+        self.medications = medications
+        self.jobs = jobs
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List
+
+from fastapi import Depends
+
+from app.core.config import settings
+from app.core.dataloader import DataLoader
+from app.repositories import Repositories, get_repositories
+from app.schemas.medication import Medication
+from app.schemas.patient import Patient
+
+
+class Loaders:
+    """Загрузчики записей по id на время одного запроса (поверх репозиториев запроса)"""
+
+    def __init__(self, repos: Repositories) -> None:
+        self.repos = repos
+        # Загрузчики работают через одну сессию запроса - их пачки не должны идти параллельно
+        self._lock = asyncio.Lock()
+        self.medications: DataLoader[int, Medication] = self._loader(repos.medications.get_many)
+        self._patients: Dict[int, DataLoader[int, Patient]] = {}
+
+    def _loader(self, batch_fn: Callable[[List[int]], Awaitable[List]]) -> DataLoader:
+        async def locked(ids: List[int]) -> List:
+            async with self._lock:
+                return await batch_fn(ids)
+        return DataLoader(locked, max_batch_size=settings.BATCH_MAX_IDS)
+
+    def patients(self, doctor_id: int) -> DataLoader[int, Patient]:
+        """Пациенты врача doctor_id (чужие id загружаются как None)"""
+        loader = self._patients.get(doctor_id)
+        if loader is None:
+            loader = self._patients[doctor_id] = self._loader(lambda ids: self.repos.patients.get_many(ids, doctor_id))
+        return loader
+
+
+def get_loaders(repos: Repositories = Depends(get_repositories)) -> Loaders:
+    # FastAPI кеширует зависимость в пределах запроса - загрузчики общие для всех ее потребителей
+    return Loaders(repos)
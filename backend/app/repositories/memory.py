@@ -0,0 +1,204 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from app import mock_data
+from app.core.token_cache import token_cache
+from app.repositories.base import (
+    JobRepository, MedicationRepository, PatientRepository, PrescriptionRepository, Repositories, UserRepository,
+)
+from app.schemas.job import Job
+from app.schemas.medication import Medication
+from app.schemas.control_visit import ControlVisit
+from app.schemas.patient import Patient, PatientSummary
+from app.schemas.side_effect import SideEffect
+from app.schemas.prescription import Prescription
+from app.schemas.user import UserInDB
+
+
+def _owned(row: Optional[Dict[str, Any]], doctor_id: int) -> Optional[Dict[str, Any]]:
+    return row if row is not None and row.get("doctor_id") == doctor_id else None
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self, table) -> None:
+        self.table = table
+
+    async def get(self, user_id: int) -> Optional[UserInDB]:
+        row = self.table.get(user_id)
+        return None if row is None else UserInDB(**row)
+
+    async def get_by_email(self, email: str) -> Optional[UserInDB]:
+        row = self.table.find_one("email", email)
+        return None if row is None else UserInDB(**row)
+
+    async def create(self, data: Dict[str, Any]) -> UserInDB:
+        row = self.table.insert({
+            **data,
+            "is_active": True,
+            "is_verified": True,
+            "created_at": datetime.now(),
+        })
+        return UserInDB(**row)
+
+    async def set_password_hash(self, user_id: int, hashed_password: str) -> None:
+        self.table.update(user_id, {"hashed_password": hashed_password})
+        # Кешированный снимок пользователя больше не актуален
+        token_cache.invalidate_user(user_id)
+
+
+class MemoryPatientRepository(PatientRepository):
+    def __init__(self, table, prescriptions, control_visits, side_effects) -> None:
+        self.table = table
+        self.prescriptions = prescriptions
+        self.control_visits = control_visits
+        self.side_effects = side_effects
+
+    async def get(self, patient_id: int, doctor_id: int) -> Optional[Patient]:
+        row = _owned(self.table.get(patient_id), doctor_id)
+        return None if row is None else Patient(**row)
+
+    async def get_many(self, ids: Sequence[int], doctor_id: int) -> List[Patient]:
+        return [Patient(**row) for row in self.table.get_many(ids) if row["doctor_id"] == doctor_id]
+
+    async def list(self, doctor_id: int, after_id: Optional[int], skip: int, limit: int) -> List[Patient]:
+        return [Patient(**row) for row in self.table.page(after_id, limit, skip, "doctor_id", doctor_id)]
+
+    async def create(self, doctor_id: int, data: Dict[str, Any]) -> Patient:
+        return (await self.create_many(doctor_id, [data]))[0]
+
+    async def create_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> List[Patient]:
+        now = datetime.now()
+        return [
+            Patient(**self.table.insert({**data, "doctor_id": doctor_id, "created_at": now, "updated_at": None}))
+            for data in items
+        ]
+
+    async def import_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> int:
+        return len(await self.create_many(doctor_id, items))
+
+    async def update(self, patient_id: int, doctor_id: int, changes: Dict[str, Any]) -> Optional[Patient]:
+        if _owned(self.table.get(patient_id), doctor_id) is None:
+            return None
+        return Patient(**self.table.update(patient_id, {**changes, "updated_at": datetime.now()}))
+
+    async def delete(self, patient_id: int, doctor_id: int) -> bool:
+        if _owned(self.table.get(patient_id), doctor_id) is None:
+            return False
+        return self.table.delete(patient_id) is not None
+
+    async def summary(self, patient_id: int, doctor_id: int) -> Optional[PatientSummary]:
+        # Каждая связанная выборка - по индексу patient_id
+        row = _owned(self.table.get(patient_id), doctor_id)
+        if row is None:
+            return None
+        return PatientSummary(
+            patient=Patient(**row),
+            prescriptions=[Prescription(**item) for item in self.prescriptions.find("patient_id", patient_id)],
+            control_visits=[ControlVisit(**item) for item in self.control_visits.find("patient_id", patient_id)],
+            side_effects=[SideEffect(**item) for item in self.side_effects.find("patient_id", patient_id)],
+        )
+
+
+class MemoryPrescriptionRepository(PrescriptionRepository):
+    def __init__(self, table) -> None:
+        self.table = table
+
+    async def get(self, prescription_id: int, doctor_id: int) -> Optional[Prescription]:
+        row = _owned(self.table.get(prescription_id), doctor_id)
+        return None if row is None else Prescription(**row)
+
+    async def get_many(self, ids: Sequence[int], doctor_id: int) -> List[Prescription]:
+        return [Prescription(**row) for row in self.table.get_many(ids) if row["doctor_id"] == doctor_id]
+
+    async def list(self, doctor_id: int, after_id: Optional[int], skip: int, limit: int) -> List[Prescription]:
+        return [Prescription(**row) for row in self.table.page(after_id, limit, skip, "doctor_id", doctor_id)]
+
+    async def list_by_patient(self, patient_id: int, doctor_id: int) -> List[Prescription]:
+        return [Prescription(**row) for row in self.table.find("patient_id", patient_id) if row["doctor_id"] == doctor_id]
+
+    async def create(self, doctor_id: int, data: Dict[str, Any]) -> Prescription:
+        return (await self.create_many(doctor_id, [data]))[0]
+
+    async def create_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> List[Prescription]:
+        now = datetime.now()
+        # Значения по умолчанию - как у столбцов модели Prescription
+        defaults = {"status": "draft", "is_ai_generated": True, "created_at": now, "updated_at": None}
+        return [
+            Prescription(**self.table.insert({**defaults, **data, "doctor_id": doctor_id}))
+            for data in items
+        ]
+
+    async def update(self, prescription_id: int, doctor_id: int, changes: Dict[str, Any]) -> Optional[Prescription]:
+        if _owned(self.table.get(prescription_id), doctor_id) is None:
+            return None
+        return Prescription(**self.table.update(prescription_id, {**changes, "updated_at": datetime.now()}))
+
+    async def delete(self, prescription_id: int, doctor_id: int) -> bool:
+        if _owned(self.table.get(prescription_id), doctor_id) is None:
+            return False
+        return self.table.delete(prescription_id) is not None
+
+
+class MemoryMedicationRepository(MedicationRepository):
+    def __init__(self, table) -> None:
+        self.table = table
+
+    async def get(self, medication_id: int) -> Optional[Medication]:
+        row = self.table.get(medication_id)
+        return None if row is None else Medication(**row)
+
+    async def get_many(self, ids: Sequence[int]) -> List[Medication]:
+        return [Medication(**row) for row in self.table.get_many(ids)]
+
+    async def list(self, drug_class: Optional[str], after_id: Optional[int], skip: int, limit: int) -> List[Medication]:
+        is_active = lambda row: row.get("is_active", True)
+        if drug_class:
+            rows = self.table.page(after_id, limit, skip, "drug_class", drug_class, where=is_active)
+        else:
+            rows = self.table.page(after_id, limit, skip, where=is_active)
+        return [Medication(**row) for row in rows]
+
+    async def drug_classes(self) -> List[str]:
+        return sorted({row["drug_class"] for row in self.table if row.get("drug_class") and row.get("is_active", True)})
+
+    async def create(self, data: Dict[str, Any]) -> Medication:
+        return (await self.create_many([data]))[0]
+
+    async def create_many(self, items: Sequence[Dict[str, Any]]) -> List[Medication]:
+        now = datetime.now()
+        return [
+            Medication(**self.table.insert({"is_active": True, **data, "created_at": now, "updated_at": None}))
+            for data in items
+        ]
+
+    async def update(self, medication_id: int, changes: Dict[str, Any]) -> Optional[Medication]:
+        row = self.table.update(medication_id, {**changes, "updated_at": datetime.now()})
+        return None if row is None else Medication(**row)
+
+
+class MemoryJobRepository(JobRepository):
+    def __init__(self, table) -> None:
+        self.table = table
+
+    async def create(self, doctor_id: int, kind: str, params: Dict[str, Any]) -> Job:
+        # Значения по умолчанию - как у столбцов модели Job
+        return Job(**self.table.insert({
+            "doctor_id": doctor_id, "kind": kind, "status": "pending", "params": params,
+            "processed": 0, "elapsed_seconds": 0.0, "worker": None, "heartbeat": None,
+            "created_at": datetime.now(), "updated_at": None,
+        }))
+
+    async def get(self, job_id: int, doctor_id: int) -> Optional[Job]:
+        row = _owned(self.table.get(job_id), doctor_id)
+        return None if row is None else Job(**row)
+
+
+memory_repositories = Repositories(
+    users=MemoryUserRepository(mock_data.MOCK_USERS),
+    patients=MemoryPatientRepository(
+        mock_data.MOCK_PATIENTS, mock_data.MOCK_PRESCRIPTIONS, mock_data.MOCK_CONTROL_VISITS, mock_data.MOCK_SIDE_EFFECTS,
+    ),
+    prescriptions=MemoryPrescriptionRepository(mock_data.MOCK_PRESCRIPTIONS),
+    medications=MemoryMedicationRepository(mock_data.MOCK_MEDICATIONS),
+    jobs=MemoryJobRepository(mock_data.MOCK_JOBS),
+)
@@ -0,0 +1,473 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.pagination import keyset
+from app.core.token_cache import token_cache
+from app.db.memory import DuplicateKeyError
+from app.models.catalog_change import CatalogChange, CatalogVersion
+from app.models.job import Job
+from app.models.medication import Medication
+from app.models.patient import Patient
+from app.models.prescription import Prescription
+from app.models.user import User
+from app.repositories.base import (
+    JobRepository, MedicationRepository, PatientRepository, PrescriptionRepository, Repositories, UserRepository,
+)
+from app.schemas.job import Job as JobSchema
+from app.schemas.medication import Medication as MedicationSchema
+from app.schemas.patient import Patient as PatientSchema, PatientSummary
+from app.schemas.prescription import Prescription as PrescriptionSchema
+from app.schemas.user import UserInDB
+from app.services.catalog import catalog_watcher
+from app.services.patient_sync import sync_patient_therapy
+
+
+class SessionRunner:
+    """Синхронная Session: каждая операция репозитория - в пуле потоков"""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    async def run(self, fn: Callable, *args):
+        return await run_in_threadpool(fn, self.session, *args)
+
+
+class AsyncSessionRunner:
+    """AsyncSession: операция выполняется через run_sync в greenlet драйвера"""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def run(self, fn: Callable, *args):
+        return await self.session.run_sync(fn, *args)
+
+
+def _by_ids(db: Session, model, ids: Sequence[int], *criteria) -> List[Any]:
+    # Одна выборка IN (...) вместо запроса на каждый id; порядок - как в ids
+    if not ids:
+        return []
+    rows = {row.id: row for row in db.scalars(select(model).where(model.id.in_(set(ids)), *criteria))}
+    return [rows[row_id] for row_id in dict.fromkeys(ids) if row_id in rows]
+
+
+@contextmanager
+def _writing(db: Session, key: Optional[str] = None) -> Iterator[None]:
+    """Запись через сессию запроса: при ошибке - откат, чтобы сессия осталась пригодной.
+
+    Нарушение ограничения БД поднимается как DuplicateKeyError - так же, как
+    в бэкенде memory, поэтому обработчики ошибок не зависят от хранилища.
+    """
+    try:
+        yield
+    except IntegrityError as exc:
+        db.rollback()
+        raise DuplicateKeyError(key or str(exc.orig)) from exc
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _record_catalog_changes(db: Session, medication_ids: Sequence[int]) -> Optional[int]:
+    # Новая версия каталога - в той же транзакции, что и изменение препаратов.
+    # UPDATE счетчика блокирует его строку до commit: следующая запись получит
+    # версию только после фиксации этой, и версии видны читателям строго по порядку
+    if not medication_ids:
+        return None
+    db.execute(update(CatalogVersion).where(CatalogVersion.id == 1).values(version=CatalogVersion.version + 1))
+    version = db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1))
+    db.execute(insert(CatalogChange), [
+        {"medication_id": medication_id, "version": version} for medication_id in medication_ids
+    ])
+    return version
+
+
+def _owned(db: Session, model, row_id: int, doctor_id: int):
+    return db.scalar(select(model).where(model.id == row_id, model.doctor_id == doctor_id))
+
+
+class SqlUserRepository(UserRepository):
+    def __init__(self, runner) -> None:
+        self.runner = runner
+
+    @staticmethod
+    def _get(db: Session, user_id: int) -> Optional[UserInDB]:
+        user = db.get(User, user_id)
+        return None if user is None else UserInDB.model_validate(user)
+
+    @staticmethod
+    def _get_by_email(db: Session, email: str) -> Optional[UserInDB]:
+        user = db.scalar(select(User).where(User.email == email))
+        return None if user is None else UserInDB.model_validate(user)
+
+    @staticmethod
+    def _create(db: Session, data: Dict[str, Any]) -> UserInDB:
+        user = User(**data)
+        with _writing(db, f"email={data.get('email')!r}"):
+            db.add(user)
+            db.commit()
+        db.refresh(user)
+        return UserInDB.model_validate(user)
+
+    @staticmethod
+    def _set_password_hash(db: Session, user_id: int, hashed_password: str) -> None:
+        user = db.get(User, user_id)
+        if user is not None:
+            with _writing(db):
+                user.hashed_password = hashed_password
+                db.commit()
+
+    async def get(self, user_id: int) -> Optional[UserInDB]:
+        return await self.runner.run(self._get, user_id)
+
+    async def get_by_email(self, email: str) -> Optional[UserInDB]:
+        return await self.runner.run(self._get_by_email, email)
+
+    async def create(self, data: Dict[str, Any]) -> UserInDB:
+        return await self.runner.run(self._create, data)
+
+    async def set_password_hash(self, user_id: int, hashed_password: str) -> None:
+        await self.runner.run(self._set_password_hash, user_id, hashed_password)
+        # После commit: событие ORM after_update срабатывает раньше, при flush,
+        # и параллельный запрос успел бы закешировать прежний снимок пользователя
+        token_cache.invalidate_user(user_id)
+
+
+class SqlPatientRepository(PatientRepository):
+    def __init__(self, runner) -> None:
+        self.runner = runner
+
+    @staticmethod
+    def _get(db: Session, patient_id: int, doctor_id: int) -> Optional[PatientSchema]:
+        patient = _owned(db, Patient, patient_id, doctor_id)
+        return None if patient is None else PatientSchema.model_validate(patient)
+
+    @staticmethod
+    def _get_many(db: Session, ids: Sequence[int], doctor_id: int) -> List[PatientSchema]:
+        patients = _by_ids(db, Patient, ids, Patient.doctor_id == doctor_id)
+        return [PatientSchema.model_validate(patient) for patient in patients]
+
+    @staticmethod
+    def _list(db: Session, doctor_id: int, after_id: Optional[int], skip: int, limit: int) -> List[PatientSchema]:
+        # keyset по индексу (doctor_id, id)
+        statement = keyset(select(Patient).where(Patient.doctor_id == doctor_id), Patient.id, after_id, skip, limit)
+        return [PatientSchema.model_validate(patient) for patient in db.scalars(statement)]
+
+    @staticmethod
+    def _create_many(db: Session, doctor_id: int, items: Sequence[Dict[str, Any]]) -> List[PatientSchema]:
+        patients = [Patient(doctor_id=doctor_id, **data) for data in items]
+        # Сессия запроса остается пригодной и после ошибки (импорт пишет ее же следующими кусками)
+        with _writing(db):
+            db.add_all(patients)
+            db.flush()
+            ids = [patient.id for patient in patients]
+            sync_patient_therapy(
+                db,
+                current_medications={patient.id: patient.current_medications for patient in patients},
+                allergies={patient.id: patient.allergies for patient in patients},
+            )
+            db.commit()
+        # created_at заполняет БД: после commit перечитываем пачку одним запросом
+        return [PatientSchema.model_validate(patient) for patient in _by_ids(db, Patient, ids)]
+
+    @staticmethod
+    def _import_many(db: Session, doctor_id: int, items: Sequence[Dict[str, Any]]) -> int:
+        if not db.get_bind().dialect.insert_executemany_returning:
+            # Без RETURNING в executemany (MySQL) id вставленных строк берутся только через ORM
+            return len(SqlPatientRepository._create_many(db, doctor_id, items))
+        rows = [{**data, "doctor_id": doctor_id} for data in items]
+        with _writing(db):
+            # Пачечный INSERT ... VALUES (...), (...) RETURNING id - без объектов ORM и перечитывания
+            ids = db.scalars(insert(Patient).returning(Patient.id, sort_by_parameter_order=True), rows).all()
+            sync_patient_therapy(
+                db,
+                current_medications={patient_id: row.get("current_medications") for patient_id, row in zip(ids, rows)},
+                allergies={patient_id: row.get("allergies") for patient_id, row in zip(ids, rows)},
+            )
+            db.commit()
+        return len(ids)
+
+    @staticmethod
+    def _update(db: Session, patient_id: int, doctor_id: int, changes: Dict[str, Any]) -> Optional[PatientSchema]:
+        patient = _owned(db, Patient, patient_id, doctor_id)
+        if patient is None:
+            return None
+        with _writing(db):
+            for field, value in changes.items():
+                setattr(patient, field, value)
+            # В нормализованных таблицах меняются только отличающиеся строки
+            sync_patient_therapy(
+                db,
+                current_medications={patient_id: changes["current_medications"]} if "current_medications" in changes else None,
+                allergies={patient_id: changes["allergies"]} if "allergies" in changes else None,
+            )
+            db.commit()
+        db.refresh(patient)
+        return PatientSchema.model_validate(patient)
+
+    @staticmethod
+    def _delete(db: Session, patient_id: int, doctor_id: int) -> bool:
+        patient = _owned(db, Patient, patient_id, doctor_id)
+        if patient is None:
+            return False
+        with _writing(db):
+            db.delete(patient)
+            db.commit()
+        return True
+
+    @staticmethod
+    def _summary(db: Session, patient_id: int, doctor_id: int) -> Optional[PatientSummary]:
+        # 4 запроса при любом объеме карточки: пациент + по одному IN (...) на каждую связь
+        patient = db.scalar(
+            select(Patient)
+            .where(Patient.id == patient_id, Patient.doctor_id == doctor_id)
+            .options(
+                selectinload(Patient.prescriptions),
+                selectinload(Patient.control_visits),
+                selectinload(Patient.side_effects),
+            )
+        )
+        if patient is None:
+            return None
+        by_id = lambda row: row.id
+        return PatientSummary.model_validate({
+            "patient": patient,
+            "prescriptions": sorted(patient.prescriptions, key=by_id),
+            "control_visits": sorted(patient.control_visits, key=by_id),
+            "side_effects": sorted(patient.side_effects, key=by_id),
+        }, from_attributes=True)
+
+    async def get(self, patient_id: int, doctor_id: int) -> Optional[PatientSchema]:
+        return await self.runner.run(self._get, patient_id, doctor_id)
+
+    async def get_many(self, ids: Sequence[int], doctor_id: int) -> List[PatientSchema]:
+        return await self.runner.run(self._get_many, ids, doctor_id)
+
+    async def list(self, doctor_id: int, after_id: Optional[int], skip: int, limit: int) -> List[PatientSchema]:
+        return await self.runner.run(self._list, doctor_id, after_id, skip, limit)
+
+    async def create(self, doctor_id: int, data: Dict[str, Any]) -> PatientSchema:
+        return (await self.create_many(doctor_id, [data]))[0]
+
+    async def create_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> List[PatientSchema]:
+        return await self.runner.run(self._create_many, doctor_id, items)
+
+    async def import_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> int:
+        return await self.runner.run(self._import_many, doctor_id, items)
+
+    async def update(self, patient_id: int, doctor_id: int, changes: Dict[str, Any]) -> Optional[PatientSchema]:
+        return await self.runner.run(self._update, patient_id, doctor_id, changes)
+
+    async def delete(self, patient_id: int, doctor_id: int) -> bool:
+        return await self.runner.run(self._delete, patient_id, doctor_id)
+
+    async def summary(self, patient_id: int, doctor_id: int) -> Optional[PatientSummary]:
+        return await self.runner.run(self._summary, patient_id, doctor_id)
+
+
+class SqlPrescriptionRepository(PrescriptionRepository):
+    def __init__(self, runner) -> None:
+        self.runner = runner
+
+    @staticmethod
+    def _get(db: Session, prescription_id: int, doctor_id: int) -> Optional[PrescriptionSchema]:
+        prescription = _owned(db, Prescription, prescription_id, doctor_id)
+        return None if prescription is None else PrescriptionSchema.model_validate(prescription)
+
+    @staticmethod
+    def _get_many(db: Session, ids: Sequence[int], doctor_id: int) -> List[PrescriptionSchema]:
+        prescriptions = _by_ids(db, Prescription, ids, Prescription.doctor_id == doctor_id)
+        return [PrescriptionSchema.model_validate(prescription) for prescription in prescriptions]
+
+    @staticmethod
+    def _list(db: Session, doctor_id: int, after_id: Optional[int], skip: int, limit: int) -> List[PrescriptionSchema]:
+        # keyset по индексу (doctor_id, id)
+        statement = keyset(
+            select(Prescription).where(Prescription.doctor_id == doctor_id), Prescription.id, after_id, skip, limit
+        )
+        return [PrescriptionSchema.model_validate(prescription) for prescription in db.scalars(statement)]
+
+    @staticmethod
+    def _list_by_patient(db: Session, patient_id: int, doctor_id: int) -> List[PrescriptionSchema]:
+        statement = select(Prescription).where(
+            Prescription.patient_id == patient_id, Prescription.doctor_id == doctor_id
+        ).order_by(Prescription.id)
+        return [PrescriptionSchema.model_validate(prescription) for prescription in db.scalars(statement)]
+
+    @staticmethod
+    def _create_many(db: Session, doctor_id: int, items: Sequence[Dict[str, Any]]) -> List[PrescriptionSchema]:
+        prescriptions = [Prescription(doctor_id=doctor_id, **data) for data in items]
+        with _writing(db):
+            db.add_all(prescriptions)
+            db.flush()
+            ids = [prescription.id for prescription in prescriptions]
+            db.commit()
+        # created_at заполняет БД: после commit перечитываем пачку одним запросом
+        return [PrescriptionSchema.model_validate(prescription) for prescription in _by_ids(db, Prescription, ids)]
+
+    @staticmethod
+    def _update(db: Session, prescription_id: int, doctor_id: int, changes: Dict[str, Any]) -> Optional[PrescriptionSchema]:
+        prescription = _owned(db, Prescription, prescription_id, doctor_id)
+        if prescription is None:
+            return None
+        with _writing(db):
+            for field, value in changes.items():
+                setattr(prescription, field, value)
+            db.commit()
+        db.refresh(prescription)
+        return PrescriptionSchema.model_validate(prescription)
+
+    @staticmethod
+    def _delete(db: Session, prescription_id: int, doctor_id: int) -> bool:
+        prescription = _owned(db, Prescription, prescription_id, doctor_id)
+        if prescription is None:
+            return False
+        with _writing(db):
+            db.delete(prescription)
+            db.commit()
+        return True
+
+    async def get(self, prescription_id: int, doctor_id: int) -> Optional[PrescriptionSchema]:
+        return await self.runner.run(self._get, prescription_id, doctor_id)
+
+    async def get_many(self, ids: Sequence[int], doctor_id: int) -> List[PrescriptionSchema]:
+        return await self.runner.run(self._get_many, ids, doctor_id)
+
+    async def list(self, doctor_id: int, after_id: Optional[int], skip: int, limit: int) -> List[PrescriptionSchema]:
+        return await self.runner.run(self._list, doctor_id, after_id, skip, limit)
+
+    async def list_by_patient(self, patient_id: int, doctor_id: int) -> List[PrescriptionSchema]:
+        return await self.runner.run(self._list_by_patient, patient_id, doctor_id)
+
+    async def create(self, doctor_id: int, data: Dict[str, Any]) -> PrescriptionSchema:
+        return (await self.create_many(doctor_id, [data]))[0]
+
+    async def create_many(self, doctor_id: int, items: Sequence[Dict[str, Any]]) -> List[PrescriptionSchema]:
+        return await self.runner.run(self._create_many, doctor_id, items)
+
+    async def update(self, prescription_id: int, doctor_id: int, changes: Dict[str, Any]) -> Optional[PrescriptionSchema]:
+        return await self.runner.run(self._update, prescription_id, doctor_id, changes)
+
+    async def delete(self, prescription_id: int, doctor_id: int) -> bool:
+        return await self.runner.run(self._delete, prescription_id, doctor_id)
+
+
+class SqlMedicationRepository(MedicationRepository):
+    def __init__(self, runner) -> None:
+        self.runner = runner
+
+    @staticmethod
+    def _get(db: Session, medication_id: int) -> Optional[MedicationSchema]:
+        medication = db.get(Medication, medication_id)
+        return None if medication is None else MedicationSchema.model_validate(medication)
+
+    @staticmethod
+    def _get_many(db: Session, ids: Sequence[int]) -> List[MedicationSchema]:
+        return [MedicationSchema.model_validate(medication) for medication in _by_ids(db, Medication, ids)]
+
+    @staticmethod
+    def _list(db: Session, drug_class: Optional[str], after_id: Optional[int], skip: int, limit: int) -> List[MedicationSchema]:
+        # keyset по индексам (is_active, id) / (drug_class, id)
+        statement = select(Medication).where(Medication.is_active == True)
+        if drug_class:
+            statement = statement.where(Medication.drug_class == drug_class)
+        statement = keyset(statement, Medication.id, after_id, skip, limit)
+        return [MedicationSchema.model_validate(medication) for medication in db.scalars(statement)]
+
+    @staticmethod
+    def _drug_classes(db: Session) -> List[str]:
+        classes = db.scalars(select(Medication.drug_class).where(
+            Medication.drug_class.isnot(None),
+            Medication.is_active == True
+        ).distinct())
+        return sorted(cls for cls in classes if cls)
+
+    @staticmethod
+    def _create_many(db: Session, items: Sequence[Dict[str, Any]]) -> List[MedicationSchema]:
+        medications = [Medication(**data) for data in items]
+        with _writing(db):
+            db.add_all(medications)
+            db.flush()
+            ids = [medication.id for medication in medications]
+            version = _record_catalog_changes(db, ids)
+            db.commit()
+        # Индексы этого процесса обновляет вызывающий (on_medication_changed) - опрос версию пропустит
+        catalog_watcher.mark_applied(version)
+        # created_at заполняет БД: после commit перечитываем пачку одним запросом
+        return [MedicationSchema.model_validate(medication) for medication in _by_ids(db, Medication, ids)]
+
+    @staticmethod
+    def _update(db: Session, medication_id: int, changes: Dict[str, Any]) -> Optional[MedicationSchema]:
+        medication = db.get(Medication, medication_id)
+        if medication is None:
+            return None
+        with _writing(db):
+            for field, value in changes.items():
+                setattr(medication, field, value)
+            version = _record_catalog_changes(db, [medication_id])
+            db.commit()
+        catalog_watcher.mark_applied(version)
+        db.refresh(medication)
+        return MedicationSchema.model_validate(medication)
+
+    async def get(self, medication_id: int) -> Optional[MedicationSchema]:
+        return await self.runner.run(self._get, medication_id)
+
+    async def get_many(self, ids: Sequence[int]) -> List[MedicationSchema]:
+        return await self.runner.run(self._get_many, ids)
+
+    async def list(self, drug_class: Optional[str], after_id: Optional[int], skip: int, limit: int) -> List[MedicationSchema]:
+        return await self.runner.run(self._list, drug_class, after_id, skip, limit)
+
+    async def drug_classes(self) -> List[str]:
+        return await self.runner.run(self._drug_classes)
+
+    async def create(self, data: Dict[str, Any]) -> MedicationSchema:
+        return (await self.create_many([data]))[0]
+
+    async def create_many(self, items: Sequence[Dict[str, Any]]) -> List[MedicationSchema]:
+        return await self.runner.run(self._create_many, items)
+
+    async def update(self, medication_id: int, changes: Dict[str, Any]) -> Optional[MedicationSchema]:
+        return await self.runner.run(self._update, medication_id, changes)
+
+
+class SqlJobRepository(JobRepository):
+    def __init__(self, runner) -> None:
+        self.runner = runner
+
+    @staticmethod
+    def _create(db: Session, doctor_id: int, kind: str, params: Dict[str, Any]) -> JobSchema:
+        job = Job(doctor_id=doctor_id, kind=kind, status="pending", params=params)
+        with _writing(db):
+            db.add(job)
+            db.commit()
+        db.refresh(job)
+        return JobSchema.model_validate(job)
+
+    @staticmethod
+    def _get(db: Session, job_id: int, doctor_id: int) -> Optional[JobSchema]:
+        job = _owned(db, Job, job_id, doctor_id)
+        return None if job is None else JobSchema.model_validate(job)
+
+    async def create(self, doctor_id: int, kind: str, params: Dict[str, Any]) -> JobSchema:
+        return await self.runner.run(self._create, doctor_id, kind, params)
+
+    async def get(self, job_id: int, doctor_id: int) -> Optional[JobSchema]:
+        return await self.runner.run(self._get, job_id, doctor_id)
+
+
+def sql_repositories(runner) -> Repositories:
+    """Репозитории поверх одной сессии (SessionRunner или AsyncSessionRunner)"""
+    return Repositories(
+        users=SqlUserRepository(runner),
+        patients=SqlPatientRepository(runner),
+        prescriptions=SqlPrescriptionRepository(runner),
+        medications=SqlMedicationRepository(runner),
+        jobs=SqlJobRepository(runner),
+    )
@@ -1,3 +1,6 @@
 from .user import User, UserCreate, UserUpdate, Token
-from .patient import Patient, PatientCreate, PatientUpdate
+from .patient import Patient, PatientCreate, PatientUpdate, PatientSummary, PatientHistoryEvent, PatientImportResult
 from .prescription import Prescription, PrescriptionCreate, PrescriptionUpdate
+from .control_visit import ControlVisit
+from .side_effect import SideEffect
+from .job import Job, RecommendationCohort
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class ControlVisitBase(BaseModel):
+    type: str
+    scheduled_date: datetime
+    status: str = "scheduled"
+    notes: Optional[str] = None
+
+class ControlVisit(ControlVisitBase):
+    id: int
+    patient_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
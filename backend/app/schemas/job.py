@@ -0,0 +1,42 @@
+from pydantic import BaseModel, computed_field
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+class RecommendationCohort(BaseModel):
+    """Фильтр когорты для пересчета рекомендаций (условия объединяются по И)"""
+    doctor_id: Optional[int] = None  # только текущий врач; другой id - 403
+    diagnosis: Optional[str] = None  # подстрока диагноза
+    medication: Optional[str] = None  # препарат текущей терапии
+
+class Job(BaseModel):
+    id: int
+    doctor_id: int
+    kind: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    total: Optional[int] = None
+    processed: int = 0
+    last_patient_id: Optional[int] = None
+    elapsed_seconds: float = 0.0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    @computed_field
+    @property
+    def progress(self) -> Optional[float]:
+        """Доля обработанных пациентов когорты"""
+        if not self.total:
+            return 1.0 if self.status == "completed" else None
+        return round(self.processed / self.total, 4)
+    
+    @computed_field
+    @property
+    def throughput(self) -> Optional[float]:
+        """Пациентов в секунду (по времени обработки зафиксированных пачек)"""
+        return round(self.processed / self.elapsed_seconds, 1) if self.elapsed_seconds else None
+    
+    class Config:
+        from_attributes = True
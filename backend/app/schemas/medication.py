@@ -65,3 +65,9 @@ class MedicationSearchResult(BaseModel):
     generic_name: Optional[str] = None
     drug_class: Optional[str] = None
     available_dosages: Optional[List[str]] = None
+
+class MedicationSuggestion(BaseModel):
+    text: str
+    kind: str  # name, generic_name, drug_class
+    medication_id: Optional[int] = None
+    popularity: int = 0
@@ -1,6 +1,9 @@
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from app.schemas.prescription import Prescription
+from app.schemas.control_visit import ControlVisit
+from app.schemas.side_effect import SideEffect
 
 class PatientBase(BaseModel):
     full_name: str
@@ -43,3 +46,30 @@ class Patient(PatientBase):
     
     class Config:
         from_attributes = True
+
+class PatientSummary(BaseModel):
+    """Карточка пациента: пациент, назначения, контрольные визиты и побочные эффекты"""
+    patient: Patient
+    prescriptions: List[Prescription] = []
+    control_visits: List[ControlVisit] = []
+    side_effects: List[SideEffect] = []
+
+class PatientHistoryEvent(BaseModel):
+    type: str  # prescription, control_visit, side_effect
+    id: int
+    date: datetime
+    title: str
+    status: Optional[str] = None
+
+class PatientBatchRequest(BaseModel):
+    ids: List[int]
+
+class PatientImportError(BaseModel):
+    row: int  # номер записи в файле, с 1
+    errors: List[str]
+
+class PatientImportResult(BaseModel):
+    """Отчет массового импорта: сколько сохранено и ошибки по записям"""
+    created: int = 0
+    failed: int = 0
+    errors: List[PatientImportError] = []
@@ -24,8 +24,29 @@ class Prescription(PrescriptionBase):
     doctor_id: int
     status: str
     is_ai_generated: bool
+    ai_recommendations: Optional[Dict[str, Any]] = None
+    justification: Optional[str] = None
+    alternative_options: Optional[List[Dict[str, Any]]] = None
+    warnings: Optional[List[str]] = None
+    monitoring_plan: Optional[List[Dict[str, Any]]] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
+
+class InteractionCheckRequest(BaseModel):
+    patient_id: Optional[int] = None
+    current_medications: Optional[List[Dict[str, Any]]] = None
+    recommended_medications: List[Dict[str, Any]] = []
+
+class InteractionWarning(BaseModel):
+    medication_a: str
+    medication_b: str
+    severity: str
+    description: Optional[str] = None
+    management: Optional[str] = None
+
+class InteractionCheckResult(BaseModel):
+    interactions: List[InteractionWarning]
+    checked_medications: int
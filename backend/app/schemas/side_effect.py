@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class SideEffectBase(BaseModel):
+    medication_name: str
+    description: Optional[str] = None
+    severity: Optional[str] = None
+    status: str = "monitoring"
+    reported_date: Optional[datetime] = None
+
+class SideEffect(SideEffectBase):
+    id: int
+    patient_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -34,7 +34,7 @@ class User(UserInDBBase):
     pass
 
 class UserInDB(UserInDBBase):
-    hashed_password: str
+    hashed_password: Optional[str] = None  # у демо-пользователей моков пароля нет
 
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,161 @@
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from heapq import nlargest
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.services.search import fold
+
+# Для коротких префиксов лучшие подсказки считаются заранее: их диапазоны самые длинные
+SHORT_PREFIX = 3
+TOP_N = 50
+KINDS = ("name", "generic_name", "drug_class")
+
+
+class PrefixIndex:
+    """Неизменяемый индекс подсказок на отсортированных массивах.
+
+    Каждое слово названия дает ключ (хвост названия с этого слова), ключи лежат
+    в одном отсортированном списке, а подсказки - в параллельных массивах.
+    Поиск - bisect по префиксу; для префиксов до SHORT_PREFIX символов ответ
+    готов заранее.
+    """
+
+    def __init__(self, medications: Iterable[Dict[str, Any]], popularity: Counter) -> None:
+        self.texts: List[str] = []
+        self.kinds = bytearray()
+        self.medication_ids = array("i")
+        self.popularity = array("q")
+        suggestions: Dict[tuple, int] = {}
+        keys = []
+
+        def add(text: Optional[str], kind: int, medication_id: int, score: int) -> None:
+            if not text:
+                return
+            # Класс препаратов - одна подсказка с суммарной популярностью его препаратов
+            ident = (kind, text) if kind == 2 else (kind, text, medication_id)
+            entry = suggestions.get(ident)
+            if entry is None:
+                entry = suggestions[ident] = len(self.texts)
+                self.texts.append(text)
+                self.kinds.append(kind)
+                self.medication_ids.append(medication_id if kind != 2 else 0)
+                self.popularity.append(0)
+                words = fold(text).split()
+                keys.extend((" ".join(words[i:]), entry) for i in range(len(words)))
+            self.popularity[entry] += score
+
+        for medication in medications:
+            score = popularity.get(medication["id"], 0)
+            add(medication["name"], 0, medication["id"], score)
+            add(medication.get("generic_name"), 1, medication["id"], score)
+            add(medication.get("drug_class"), 2, medication["id"], score)
+
+        keys.sort()
+        self.keys = [key for key, _ in keys]
+        self.entries = array("i", (entry for _, entry in keys))
+
+        short: Dict[str, set] = {}
+        for key, entry in keys:
+            for length in range(0, min(SHORT_PREFIX, len(key)) + 1):
+                short.setdefault(key[:length], set()).add(entry)
+        self.top = {prefix: self._best(entries, TOP_N) for prefix, entries in short.items()}
+
+    def _best(self, entries: Iterable[int], limit: int) -> List[int]:
+        return nlargest(limit, entries, key=lambda e: (self.popularity[e], -len(self.texts[e]), -e))
+
+    def complete(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        key = fold(prefix)
+        if len(key) <= SHORT_PREFIX:
+            best = self.top.get(key, [])[:limit]
+        else:
+            lo = bisect_left(self.keys, key)
+            hi = bisect_left(self.keys, key + "\uffff", lo)
+            best = self._best(set(self.entries[lo:hi]), limit)
+        return [
+            {
+                "text": self.texts[e],
+                "kind": KINDS[self.kinds[e]],
+                "medication_id": self.medication_ids[e] or None,
+                "popularity": self.popularity[e],
+            }
+            for e in best
+        ]
+
+
+class AutocompleteService:
+    """Держит текущий PrefixIndex и пересобирает его в фоне при изменении каталога.
+
+    Новый индекс подменяется одной операцией присваивания, поэтому запросы
+    всегда видят целостный индекс и не обращаются к БД. Назначения копятся в
+    счетчике популярности; каждые rebuild_after назначений индекс тоже
+    пересобирается, чтобы популярность в подсказках не отставала от каталога.
+    """
+
+    def __init__(self, rebuild_after: int) -> None:
+        self.rebuild_after = max(1, rebuild_after)
+        self._lock = threading.Lock()
+        self._medications: Dict[int, Dict[str, Any]] = {}
+        self._popularity: Counter = Counter()
+        self._pending_prescriptions = 0
+        self._rebuild_pending = False
+        self._generation = 0
+        self._published = 0
+        self._index = PrefixIndex([], self._popularity)
+
+    def build(self, medications: Iterable[Dict[str, Any]], popularity: Counter) -> None:
+        with self._lock:
+            self._medications = {m["id"]: m for m in medications if m.get("is_active", True)}
+            self._popularity = Counter(popularity)
+            self._pending_prescriptions = 0
+            self._generation += 1
+            self._published = self._generation
+            self._index = PrefixIndex(self._medications.values(), self._popularity)
+
+    def update_medication(self, medication: Dict[str, Any]) -> None:
+        with self._lock:
+            if medication.get("is_active", True):
+                self._medications[medication["id"]] = medication
+            else:
+                self._medications.pop(medication["id"], None)
+            self._generation += 1
+        self._schedule_rebuild()
+
+    def record_prescription(self, medication_ids: Iterable[int]) -> None:
+        """Учет нового назначения; попадет в индекс при следующей пересборке"""
+        with self._lock:
+            self._popularity.update(medication_ids)
+            self._pending_prescriptions += 1
+            if self._pending_prescriptions < self.rebuild_after:
+                return
+            self._generation += 1
+        self._schedule_rebuild()
+
+    def _schedule_rebuild(self) -> None:
+        with self._lock:
+            if self._rebuild_pending:
+                return
+            self._rebuild_pending = True
+        threading.Thread(target=self._rebuild, name="autocomplete-rebuild", daemon=True).start()
+
+    def _rebuild(self) -> None:
+        with self._lock:
+            self._rebuild_pending = False
+            generation = self._generation
+            medications = list(self._medications.values())
+            popularity = Counter(self._popularity)
+            self._pending_prescriptions = 0
+        index = PrefixIndex(medications, popularity)
+        with self._lock:
+            # Более поздняя пересборка могла успеть раньше - старый индекс не публикуем
+            if generation > self._published:
+                self._published = generation
+                self._index = index
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return self._index.complete(prefix, limit)
+
+
+autocomplete_service = AutocompleteService(settings.AUTOCOMPLETE_REBUILD_PRESCRIPTIONS)
@@ -0,0 +1,235 @@
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.etag import catalog_response_cache
+from app.services.autocomplete import autocomplete_service
+from app.services.interactions import interaction_index, normalize_name, parse_json_list
+from app.services.recommendations import recommendation_engine
+from app.services.search import medication_search_index
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FIELDS = (
+    "id", "name", "generic_name", "drug_class", "available_dosages", "drug_interactions", "is_active",
+    "indications", "contraindications", "monitoring_parameters",
+)
+
+
+def medication_to_dict(medication: Any) -> Dict[str, Any]:
+    """Строка таблицы medications в словарь того же вида, что и в MOCK_MEDICATIONS"""
+    if isinstance(medication, dict):
+        return medication
+    return {field: getattr(medication, field) for field in CATALOG_FIELDS}
+
+
+def load_catalog_from_db(db) -> List[Dict[str, Any]]:
+    from app.models.medication import Medication
+    return [
+        medication_to_dict(m)
+        for m in db.query(Medication).filter(Medication.is_active == True).yield_per(1000)
+    ]
+
+
+def _load_versioned_catalog(db, allow_behind: bool) -> Tuple[List[Dict[str, Any]], int]:
+    """Каталог из снимка или таблицы medications и версия каталога, которой он соответствует"""
+    version = catalog_version(db)
+    if settings.CATALOG_SNAPSHOT_PATH:
+        from app.services.catalog_snapshot import SnapshotError, open_snapshot
+        try:
+            snapshot = open_snapshot(settings.CATALOG_SNAPSHOT_PATH)
+        except SnapshotError as exc:
+            logger.warning("Снимок каталога не читается: %s", exc)
+            snapshot = None
+        if snapshot is not None:
+            with snapshot:
+                # Отставший снимок догоняется по журналу catalog_changes; снимок новее БД - от другой базы
+                usable = snapshot.catalog_version <= version if allow_behind else snapshot.catalog_version == version
+                if usable:
+                    return snapshot.medications(), snapshot.catalog_version
+            logger.info("Снимок каталога %s версии %s не подходит к версии %s - каталог читается из БД",
+                        settings.CATALOG_SNAPSHOT_PATH, snapshot.catalog_version, version)
+    # Версия читается до каталога: изменения во время загрузки применятся повторно, а не потеряются
+    return load_catalog_from_db(db), version
+
+
+def load_catalog(db=None) -> List[Dict[str, Any]]:
+    """Активные препараты каталога: из моков (бэкенд memory), снимка или таблицы medications.
+
+    Снимок CATALOG_SNAPSHOT_PATH (python -m app.cli catalog build) берется,
+    только если он собран с текущей версией каталога.
+    """
+    if settings.repository_backend == "memory":
+        from app.mock_data import MOCK_MEDICATIONS
+        return [m for m in MOCK_MEDICATIONS if m.get("is_active", True)]
+    return _load_versioned_catalog(db, allow_behind=False)[0]
+
+
+def prescribed_medication_ids(recommended_medications: Any, by_name: Dict[str, int]) -> List[int]:
+    """id препаратов каталога из recommended_medications (по id, а если его нет - по названию)"""
+    ids = []
+    for item in parse_json_list(recommended_medications):
+        if not isinstance(item, dict):
+            continue
+        medication_id = item.get("id")
+        if medication_id is None and item.get("name"):
+            medication_id = by_name.get(normalize_name(item["name"]))
+        if medication_id is not None:
+            ids.append(medication_id)
+    return ids
+
+
+def load_popularity(catalog: List[Dict[str, Any]], db=None) -> Counter:
+    """Сколько раз каждый препарат встречается в Prescription.recommended_medications"""
+    if settings.repository_backend == "memory":
+        from app.mock_data import MOCK_PRESCRIPTIONS
+        rows = (p.get("recommended_medications") for p in MOCK_PRESCRIPTIONS)
+    else:
+        from app.models.prescription import Prescription
+        rows = (row[0] for row in db.query(Prescription.recommended_medications).yield_per(1000))
+    by_name = {normalize_name(m["name"]): m["id"] for m in catalog}
+    popularity = Counter()
+    for recommended in rows:
+        popularity.update(prescribed_medication_ids(recommended, by_name))
+    return popularity
+
+
+def load_catalog_indexes(db=None) -> Optional[int]:
+    """Полная сборка всех индексов каталога (один раз при старте).
+
+    Возвращает версию каталога, которой соответствуют индексы (None для
+    бэкенда memory): с нее CatalogWatcher догружает более поздние изменения.
+    Снимок, собранный раньше текущей версии, тоже годится - разница
+    применяется из журнала изменений.
+    """
+    if settings.repository_backend == "memory":
+        catalog, version = load_catalog(), None
+    else:
+        catalog, version = _load_versioned_catalog(db, allow_behind=True)
+    interaction_index.build(catalog)
+    medication_search_index.build(catalog)
+    autocomplete_service.build(catalog, load_popularity(catalog, db))
+    recommendation_engine.build(catalog)
+    return version
+
+
+def on_medications_changed(medications: Iterable[Any], removed_ids: Iterable[int] = ()) -> None:
+    """Инкрементальное обновление индексов после изменения пачки препаратов.
+
+    Индексы с копированием при записи публикуют одну новую версию на всю пачку.
+    Удаленные в обход репозитория препараты видны только в журнале изменений.
+    """
+    medications = [medication_to_dict(m) for m in medications]
+    removed = [{"id": medication_id, "name": "", "is_active": False} for medication_id in removed_ids]
+    interaction_index.update_medications(medications + removed)
+    medication_search_index.update_medications(medications + removed)
+    for medication in medications + removed:
+        autocomplete_service.update_medication(medication)
+        recommendation_engine.update_medication(medication)
+    catalog_response_cache.invalidate()
+
+
+def on_medication_changed(medication: Any) -> None:
+    """Инкрементальное обновление индексов после создания/изменения препарата"""
+    on_medications_changed([medication])
+
+
+def catalog_version(db) -> int:
+    """Текущая версия каталога - зафиксированное значение счетчика catalog_version"""
+    from sqlalchemy import select
+    from app.models.catalog_change import CatalogVersion
+    return db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1)) or 0
+
+
+class CatalogWatcher:
+    """Подхват изменений каталога, сделанных другими процессами, без перезапуска.
+
+    Поток раз в interval секунд сравнивает версию каталога в БД со своей
+    (один запрос по первичному ключу). Версию назначает счетчик под
+    блокировкой строки, поэтому все изменения с версией не выше прочитанной
+    уже зафиксированы. При расхождении читает из журнала
+    id изменившихся препаратов, загружает только их и обновляет индексы
+    инкрементально, после чего заранее собирает матрицы движка рекомендаций.
+    Индексы взаимодействий и поиска публикуют одну новую версию на весь опрос,
+    поэтому запрос, уже работающий с индексом, дорабатывает со своей версией.
+    Версии, записанные самим процессом (mark_applied), уже применены
+    обработчиком записи и при опросе пропускаются.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.version: Optional[int] = None
+        self._applied: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, version: int) -> None:
+        self.version = version
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="catalog-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 5)
+            self._thread = None
+
+    def mark_applied(self, version: Optional[int]) -> None:
+        """Версия зафиксирована этим процессом, и индексы обновит сам вызывающий"""
+        if version is None or self.version is None or self.interval <= 0:
+            # Опрос не идет - отметки некому снимать
+            return
+        with self._lock:
+            self._applied.add(version)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Не удалось проверить версию каталога")
+
+    def poll(self) -> int:
+        """Применить изменения после self.version; возвращает число обновленных препаратов"""
+        from sqlalchemy import select
+        from app.db.database import SessionLocal
+        from app.models.catalog_change import CatalogChange
+        from app.models.medication import Medication
+
+        with SessionLocal() as db:
+            latest = catalog_version(db)
+            if latest == self.version:
+                return 0
+            rows = db.execute(select(CatalogChange.version, CatalogChange.medication_id).where(
+                CatalogChange.version > self.version, CatalogChange.version <= latest
+            )).all()
+            with self._lock:
+                applied = {version for version in self._applied if version <= latest}
+                self._applied -= applied
+            changed = {medication_id for version, medication_id in rows if version not in applied}
+            if not changed:
+                self.version = latest
+                return 0
+            medications = {m.id: medication_to_dict(m) for m in db.scalars(select(Medication).where(Medication.id.in_(changed)))}
+        on_medications_changed(
+            [medications[medication_id] for medication_id in sorted(changed) if medication_id in medications],
+            sorted(changed - medications.keys()),
+        )
+        self.version = latest
+        recommendation_engine.compile()
+        logger.info("Каталог обновлен до версии %s: %s препаратов", latest, len(changed))
+        return len(changed)
+
+
+catalog_watcher = CatalogWatcher(settings.CATALOG_POLL_SECONDS)
+
+
+def on_prescription_created(recommended_medications: Any) -> None:
+    """Назначение повышает популярность препаратов в подсказках"""
+    autocomplete_service.record_prescription(prescribed_medication_ids(recommended_medications, {}))
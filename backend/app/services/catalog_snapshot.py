@@ -0,0 +1,210 @@
+"""Двоичный снимок каталога препаратов, открываемый через mmap.
+
+Формат (little-endian): MAGIC, длина заголовка (uint32), JSON-заголовок
+(версия формата, версия каталога catalog_version, время сборки, секции
+{имя: [смещение, dtype, форма]}), затем секции-массивы с выравниванием
+по 8 байт:
+
+- str.offsets / str.data - таблица строк (UTF-8 подряд + смещения),
+  все строки каталога хранятся один раз и дальше адресуются номером;
+- med.* - столбцы препаратов (id и номера строк названия, МНН, класса,
+  JSON параметров мониторинга; -1 - нет значения);
+- <поле>.offsets / <поле>.values - списки строк (дозировки, показания,
+  противопоказания) в виде смещений и номеров строк;
+- interactions.offsets / interactions.edges - список смежности
+  взаимодействий: (партнер, тяжесть, описание, тактика) для каждого препарата.
+
+Массивы - представления np.frombuffer над отображением файла (без
+копирования). Процесс API при старте один раз разбирает их в словари
+каталога для своих индексов и закрывает отображение: индексы у каждого
+процесса свои, снимок экономит чтение таблицы medications и разбор ее
+JSON-столбцов, а не память. Снимок заменяется атомарно (os.replace): уже
+открытые отображения остаются на прежнем файле.
+"""
+import json
+import mmap
+import os
+import struct
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from app.services.interactions import parse_json_list
+
+MAGIC = b"MEDAICAT"
+FORMAT_VERSION = 2
+_ALIGN = 8
+LIST_FIELDS = ("available_dosages", "indications", "contraindications")
+INTERACTION_FIELDS = ("medication", "severity", "description", "management")
+
+
+class SnapshotError(ValueError):
+    """Файл не является снимком каталога или собран другой версией формата"""
+
+
+def _aligned(size: int) -> int:
+    return -(-size // _ALIGN) * _ALIGN
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.index: Dict[str, int] = {}
+        self.encoded: List[bytes] = []
+
+    def add(self, value: Any) -> int:
+        if value is None:
+            return -1
+        value = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        sid = self.index.get(value)
+        if sid is None:
+            sid = self.index[value] = len(self.encoded)
+            self.encoded.append(value.encode())
+        return sid
+
+
+def _csr(rows: Iterable[List[Any]], width: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    rows = list(rows)
+    offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    flat = [value for row in rows for value in row]
+    shape = (len(flat), width) if width else (len(flat),)
+    return offsets, np.array(flat, dtype=np.int32).reshape(shape)
+
+
+def build_snapshot(catalog: List[Dict[str, Any]], path: str, catalog_version: int) -> Dict[str, Any]:
+    """Записать снимок активных препаратов каталога версии catalog_version; возвращает заголовок"""
+    medications = sorted((m for m in catalog if m.get("is_active", True)), key=lambda m: m["id"])
+    strings = _StringTable()
+    sections: Dict[str, np.ndarray] = {
+        "med.id": np.array([m["id"] for m in medications], dtype=np.int64),
+        "med.name": np.array([strings.add(m["name"]) for m in medications], dtype=np.int32),
+        "med.generic_name": np.array([strings.add(m.get("generic_name")) for m in medications], dtype=np.int32),
+        "med.drug_class": np.array([strings.add(m.get("drug_class")) for m in medications], dtype=np.int32),
+        "med.monitoring": np.array(
+            [strings.add(parse_json_list(m.get("monitoring_parameters")) or None) for m in medications], dtype=np.int32
+        ),
+    }
+    for field in LIST_FIELDS:
+        sections[f"{field}.offsets"], sections[f"{field}.values"] = _csr(
+            [strings.add(item) for item in parse_json_list(m.get(field))] for m in medications
+        )
+    sections["interactions.offsets"], sections["interactions.edges"] = _csr((
+        [[strings.add(item.get(key)) for key in INTERACTION_FIELDS]
+         for item in parse_json_list(m.get("drug_interactions")) if isinstance(item, dict) and item.get("medication")]
+        for m in medications
+    ), width=len(INTERACTION_FIELDS))
+    offsets = np.zeros(len(strings.encoded) + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(value) for value in strings.encoded])
+    sections["str.offsets"] = offsets
+    sections["str.data"] = np.frombuffer(b"".join(strings.encoded), dtype=np.uint8)
+
+    # Смещения секций - от начала области данных (первая граница 8 байт после заголовка)
+    layout, position = {}, 0
+    for name, array in sections.items():
+        layout[name] = [position, array.dtype.str, list(array.shape)]
+        position += _aligned(array.nbytes)
+    header = {
+        "format": FORMAT_VERSION,
+        "catalog_version": catalog_version,
+        "built_at": datetime.now().isoformat(),
+        "medications": len(medications),
+        "strings": len(strings.encoded),
+        "sections": layout,
+    }
+    encoded = json.dumps(header, ensure_ascii=False).encode()
+    prefix = MAGIC + struct.pack("<I", len(encoded)) + encoded
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as output:
+        output.write(prefix.ljust(_aligned(len(prefix)), b"\0"))
+        for array in sections.values():
+            data = np.ascontiguousarray(array).tobytes()
+            output.write(data.ljust(_aligned(len(data)), b"\0"))
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temporary, path)
+    return header
+
+
+class CatalogSnapshot:
+    """Снимок каталога, отображенный в память (только чтение)"""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as source:
+            self._mmap = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._mmap[:len(MAGIC)] != MAGIC:
+                raise SnapshotError(f"{path}: не снимок каталога")
+            (length,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+            self.header = json.loads(self._mmap[len(MAGIC) + 4:len(MAGIC) + 4 + length])
+            base = _aligned(len(MAGIC) + 4 + length)
+            if self.header.get("format") != FORMAT_VERSION:
+                raise SnapshotError(f"{path}: версия формата {self.header.get('format')}, ожидается {FORMAT_VERSION}")
+            self.arrays: Dict[str, np.ndarray] = {
+                name: np.frombuffer(self._mmap, dtype=dtype, count=int(np.prod(shape)), offset=base + offset).reshape(shape)
+                for name, (offset, dtype, shape) in self.header["sections"].items()
+            }
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def catalog_version(self) -> int:
+        return self.header["catalog_version"]
+
+    def __len__(self) -> int:
+        return self.header["medications"]
+
+    def __enter__(self) -> "CatalogSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # Представления numpy держат буфер отображения - сначала отпускаем их
+        self.arrays = {}
+        if not self._mmap.closed:
+            self._mmap.close()
+
+    def strings(self) -> List[str]:
+        offsets = self.arrays["str.offsets"].tolist()
+        data = self.arrays["str.data"].tobytes()
+        return [data[offsets[i]:offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+
+    def medications(self) -> List[Dict[str, Any]]:
+        """Каталог в виде словарей load_catalog (для сборки индексов процесса)"""
+        strings = self.strings()
+        text = lambda sid: None if sid < 0 else strings[sid]
+        columns = {name[4:]: self.arrays[name].tolist() for name in self.arrays if name.startswith("med.")}
+        lists = {
+            field: (self.arrays[f"{field}.offsets"].tolist(), self.arrays[f"{field}.values"].tolist())
+            for field in LIST_FIELDS
+        }
+        edge_offsets = self.arrays["interactions.offsets"].tolist()
+        edges = self.arrays["interactions.edges"].tolist()
+        medications = []
+        for i, medication_id in enumerate(columns["id"]):
+            medication = {
+                "id": medication_id,
+                "name": strings[columns["name"][i]],
+                "generic_name": text(columns["generic_name"][i]),
+                "drug_class": text(columns["drug_class"][i]),
+                "is_active": True,
+                "monitoring_parameters": None if columns["monitoring"][i] < 0 else json.loads(strings[columns["monitoring"][i]]),
+            }
+            for field, (offsets, values) in lists.items():
+                medication[field] = [strings[sid] for sid in values[offsets[i]:offsets[i + 1]]]
+            medication["drug_interactions"] = [
+                {key: text(sid) for key, sid in zip(INTERACTION_FIELDS, edge) if sid >= 0}
+                for edge in edges[edge_offsets[i]:edge_offsets[i + 1]]
+            ]
+            medications.append(medication)
+        return medications
+
+
+def open_snapshot(path: Optional[str]) -> Optional[CatalogSnapshot]:
+    """Снимок из path, если файл есть; иначе None"""
+    if not path or not os.path.exists(path):
+        return None
+    return CatalogSnapshot(path)
@@ -0,0 +1,113 @@
+"""Потоковая выгрузка пациентов и назначений врача (NDJSON или CSV).
+
+Строки читаются пачками по EXPORT_BATCH_SIZE: из БД - серверным курсором
+(yield_per, stream_results), из моков - страницами по индексу doctor_id.
+Каждая пачка сразу кодируется и отдается StreamingResponse, поэтому память
+процесса не зависит от числа строк. gzip сжимает поток по мере выдачи.
+"""
+import csv
+import io
+import json
+import zlib
+from typing import Any, Dict, Iterator, List, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.schemas.patient import Patient as PatientSchema
+from app.schemas.prescription import Prescription as PrescriptionSchema
+
+# charset для text/* добавляет StreamingResponse
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_SCHEMAS: Dict[str, Type[BaseModel]] = {"patients": PatientSchema, "prescriptions": PrescriptionSchema}
+
+
+def _memory_batches(kind: str, doctor_id: int, batch_size: int) -> Iterator[List[BaseModel]]:
+    from app import mock_data
+    table = mock_data.MOCK_PATIENTS if kind == "patients" else mock_data.MOCK_PRESCRIPTIONS
+    schema = EXPORT_SCHEMAS[kind]
+    after_id = None
+    while True:
+        rows = table.page(after_id, batch_size, field="doctor_id", value=doctor_id)
+        if not rows:
+            return
+        yield [schema(**row) for row in rows]
+        after_id = rows[-1]["id"]
+
+
+def _sql_batches(kind: str, doctor_id: int, batch_size: int) -> Iterator[List[BaseModel]]:
+    from app.db.database import SessionLocal
+    from app.models.patient import Patient
+    from app.models.prescription import Prescription
+    model = Patient if kind == "patients" else Prescription
+    schema = EXPORT_SCHEMAS[kind]
+    statement = select(model).where(model.doctor_id == doctor_id).order_by(model.id)
+    # Выгрузка длинная - отдельная сессия синхронного движка, а не сессия запроса
+    with SessionLocal() as db:
+        result = db.scalars(statement.execution_options(yield_per=batch_size))
+        # Карта идентичности держит объекты слабыми ссылками: отданные пачки освобождаются
+        for rows in result.partitions():
+            yield [schema.model_validate(row) for row in rows]
+
+
+def export_batches(kind: str, doctor_id: int, batch_size: int) -> Iterator[List[BaseModel]]:
+    """Записи врача пачками в порядке id (бэкенд из REPOSITORY_BACKEND)"""
+    if settings.repository_backend == "memory":
+        return _memory_batches(kind, doctor_id, batch_size)
+    return _sql_batches(kind, doctor_id, batch_size)
+
+
+def _csv_value(value: Any) -> Any:
+    # Списки и словари (терапия, анализы, рекомендации) - JSON в ячейке
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return "" if value is None else value
+
+
+def encode_ndjson(schema: Type[BaseModel], batches: Iterator[List[BaseModel]]) -> Iterator[bytes]:
+    adapter = TypeAdapter(schema)
+    for batch in batches:
+        yield b"".join(adapter.dump_json(item) + b"\n" for item in batch)
+
+
+def encode_csv(schema: Type[BaseModel], batches: Iterator[List[BaseModel]]) -> Iterator[bytes]:
+    columns = list(schema.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM - чтобы Excel открыл кириллицу без выбора кодировки
+    writer.writerow(columns)
+    yield "\ufeff".encode() + buffer.getvalue().encode()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(getattr(item, column)) for column in columns] for item in batch)
+        yield buffer.getvalue().encode()
+
+
+def gzip_stream(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    """gzip на лету: сжатые блоки отдаются по мере готовности"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(kind: str, doctor_id: int, export_format: str, gzip: bool = False) -> Iterator[bytes]:
+    schema = EXPORT_SCHEMAS[kind]
+    encode = encode_csv if export_format == "csv" else encode_ndjson
+    chunks = encode(schema, export_batches(kind, doctor_id, settings.EXPORT_BATCH_SIZE))
+    return gzip_stream(chunks) if gzip else chunks
+
+
+def export_response(kind: str, doctor_id: int, export_format: str, gzip: bool = False) -> StreamingResponse:
+    """Файл выгрузки; генератор синхронный - Starlette читает его в пуле потоков"""
+    headers = {"Content-Disposition": f'attachment; filename="{kind}.{export_format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        export_stream(kind, doctor_id, export_format, gzip), media_type=EXPORT_FORMATS[export_format], headers=headers
+    )
@@ -0,0 +1,275 @@
+import json
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Ранг тяжести взаимодействия: при нескольких описаниях одной пары берем самое тяжелое
+SEVERITY_RANK = {
+    "низкий": 1,
+    "low": 1,
+    "minor": 1,
+    "средний": 2,
+    "moderate": 2,
+    "medium": 2,
+    "высокий": 3,
+    "high": 3,
+    "major": 3,
+    "противопоказано": 4,
+    "contraindicated": 4,
+}
+
+
+class Interaction(NamedTuple):
+    severity: str
+    description: Optional[str]
+    management: Optional[str]
+    rank: int
+
+
+def normalize_name(name: str) -> str:
+    """Ключ препарата: регистр и лишние пробелы не учитываются"""
+    return " ".join(name.casefold().replace("ё", "е").split())
+
+
+def parse_json_list(value: Any) -> List[Any]:
+    """JSON-поля моделей хранятся строками, а в моках - готовыми списками"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+class ShardedDict:
+    """Словарь из SHARDS частей с копированием при записи.
+
+    Копия версии копирует только список частей; часть копируется при первой
+    записи в нее, поэтому изменение нескольких ключей стоит O(размер части),
+    а не O(размер словаря). Опубликованную версию не меняют - пишут в копию.
+    """
+
+    SHARDS = 4096
+
+    def __init__(self, source: Optional["ShardedDict"] = None) -> None:
+        if source is None:
+            self._parts: List[Dict[Any, Any]] = [{} for _ in range(self.SHARDS)]
+            self._owned = set(range(self.SHARDS))
+        else:
+            self._parts = list(source._parts)
+            self._owned = set()  # части, уже скопированные этой версией
+
+    def _index(self, key: Any) -> int:
+        return hash(key) & (self.SHARDS - 1)
+
+    def _writable(self, key: Any) -> Dict[Any, Any]:
+        index = self._index(key)
+        if index not in self._owned:
+            self._parts[index] = dict(self._parts[index])
+            self._owned.add(index)
+        return self._parts[index]
+
+    def __len__(self) -> int:
+        return sum(len(part) for part in self._parts)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._parts[self._index(key)]
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._parts[self._index(key)][key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._writable(key)[key] = value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self._parts[self._index(key)].get(key, default)
+
+    def setdefault(self, key: Any, default: Any) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = self._writable(key).setdefault(key, default)
+        return value
+
+    def pop(self, key: Any, default: Any = None) -> Any:
+        if key not in self:
+            return default
+        return self._writable(key).pop(key)
+
+
+def _pair_key(a: int, b: int) -> int:
+    # Симметричный ключ пары: меньший идентификатор всегда в старших битах
+    if a > b:
+        a, b = b, a
+    return (a << 32) | b
+
+
+class _InteractionTables:
+    """Состояние индекса. Опубликованное состояние не меняется: писатель правит копию"""
+
+    def __init__(self, source: Optional["_InteractionTables"] = None) -> None:
+        # Копируются только затронутые части словарей; вложенные списки и словари заменяются, а не правятся
+        self.terms = ShardedDict(source and source.terms)  # нормализованное название -> id термина
+        self.names: List[str] = list(source.names) if source else []  # id термина -> отображаемое название
+        self.medication_terms = ShardedDict(source and source.medication_terms)  # medication.id -> id термина
+        self.term_medications = ShardedDict(source and source.term_medications)  # id термина -> medication.id
+        self.declared = ShardedDict(source and source.declared)  # medication.id -> объявленные пары
+        self.pairs = ShardedDict(source and source.pairs)  # ключ пары -> самое тяжелое взаимодействие
+
+    def term(self, name: str, create: bool = True) -> Optional[int]:
+        key = normalize_name(name)
+        term = self.terms.get(key)
+        if term is None and create and key:
+            term = len(self.names)
+            self.terms[key] = term
+            self.names.append(name.strip())
+        return term
+
+    def register(self, medication_id: int, name: str, generic_name: Optional[str]) -> int:
+        term = self.term(name)
+        if generic_name:
+            # Международное название указывает на тот же термин, если еще не занято
+            self.terms.setdefault(normalize_name(generic_name), term)
+        self.medication_terms[medication_id] = term
+        medications = self.term_medications.get(term, [])
+        if medication_id not in medications:
+            self.term_medications[term] = medications + [medication_id]
+        return term
+
+    def declare(self, medication_id: int, term: int, interactions: Iterable[Dict[str, Any]]) -> List[int]:
+        declared = {}
+        for item in interactions:
+            if not isinstance(item, dict) or not item.get("medication"):
+                continue
+            other = self.term(item["medication"])
+            if other == term:
+                continue
+            severity = str(item.get("severity") or "")
+            interaction = Interaction(
+                severity=severity,
+                description=item.get("description"),
+                management=item.get("management"),
+                rank=SEVERITY_RANK.get(severity.casefold(), 0),
+            )
+            key = _pair_key(term, other)
+            current = declared.get(key)
+            if current is None or interaction.rank > current.rank:
+                declared[key] = interaction
+        if declared:
+            self.declared[medication_id] = declared
+        return list(declared)
+
+    def resolve(self, key: int) -> None:
+        # Пара может быть описана в карточке любого из двух препаратов
+        best = None
+        for term in (key >> 32, key & 0xFFFFFFFF):
+            for medication_id in self.term_medications.get(term, ()):
+                interaction = self.declared.get(medication_id, {}).get(key)
+                if interaction is not None and (best is None or interaction.rank > best.rank):
+                    best = interaction
+        if best is None:
+            self.pairs.pop(key, None)
+        else:
+            self.pairs[key] = best
+
+    def remove(self, medication_id: int) -> List[int]:
+        term = self.medication_terms.pop(medication_id, None)
+        if term is not None:
+            medications = self.term_medications.get(term, [])
+            if medication_id in medications:
+                self.term_medications[term] = [m for m in medications if m != medication_id]
+        return list(self.declared.pop(medication_id, {}))
+
+
+class InteractionIndex:
+    """Симметричный индекс пар препаратов -> тяжесть и тактика.
+
+    Названия препаратов интернируются в целочисленные идентификаторы, а пара
+    хранится одним int-ключом, поэтому проверка k препаратов - это k² словарных
+    обращений без разбора JSON и без обхода каталога. Все таблицы индекса
+    публикуются одной ссылкой: изменение собирает новую версию под _lock,
+    а проверки читают свою версию целиком и без блокировок.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._tables = _InteractionTables()
+
+    def __len__(self) -> int:
+        return len(self._tables.pairs)
+
+    def build(self, medications: Iterable[Dict[str, Any]]) -> None:
+        """Полная сборка индекса по каталогу (выполняется один раз при старте)"""
+        medications = [m for m in medications if m.get("is_active", True)]
+        tables = _InteractionTables()
+        terms = [tables.register(m["id"], m["name"], m.get("generic_name")) for m in medications]
+        for medication, term in zip(medications, terms):
+            declared = tables.declare(medication["id"], term, parse_json_list(medication.get("drug_interactions")))
+            for key in declared:
+                interaction = tables.declared[medication["id"]][key]
+                current = tables.pairs.get(key)
+                if current is None or interaction.rank > current.rank:
+                    tables.pairs[key] = interaction
+        with self._lock:
+            self._tables = tables
+
+    def update_medications(self, medications: Iterable[Dict[str, Any]]) -> None:
+        """Инкрементальное обновление после создания/изменения/удаления пачки препаратов"""
+        with self._lock:
+            tables = _InteractionTables(self._tables)
+            affected = set()
+            for medication in medications:
+                affected.update(tables.remove(medication["id"]))
+                if medication.get("is_active", True):
+                    term = tables.register(medication["id"], medication["name"], medication.get("generic_name"))
+                    affected.update(
+                        tables.declare(medication["id"], term, parse_json_list(medication.get("drug_interactions")))
+                    )
+            for key in affected:
+                tables.resolve(key)
+            self._tables = tables
+
+    def update_medication(self, medication: Dict[str, Any]) -> None:
+        self.update_medications([medication])
+
+    def remove_medication(self, medication_id: int) -> None:
+        self.update_medications([{"id": medication_id, "is_active": False}])
+
+    def resolve(self, name: str) -> Optional[int]:
+        """id препарата каталога по торговому или международному названию"""
+        tables = self._tables
+        term = tables.term(name, create=False)
+        medications = tables.term_medications.get(term) if term is not None else None
+        return medications[0] if medications else None
+
+    def lookup(self, name_a: str, name_b: str) -> Optional[Interaction]:
+        tables = self._tables
+        a, b = tables.term(name_a, create=False), tables.term(name_b, create=False)
+        if a is None or b is None or a == b:
+            return None
+        return tables.pairs.get(_pair_key(a, b))
+
+    def check(self, medications: Iterable[Dict[str, Any]]) -> List[Tuple[str, str, Interaction]]:
+        """Все попарные взаимодействия среди переданных препаратов, самые тяжелые первыми"""
+        tables = self._tables
+        terms: Dict[int, str] = {}
+        for medication in medications:
+            term = None
+            if medication.get("name"):
+                term = tables.term(medication["name"], create=False)
+            if term is None and medication.get("id") is not None:
+                term = tables.medication_terms.get(medication["id"])
+            if term is not None:
+                terms.setdefault(term, medication.get("name") or tables.names[term])
+        found = []
+        ordered = list(terms.items())
+        for i, (a, name_a) in enumerate(ordered):
+            for b, name_b in ordered[i + 1:]:
+                interaction = tables.pairs.get(_pair_key(a, b))
+                if interaction is not None:
+                    found.append((name_a, name_b, interaction))
+        found.sort(key=lambda item: item[2].rank, reverse=True)
+        return found
+
+
+interaction_index = InteractionIndex()
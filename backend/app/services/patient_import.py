@@ -0,0 +1,208 @@
+"""Массовый импорт пациентов из тела запроса (JSON-массив, NDJSON или CSV).
+
+Тело читается потоком: синхронный парсер работает в потоке пула и берет
+очередные куски запроса из цикла событий (RequestBodyReader), поэтому файл
+целиком в памяти не оказывается. Записи проверяются по PatientCreate
+кусками по IMPORT_CHUNK_SIZE; корректные строки куска вставляются одной
+транзакцией (import_many), ошибки копятся в отчете с номером записи.
+Ошибка формата (битый JSON) останавливает разбор: уже сохраненные куски
+остаются, в отчет попадает номер записи, на которой разбор прервался.
+"""
+import csv
+import io
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from anyio import from_thread
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.repositories import Repositories
+from app.schemas.patient import PatientCreate, PatientImportError, PatientImportResult
+
+# Content-Type тела -> формат
+IMPORT_FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+_READ_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class ImportFormatError(ValueError):
+    """Тело не разбирается в заявленном формате"""
+
+
+def import_format(content_type: Optional[str]) -> str:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=415, detail=f"Неподдерживаемый формат импорта, ожидается один из: {', '.join(IMPORT_FORMATS)}"
+        )
+    return IMPORT_FORMATS[media_type]
+
+
+class RequestBodyReader(io.RawIOBase):
+    """Тело запроса как файл для синхронного парсера.
+
+    Читать можно только из потока пула anyio (run_in_threadpool): очередной
+    кусок тела запрашивается у цикла событий через from_thread.run.
+    """
+
+    def __init__(self, chunks) -> None:
+        self._chunks = chunks.__aiter__()
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = from_thread.run(self._chunks.__anext__)
+            except StopAsyncIteration:
+                return 0
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def _json_records(text: io.TextIOBase) -> Iterator[Any]:
+    """Элементы JSON-массива по одному, без разбора файла целиком"""
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+
+    def skip_whitespace() -> bool:
+        # Дочитывает тело, пока не встретится значимый символ; False - тело кончилось
+        nonlocal buffer, position, eof
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or eof:
+                return position < len(buffer)
+            buffer, position = buffer[position:] + text.read(_READ_SIZE), 0
+            eof = not buffer
+
+    if not skip_whitespace() or buffer[position] != "[":
+        raise ImportFormatError("Ожидается JSON-массив записей")
+    position += 1
+    first = True
+    while True:
+        if not skip_whitespace():
+            raise ImportFormatError("JSON-массив не закрыт")
+        if buffer[position] == "]":
+            return
+        if not first:
+            if buffer[position] != ",":
+                raise ImportFormatError(f"Ожидается ',' или ']', получено {buffer[position]!r}")
+            position += 1
+            if not skip_whitespace():
+                raise ImportFormatError("JSON-массив не закрыт")
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = None
+            # Значение у конца буфера может быть обрезано (число, незакрытый объект) - дочитываем
+            if end is not None and end < len(buffer):
+                break
+            chunk = text.read(_READ_SIZE)
+            if not chunk:
+                if end is None:
+                    raise ImportFormatError("Некорректный JSON")
+                break
+            buffer, position = buffer[position:] + chunk, 0
+        yield value
+        position, first = end, False
+
+
+def _ndjson_records(text: io.TextIOBase) -> Iterator[Any]:
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ImportFormatError(f"Некорректный JSON: {exc.msg}")
+
+
+def _csv_value(value: str) -> Any:
+    # Списки и словари - JSON в ячейке (как в выгрузке /patients/export)
+    if value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    return value
+
+
+def _csv_records(text: io.TextIOBase) -> Iterator[Dict[str, Any]]:
+    try:
+        for row in csv.DictReader(text):
+            yield {column: _csv_value(value) for column, value in row.items() if column and value not in ("", None)}
+    except csv.Error as exc:
+        raise ImportFormatError(f"Некорректный CSV: {exc}")
+
+
+_PARSERS = {"json": _json_records, "ndjson": _ndjson_records, "csv": _csv_records}
+
+
+def _validate(number: int, record: Any) -> Tuple[Optional[Dict[str, Any]], Optional[PatientImportError]]:
+    if not isinstance(record, dict):
+        return None, PatientImportError(row=number, errors=["Ожидается объект с полями пациента"])
+    try:
+        return PatientCreate.model_validate(record).model_dump(), None
+    except ValidationError as exc:
+        errors = [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+        return None, PatientImportError(row=number, errors=errors)
+
+
+def validated_chunks(body: io.RawIOBase, body_format: str, chunk_size: int) -> Iterator[Tuple[List[Tuple[int, Dict[str, Any]]], List[PatientImportError]]]:
+    """([(номер, корректная запись)], ошибки) кусками по chunk_size записей"""
+    text = io.TextIOWrapper(io.BufferedReader(body, _READ_SIZE), encoding="utf-8-sig", newline="")
+    rows: List[Tuple[int, Dict[str, Any]]] = []
+    errors: List[PatientImportError] = []
+    number = 0
+    try:
+        for number, record in enumerate(_PARSERS[body_format](text), start=1):
+            data, error = _validate(number, record)
+            if error is not None:
+                errors.append(error)
+            else:
+                rows.append((number, data))
+            if number % chunk_size == 0:
+                yield rows, errors
+                rows, errors = [], []
+    except (ImportFormatError, UnicodeDecodeError) as exc:
+        message = str(exc) if isinstance(exc, ImportFormatError) else "Файл не в кодировке UTF-8"
+        errors.append(PatientImportError(row=number + 1, errors=[f"Разбор остановлен: {message}"]))
+    if rows or errors:
+        yield rows, errors
+
+
+async def import_patients(repos: Repositories, doctor_id: int, body, body_format: str) -> PatientImportResult:
+    """Импорт пациентов врача из потока тела запроса"""
+    chunks = validated_chunks(RequestBodyReader(body), body_format, settings.IMPORT_CHUNK_SIZE)
+    result = PatientImportResult()
+    while True:
+        # Разбор и проверка - в потоке пула, вставка - через репозиторий запроса
+        chunk = await run_in_threadpool(next, chunks, None)
+        if chunk is None:
+            return result
+        rows, errors = chunk
+        if rows:
+            try:
+                result.created += await repos.patients.import_many(doctor_id, [data for _, data in rows])
+            except Exception:
+                logger.exception("Не удалось сохранить кусок импорта пациентов")
+                errors.extend(PatientImportError(row=number, errors=["Не удалось сохранить запись"]) for number, _ in rows)
+                errors.sort(key=lambda error: error.row)
+        result.failed += len(errors)
+        result.errors.extend(errors)
@@ -0,0 +1,38 @@
+from typing import List
+
+from app.schemas.patient import PatientHistoryEvent, PatientSummary
+from app.services.interactions import parse_json_list
+
+
+def _prescription_title(recommended_medications) -> str:
+    names = [item.get("name") for item in parse_json_list(recommended_medications) if isinstance(item, dict)]
+    names = [name for name in names if name]
+    return "Назначение: " + ", ".join(names) if names else "Назначение"
+
+
+def patient_history(summary: PatientSummary) -> List[PatientHistoryEvent]:
+    """История пациента - события карточки от новых к старым"""
+    events = [
+        PatientHistoryEvent(
+            type="prescription", id=prescription.id, date=prescription.created_at,
+            title=_prescription_title(prescription.recommended_medications), status=prescription.status,
+        )
+        for prescription in summary.prescriptions
+    ]
+    events += [
+        PatientHistoryEvent(
+            type="control_visit", id=visit.id, date=visit.scheduled_date,
+            title=visit.notes or visit.type, status=visit.status,
+        )
+        for visit in summary.control_visits
+    ]
+    events += [
+        PatientHistoryEvent(
+            type="side_effect", id=effect.id, date=effect.reported_date or effect.created_at,
+            title=f"{effect.medication_name}: {effect.description}" if effect.description else effect.medication_name,
+            status=effect.status,
+        )
+        for effect in summary.side_effects
+    ]
+    events.sort(key=lambda event: (event.date, event.type, event.id), reverse=True)
+    return events
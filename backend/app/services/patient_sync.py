@@ -0,0 +1,80 @@
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.patient_allergy import PatientAllergy
+from app.models.patient_medication import PatientMedication
+from app.services.interactions import interaction_index, normalize_name, parse_json_list
+
+# Таблица -> (ключевое поле, поля строки, поле в JSON-элементе для каждого из них)
+_SPECS = {
+    PatientMedication: ("name", {"name": "name", "dosage": "dosage", "frequency": "frequency"}),
+    PatientAllergy: ("allergen", {"allergen": "allergen", "severity": "severity", "reaction": "reaction"}),
+}
+
+
+def _text(value: Any, length: int = 255) -> Optional[str]:
+    return None if value is None else str(value).strip()[:length]
+
+
+def _desired_rows(model, patient_id: int, items: Any) -> Dict[str, Dict[str, Any]]:
+    key, fields = _SPECS[model]
+    rows = {}
+    for item in parse_json_list(items):
+        if not isinstance(item, dict) or not item.get(key):
+            continue
+        row = {column: _text(item.get(source)) for column, source in fields.items()}
+        row["patient_id"] = patient_id
+        row["medication_id"] = interaction_index.resolve(row[key])
+        # Уникальность (patient_id, name) в MySQL регистронезависима - дубликаты схлопываем так же
+        rows.setdefault(normalize_name(row[key]), row)
+    return rows
+
+
+def _sync_table(db: Session, model, items_by_patient: Dict[int, Any]) -> Tuple[int, int]:
+    key, fields = _SPECS[model]
+    columns = ["medication_id", *fields]
+    desired = {patient_id: _desired_rows(model, patient_id, items) for patient_id, items in items_by_patient.items()}
+
+    existing = db.execute(
+        select(model.id, model.patient_id, *(getattr(model, column) for column in columns))
+        .where(model.patient_id.in_(list(desired)))
+    ).all()
+    stale, inserts = [], []
+    for row in existing:
+        wanted = desired[row.patient_id].pop(normalize_name(getattr(row, key)), None)
+        if wanted is not None and all(wanted[column] == getattr(row, column) for column in columns):
+            continue
+        # Изменившаяся строка заменяется: удаление + вставка вместо UPDATE на каждую
+        stale.append(row.id)
+        if wanted is not None:
+            inserts.append(wanted)
+    for rows in desired.values():
+        inserts.extend(rows.values())
+
+    if stale:
+        db.execute(delete(model).where(model.id.in_(stale)))
+    if inserts:
+        db.execute(insert(model), inserts)
+    return len(inserts), len(stale)
+
+
+def sync_patient_therapy(
+    db: Session,
+    current_medications: Optional[Dict[int, Any]] = None,
+    allergies: Optional[Dict[int, Any]] = None,
+) -> Dict[str, Tuple[int, int]]:
+    """Привести patient_medications / patient_allergies к JSON-полям пациентов.
+
+    Аргументы - словари patient_id -> новое значение поля; не переданное поле не
+    трогается. На таблицу выполняется один SELECT, один DELETE и один
+    INSERT (executemany) независимо от числа пациентов. Коммит - на вызывающем.
+    Возвращает (вставлено, удалено) по каждой таблице.
+    """
+    result = {}
+    if current_medications:
+        result["patient_medications"] = _sync_table(db, PatientMedication, current_medications)
+    if allergies:
+        result["patient_allergies"] = _sync_table(db, PatientAllergy, allergies)
+    return result
@@ -0,0 +1,425 @@
+"""Массовый пересчет ИИ-рекомендаций по когорте пациентов.
+
+Задание идет в отдельном потоке приложения: пациенты когорты читаются
+пачками по курсору id (keyset), пачка делится на куски и оценивается в пуле
+процессов (каждый процесс собирает RecommendationEngine из снимка каталога
+один раз), результаты записываются в последнее открытое назначение пациента
+одним executemany. Запись пачки и сдвиг курсора задания - одна транзакция,
+поэтому после падения задание продолжается с последней зафиксированной пачки.
+
+Задание выполняет один процесс: он забирает его (claim) условным UPDATE -
+только если задание ничье, уже его или его процесс не отмечался дольше
+JOB_CLAIM_TIMEOUT, - и отмечается (heartbeat) при записи каждой пачки. Пачка
+записывается, только если задание все еще за этим процессом.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, func, or_, select, update
+
+from app.core.config import settings
+from app.core.pagination import keyset
+from app.models.job import Job
+from app.models.patient import Patient
+from app.models.patient_medication import PatientMedication
+from app.models.prescription import Prescription
+from app.services.catalog import load_catalog
+from app.services.interactions import interaction_index, normalize_name, parse_json_list
+from app.services.recommendations import RecommendationEngine
+
+logger = logging.getLogger(__name__)
+
+# Поля пациента, которые читает encode_patient
+PATIENT_FIELDS = (
+    "id", "age", "weight", "gender", "diagnosis", "comorbidities", "lab_results",
+    "current_medications", "allergies", "lifestyle_factors", "risk_factors",
+)
+# Пересчет записывается только в незавершенные назначения
+OPEN_PRESCRIPTION_STATUSES = ("draft", "active")
+UNFINISHED_JOB_STATUSES = ("pending", "running")
+
+
+def _job_params(params: Optional[Dict[str, Any]], doctor_id: int) -> Dict[str, Any]:
+    """Параметры когорты задания: врач - всегда владелец задания"""
+    return {**(params or {}), "doctor_id": doctor_id}
+
+
+def _cohort_doctor(params: Dict[str, Any]) -> int:
+    # Когорта без врача затронула бы назначения всех врачей
+    if params.get("doctor_id") is None:
+        raise ValueError("Когорта пересчета без врача")
+    return params["doctor_id"]
+
+
+class JobClaimLost(Exception):
+    """Задание забрал другой процесс (этот не отмечался дольше JOB_CLAIM_TIMEOUT)"""
+
+
+class CohortBatch(NamedTuple):
+    patients: List[Dict[str, Any]]
+    prescription_ids: List[int]  # последнее открытое назначение каждого пациента
+
+
+# Движок процесса пула: собирается инициализатором из снимка каталога задания
+_worker_engine: Optional[RecommendationEngine] = None
+
+
+def _init_worker(catalog: List[Dict[str, Any]]) -> None:
+    global _worker_engine
+    _worker_engine = RecommendationEngine()
+    _worker_engine.build(catalog)
+
+
+def _recommend_chunk(patients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return _worker_engine.recommend_many(patients)
+
+
+def _prescription_changes(recommendation: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return {**recommendation, "is_ai_generated": True, "updated_at": now}
+
+
+class SqlCohortStore:
+    """Когорта и состояние задания в БД (синхронные сессии, по одной на операцию)"""
+
+    def __init__(self, session_factory) -> None:
+        self.session_factory = session_factory
+
+    @staticmethod
+    def _criteria(params: Dict[str, Any]) -> Tuple[Any, List[Any]]:
+        """Подзапрос «последнее открытое назначение пациента» и условия когорты"""
+        latest = select(func.max(Prescription.id)).where(
+            Prescription.patient_id == Patient.id, Prescription.status.in_(OPEN_PRESCRIPTION_STATUSES)
+        ).scalar_subquery()
+        criteria = [latest.isnot(None), Patient.doctor_id == _cohort_doctor(params)]
+        if params.get("diagnosis"):
+            criteria.append(Patient.diagnosis.icontains(params["diagnosis"], autoescape=True))
+        if params.get("medication"):
+            # По названию в patient_medications (индекс) или по препарату каталога
+            match = PatientMedication.name == params["medication"]
+            medication_id = interaction_index.resolve(params["medication"])
+            if medication_id is not None:
+                match = or_(match, PatientMedication.medication_id == medication_id)
+            criteria.append(Patient.id.in_(select(PatientMedication.patient_id).where(match)))
+        return latest, criteria
+
+    def unfinished(self) -> List[int]:
+        with self.session_factory() as db:
+            return list(db.scalars(select(Job.id).where(Job.status.in_(UNFINISHED_JOB_STATUSES)).order_by(Job.id)))
+
+    def claim(self, job_id: int, worker: str, stale_before: datetime) -> bool:
+        """Забрать задание: одно условное UPDATE, из конкурирующих процессов успевает один"""
+        with self.session_factory() as db:
+            result = db.execute(
+                update(Job)
+                .where(
+                    Job.id == job_id,
+                    Job.status.in_(UNFINISHED_JOB_STATUSES),
+                    or_(Job.worker.is_(None), Job.worker == worker, Job.heartbeat < stale_before),
+                )
+                .values(worker=worker, heartbeat=datetime.now())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return result.rowcount == 1
+
+    def release(self, job_id: int, worker: str) -> None:
+        """Отдать задание (остановка процесса): следующий процесс заберет его сразу"""
+        with self.session_factory() as db:
+            db.execute(
+                update(Job).where(Job.id == job_id, Job.worker == worker).values(worker=None, heartbeat=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def begin(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Перевод задания в running; размер когорты считается при первом запуске"""
+        with self.session_factory() as db:
+            job = db.get(Job, job_id)
+            if job is None or job.status not in UNFINISHED_JOB_STATUSES:
+                return None
+            params = _job_params(job.params, job.doctor_id)
+            if job.total is None:
+                _, criteria = self._criteria(params)
+                job.total = db.scalar(select(func.count()).select_from(Patient).where(*criteria))
+            job.status = "running"
+            job.started_at = job.started_at or datetime.now()
+            db.commit()
+            return {"params": params, "last_patient_id": job.last_patient_id}
+
+    def catalog(self) -> List[Dict[str, Any]]:
+        with self.session_factory() as db:
+            return load_catalog(db)
+
+    def next_batch(self, params: Dict[str, Any], after_id: Optional[int], limit: int) -> CohortBatch:
+        latest, criteria = self._criteria(params)
+        columns = [getattr(Patient, field) for field in PATIENT_FIELDS]
+        statement = keyset(select(*columns, latest.label("prescription_id")).where(*criteria), Patient.id, after_id, 0, limit)
+        with self.session_factory() as db:
+            rows = db.execute(statement).all()
+        return CohortBatch(
+            [{field: row._mapping[field] for field in PATIENT_FIELDS} for row in rows],
+            [row.prescription_id for row in rows],
+        )
+
+    def commit_batch(self, job_id: int, worker: str, batch: CohortBatch, recommendations: List[Dict[str, Any]],
+                     elapsed: float) -> None:
+        table = Prescription.__table__
+        now = datetime.now()
+        # Один UPDATE ... WHERE id = ? на всю пачку (executemany); SET - по ключам параметров.
+        # IN (...) раскрывается при выполнении и в executemany недопустим - отсюда OR
+        statement = update(table).where(
+            table.c.id == bindparam("prescription_id"),
+            or_(*(table.c.status == status for status in OPEN_PRESCRIPTION_STATUSES)),
+        )
+        with self.session_factory() as db:
+            # Сначала курсор задания (с отметкой): если задание уже не наше - пачку не пишем
+            claimed = db.execute(
+                update(Job).where(Job.id == job_id, Job.worker == worker).values(
+                    processed=Job.processed + len(batch.patients),
+                    last_patient_id=batch.patients[-1]["id"],
+                    elapsed_seconds=Job.elapsed_seconds + elapsed,
+                    heartbeat=now,
+                ).execution_options(synchronize_session=False)
+            )
+            if claimed.rowcount != 1:
+                db.rollback()
+                raise JobClaimLost(job_id)
+            db.execute(statement, [
+                {"prescription_id": prescription_id, **_prescription_changes(recommendation, now)}
+                for prescription_id, recommendation in zip(batch.prescription_ids, recommendations)
+            ])
+            db.commit()
+
+    def finish(self, job_id: int, worker: str, status: str, error: Optional[str] = None) -> None:
+        with self.session_factory() as db:
+            db.execute(
+                update(Job).where(Job.id == job_id, Job.worker == worker)
+                .values(status=status, error=error, finished_at=datetime.now())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+
+class MemoryCohortStore:
+    """То же для бэкенда memory (таблицы моков)"""
+
+    # Проверка и смена владельца задания - атомарно (как условный UPDATE в БД)
+    _claims = threading.Lock()
+
+    def __init__(self, jobs, patients, prescriptions) -> None:
+        self.jobs = jobs
+        self.patients = patients
+        self.prescriptions = prescriptions
+
+    def _latest_prescription(self, patient_id: int) -> Optional[int]:
+        ids = [
+            row["id"] for row in self.prescriptions.find("patient_id", patient_id)
+            if row.get("status") in OPEN_PRESCRIPTION_STATUSES
+        ]
+        return max(ids, default=None)
+
+    def _where(self, params: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+        doctor_id = _cohort_doctor(params)
+        diagnosis = (params.get("diagnosis") or "").casefold()
+        medication = normalize_name(params.get("medication") or "")
+
+        def matches(row: Dict[str, Any]) -> bool:
+            if row.get("doctor_id") != doctor_id:
+                return False
+            if diagnosis and diagnosis not in (row.get("diagnosis") or "").casefold():
+                return False
+            if medication and medication not in {
+                normalize_name(item.get("name") or "")
+                for item in parse_json_list(row.get("current_medications")) if isinstance(item, dict)
+            }:
+                return False
+            return self._latest_prescription(row["id"]) is not None
+        return matches
+
+    def unfinished(self) -> List[int]:
+        return sorted(row["id"] for status in UNFINISHED_JOB_STATUSES for row in self.jobs.find("status", status))
+
+    def claim(self, job_id: int, worker: str, stale_before: datetime) -> bool:
+        with self._claims:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in UNFINISHED_JOB_STATUSES:
+                return False
+            owner, heartbeat = job.get("worker"), job.get("heartbeat")
+            if owner not in (None, worker) and heartbeat is not None and heartbeat >= stale_before:
+                return False
+            self.jobs.update(job_id, {"worker": worker, "heartbeat": datetime.now()})
+            return True
+
+    def release(self, job_id: int, worker: str) -> None:
+        with self._claims:
+            job = self.jobs.get(job_id)
+            if job is not None and job.get("worker") == worker:
+                self.jobs.update(job_id, {"worker": None, "heartbeat": None})
+
+    def begin(self, job_id: int) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] not in UNFINISHED_JOB_STATUSES:
+            return None
+        params = _job_params(job.get("params"), job["doctor_id"])
+        changes = {"status": "running", "started_at": job.get("started_at") or datetime.now(), "updated_at": datetime.now()}
+        if job.get("total") is None:
+            changes["total"] = sum(1 for row in self.patients if self._where(params)(row))
+        self.jobs.update(job_id, changes)
+        return {"params": params, "last_patient_id": job.get("last_patient_id")}
+
+    def catalog(self) -> List[Dict[str, Any]]:
+        return load_catalog()
+
+    def next_batch(self, params: Dict[str, Any], after_id: Optional[int], limit: int) -> CohortBatch:
+        rows = self.patients.page(after_id, limit, where=self._where(params))
+        return CohortBatch(
+            [{field: row.get(field) for field in PATIENT_FIELDS} for row in rows],
+            [self._latest_prescription(row["id"]) for row in rows],
+        )
+
+    def commit_batch(self, job_id: int, worker: str, batch: CohortBatch, recommendations: List[Dict[str, Any]],
+                     elapsed: float) -> None:
+        now = datetime.now()
+        with self._claims:
+            job = self.jobs.get(job_id)
+            if job is None or job.get("worker") != worker:
+                raise JobClaimLost(job_id)
+            for prescription_id, recommendation in zip(batch.prescription_ids, recommendations):
+                self.prescriptions.update(prescription_id, _prescription_changes(recommendation, now))
+            self.jobs.update(job_id, {
+                "processed": job["processed"] + len(batch.patients),
+                "last_patient_id": batch.patients[-1]["id"],
+                "elapsed_seconds": job["elapsed_seconds"] + elapsed,
+                "heartbeat": now,
+                "updated_at": now,
+            })
+
+    def finish(self, job_id: int, worker: str, status: str, error: Optional[str] = None) -> None:
+        with self._claims:
+            job = self.jobs.get(job_id)
+            if job is not None and job.get("worker") == worker:
+                self.jobs.update(job_id, {"status": status, "error": error, "finished_at": datetime.now(), "updated_at": datetime.now()})
+
+
+def cohort_store():
+    """Хранилище заданий для бэкенда из настроек (REPOSITORY_BACKEND)"""
+    if settings.repository_backend == "memory":
+        from app import mock_data
+        return MemoryCohortStore(mock_data.MOCK_JOBS, mock_data.MOCK_PATIENTS, mock_data.MOCK_PRESCRIPTIONS)
+    from app.db.database import SessionLocal
+    return SqlCohortStore(SessionLocal)
+
+
+class RecommendationJobRunner:
+    """Выполнение заданий пересчета: поток на задание, оценка - в пуле процессов.
+
+    Пока процессы считают текущую пачку, поток читает следующую. При
+    остановке приложения задание завершает текущую пачку и остается в
+    статусе running - при следующем старте оно продолжается с курсора.
+    При workers=0 оценка идет в потоке задания (без отдельных процессов).
+    Задание выполняется, только если этот процесс забрал его (claim).
+    """
+
+    def __init__(self, workers: int, batch_size: int, chunk_size: int, claim_timeout: float) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.claim_timeout = claim_timeout
+        # Уникален для процесса и его перезапуска: старый процесс, еще дорабатывающий пачку, - другой владелец
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._threads: Dict[int, threading.Thread] = {}
+        self._stopping = threading.Event()
+
+    def start(self, job_id: int) -> None:
+        with self._lock:
+            if job_id in self._threads:
+                return
+            thread = threading.Thread(target=self._run, args=(job_id,), name=f"recommendation-job-{job_id}", daemon=True)
+            self._threads[job_id] = thread
+        thread.start()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"running": len(self._threads), "workers": self.workers}
+
+    def _claim(self, store, job_id: int) -> bool:
+        return store.claim(job_id, self.worker_id, datetime.now() - timedelta(seconds=self.claim_timeout))
+
+    def resume_unfinished(self) -> List[int]:
+        """Продолжить задания, прерванные остановкой или падением процесса, - те, что удалось забрать"""
+        self._stopping.clear()
+        store = cohort_store()
+        job_ids = [job_id for job_id in store.unfinished() if self._claim(store, job_id)]
+        for job_id in job_ids:
+            self.start(job_id)
+        return job_ids
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        for thread in list(self._threads.values()):
+            thread.join(timeout)
+
+    def _run(self, job_id: int) -> None:
+        store = cohort_store()
+        try:
+            # Задание, которое выполняет другой процесс, пропускаем
+            if not self._claim(store, job_id):
+                return
+            job = store.begin(job_id)
+            if job is not None:
+                self._process(job_id, job, store)
+        except JobClaimLost:
+            logger.warning("Задание пересчета рекомендаций %s забрал другой процесс", job_id)
+        except Exception as exc:
+            logger.exception("Задание пересчета рекомендаций %s завершилось ошибкой", job_id)
+            # Текст исключения БД содержит параметры запроса (данные пациентов) - наружу только тип
+            store.finish(job_id, self.worker_id, "failed", f"Ошибка выполнения задания: {type(exc).__name__}")
+        finally:
+            with self._lock:
+                self._threads.pop(job_id, None)
+
+    def _process(self, job_id: int, job: Dict[str, Any], store) -> None:
+        params = job["params"]
+        catalog = store.catalog()
+        pool, engine = None, None
+        if self.workers > 0:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(catalog,))
+        else:
+            engine = RecommendationEngine()
+            engine.build(catalog)
+        try:
+            batch = store.next_batch(params, job["last_patient_id"], self.batch_size)
+            while batch.patients and not self._stopping.is_set():
+                started = time.perf_counter()
+                if pool is not None:
+                    futures = [
+                        pool.submit(_recommend_chunk, batch.patients[start:start + self.chunk_size])
+                        for start in range(0, len(batch.patients), self.chunk_size)
+                    ]
+                upcoming = store.next_batch(params, batch.patients[-1]["id"], self.batch_size)
+                if pool is not None:
+                    recommendations = [item for future in futures for item in future.result()]
+                else:
+                    recommendations = engine.recommend_many(batch.patients)
+                store.commit_batch(job_id, self.worker_id, batch, recommendations, time.perf_counter() - started)
+                batch = upcoming
+            if self._stopping.is_set():
+                store.release(job_id, self.worker_id)
+            else:
+                store.finish(job_id, self.worker_id, "completed")
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+
+recommendation_jobs = RecommendationJobRunner(
+    settings.JOB_WORKERS, settings.JOB_BATCH_SIZE, settings.JOB_CHUNK_SIZE, settings.JOB_CLAIM_TIMEOUT
+)
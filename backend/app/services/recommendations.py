@@ -0,0 +1,622 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.interactions import SEVERITY_RANK, normalize_name, parse_json_list
+
+# Клинические состояния - общая ось для состояний пациента, показаний и
+# противопоказаний препаратов. Основа совпадает с началом слова текста.
+CONDITIONS: Dict[str, Tuple[str, ...]] = {
+    "af": ("фибрилляц", "мерцательн", "трепетани", "fibrillation"),
+    "vte": ("тромбоз", "тромбоэмбол", "тэла", "thrombo"),
+    "heart_failure": ("сердечная недостаточность", "хсн", "heart failure"),
+    "hypertension": ("гипертон", "гипертенз", "hypertension"),
+    "diabetes": ("диабет", "diabetes"),
+    "stroke": ("инсульт", "тиа", "транзиторн", "stroke"),
+    "vascular": ("инфаркт", "атеросклер", "ибс", "ишемическ", "стенокард"),
+    "liver": ("печеночн", "цирроз", "гепатит", "liver"),
+    "renal": ("почечн", "хбп", "нефропат", "renal"),
+    "bleeding": ("кровотеч", "гемофил", "кровоизлиян", "bleeding"),
+    "ulcer": ("язв", "ulcer"),
+    "pregnancy": ("беремен", "pregnan"),
+}
+CONDITION_CODES = list(CONDITIONS)
+
+# Препараты, повышающие риск кровотечения (критерий D в HAS-BLED)
+BLEEDING_DRUG_STEMS = ("аспирин", "ацетилсалицил", "клопидогрел", "тикагрелор", "ибупрофен", "диклофенак", "напроксен", "кеторолак")
+
+# Фиксированная ширина вектора пациента: числовые признаки + флаги состояний
+NUMERIC_FEATURES = ("age", "weight", "female", "creatinine", "crcl", "cha2ds2_vasc", "has_bled", "bleeding_drugs", "alcohol", "labile_inr")
+FEATURES = NUMERIC_FEATURES + tuple(CONDITION_CODES)
+F = {name: i for i, name in enumerate(FEATURES)}
+
+
+class RenalRule(NamedTuple):
+    """Дозирование антикоагулянта по клиренсу креатинина (КК, мл/мин)"""
+    crcl_min: float  # ниже - противопоказан
+    crcl_reduce: float  # ниже - сниженная доза
+    age_reduce: float  # критерии сниженной дозы: возраст >=, вес <=, креатинин >= (мкмоль/л)
+    weight_reduce: float
+    creatinine_reduce: float
+    criteria_needed: int  # сколько критериев нужно для снижения дозы
+    standard_dose: str
+    reduced_dose: str
+    bleeding_weight: float
+    monitoring: str
+
+
+# Основы названий (торговых или МНН) -> правила дозирования антикоагулянтов
+ANTICOAGULANT_RULES: List[Tuple[Tuple[str, ...], RenalRule]] = [
+    (("варфарин", "warfarin"), RenalRule(0, 0, np.inf, -np.inf, np.inf, 1, "по МНО (целевое 2.0-3.0)", "по МНО (целевое 2.0-3.0)", 1.0, "МНО еженедельно до стабилизации, затем ежемесячно")),
+    (("апиксабан", "apixaban"), RenalRule(15, 30, 80, 60, 133, 2, "5 мг 2 раза в день", "2.5 мг 2 раза в день", 0.6, "Креатинин и КК")),
+    (("ривароксабан", "rivaroxaban"), RenalRule(15, 50, np.inf, -np.inf, np.inf, 1, "20 мг 1 раз в день", "15 мг 1 раз в день", 0.8, "Креатинин и КК")),
+    (("дабигатран", "dabigatran"), RenalRule(30, 50, 80, -np.inf, np.inf, 1, "150 мг 2 раза в день", "110 мг 2 раза в день", 0.8, "Креатинин и КК")),
+    (("эдоксабан", "edoxaban"), RenalRule(15, 50, np.inf, 60, np.inf, 1, "60 мг 1 раз в день", "30 мг 1 раз в день", 0.6, "Креатинин и КК")),
+]
+
+# Веса слагаемых оценки кандидата
+W_INDICATION = 1.0
+W_ANTICOAGULATION = 1.5
+W_INTERACTION = 0.8
+W_BLEEDING = 0.6
+W_REDUCED_DOSE = 0.1
+W_ALREADY_TAKING = 0.5
+
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+
+def _field(patient: Any, name: str) -> Any:
+    return patient.get(name) if isinstance(patient, dict) else getattr(patient, name, None)
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _NUMBER.search(str(value)) if value is not None else None
+    return float(match.group().replace(",", ".")) if match else None
+
+
+def _texts(value: Any) -> List[str]:
+    """Строки из текстового/JSON-поля: списки строк, словари и значения словарей"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        parsed = parse_json_list(value) if value.lstrip().startswith("[") else None
+        return _texts(parsed) if parsed else [value]
+    if isinstance(value, dict):
+        return [f"{key} {item}" for key, item in value.items() if item not in (None, False, "", 0)]
+    if isinstance(value, (list, tuple)):
+        return [text for item in value for text in _texts(item)]
+    return [str(value)]
+
+
+# Одно регулярное выражение на все основы: совпадение с начала слова
+_STEM_CODES = {stem: i for i, stems in enumerate(CONDITIONS.values()) for stem in stems}
+_STEMS = re.compile(r"(?<!\w)(?:" + "|".join(
+    re.escape(stem) for stem in sorted(_STEM_CODES, key=len, reverse=True)
+) + ")")
+
+
+def condition_flags(texts: Iterable[str]) -> np.ndarray:
+    """Флаги CONDITIONS, упомянутых в текстах"""
+    flags = np.zeros(len(CONDITION_CODES), dtype=bool)
+    for match in _STEMS.finditer(" ".join(normalize_name(t) for t in texts)):
+        flags[_STEM_CODES[match.group()]] = True
+    return flags
+
+
+def _lab(lab_results: Any, *stems: str) -> Optional[float]:
+    if not isinstance(lab_results, dict):
+        return None
+    for key, value in lab_results.items():
+        if any(normalize_name(str(key)).startswith(stem) for stem in stems):
+            return _number(value)
+    return None
+
+
+def _medication_names(value: Any) -> List[str]:
+    names = []
+    for item in parse_json_list(value) if not isinstance(value, list) else value:
+        name = item.get("name") if isinstance(item, dict) else item
+        if isinstance(name, str) and name.strip():
+            names.append(name)
+    return names
+
+
+def _allergens(value: Any) -> List[str]:
+    allergens = []
+    for item in parse_json_list(value) if not isinstance(value, list) else value:
+        allergen = item.get("allergen") if isinstance(item, dict) else item
+        if isinstance(allergen, str) and allergen.strip():
+            allergens.append(allergen)
+    return allergens
+
+
+class EncodedPatients(NamedTuple):
+    """Пачка пациентов: матрица признаков и списки препаратов/аллергенов"""
+    features: np.ndarray  # (n, len(FEATURES)) float32
+    current_medications: List[List[str]]
+    allergens: List[List[str]]
+
+
+def encode_patient(patient: Any) -> Tuple[np.ndarray, List[str], List[str]]:
+    """Вектор признаков фиксированной ширины + текущие препараты и аллергены"""
+    vector = np.zeros(len(FEATURES), dtype=np.float32)
+    age = _number(_field(patient, "age")) or 0.0
+    weight = _number(_field(patient, "weight"))
+    female = str(_field(patient, "gender") or "").casefold() in ("female", "f", "ж", "женский")
+    lab_results = _field(patient, "lab_results")
+    medications = _medication_names(_field(patient, "current_medications"))
+
+    conditions = condition_flags(
+        _texts(_field(patient, "diagnosis")) + _texts(_field(patient, "comorbidities"))
+        + _texts(_field(patient, "risk_factors"))
+    )
+    vector[len(NUMERIC_FEATURES):] = conditions
+
+    # Креатинин в мкмоль/л; малые значения - это мг/дл
+    creatinine = _lab(lab_results, "креатинин", "creatinine")
+    if creatinine is not None and creatinine < 20:
+        creatinine *= 88.4
+    crcl = _lab(lab_results, "кк", "клиренс", "crcl", "скф", "egfr")
+    if crcl is None and creatinine and weight:
+        # Кокрофт-Голт
+        crcl = (140 - age) * weight * (0.85 if female else 1.0) / (0.815 * creatinine)
+    if crcl is not None and crcl < 30:
+        vector[F["renal"]] = 1
+
+    lifestyle = " ".join(_texts(_field(patient, "lifestyle_factors"))).casefold()
+    risk = " ".join(_texts(_field(patient, "risk_factors"))).casefold()
+    medication_text = " ".join(normalize_name(name) for name in medications)
+
+    vector[F["age"]] = age
+    vector[F["weight"]] = np.nan if weight is None else weight
+    vector[F["female"]] = female
+    vector[F["creatinine"]] = np.nan if creatinine is None else creatinine
+    vector[F["crcl"]] = np.nan if crcl is None else crcl
+    vector[F["bleeding_drugs"]] = any(stem in medication_text for stem in BLEEDING_DRUG_STEMS)
+    vector[F["alcohol"]] = "alcohol" in lifestyle or "алкогол" in lifestyle
+    vector[F["labile_inr"]] = "labile" in risk or "лабильн" in risk
+    return vector, medications, _allergens(_field(patient, "allergies"))
+
+
+def risk_scores(features: np.ndarray) -> None:
+    """CHA₂DS₂-VASc и HAS-BLED по матрице признаков (на месте, векторно)"""
+    age = features[:, F["age"]]
+    c = lambda code: features[:, F[code]]
+    features[:, F["cha2ds2_vasc"]] = (
+        c("heart_failure") + c("hypertension") + 2 * (age >= 75) + c("diabetes") + 2 * c("stroke")
+        + c("vascular") + ((age >= 65) & (age < 75)) + c("female")
+    )
+    features[:, F["has_bled"]] = (
+        c("hypertension") + c("renal") + c("liver") + c("stroke") + np.maximum(c("bleeding"), c("ulcer"))
+        + c("labile_inr") + (age > 65) + c("bleeding_drugs") + c("alcohol")
+    )
+
+
+class PatientFeatureCache:
+    """LRU-кеш закодированных пациентов: patient_id -> (updated_at, результат encode_patient).
+
+    Запись действительна, пока не изменился updated_at пациента, так что
+    повторные шаги мастера назначения не разбирают JSON-поля заново.
+    update_patient/delete_patient сбрасывают запись явно: updated_at в SQLite
+    хранится с точностью до секунды. Вектор признаков только для чтения -
+    encode_patients копирует его в матрицу пачки.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[Any, Tuple[np.ndarray, List[str], List[str]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def encode(self, patient: Any) -> Tuple[np.ndarray, List[str], List[str]]:
+        patient_id = _field(patient, "id")
+        if patient_id is None or self.max_size <= 0:
+            return encode_patient(patient)
+        version = _field(patient, "updated_at")
+        with self._lock:
+            entry = self._entries.get(patient_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(patient_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        features = encode_patient(patient)
+        features[0].setflags(write=False)
+        with self._lock:
+            self._entries[patient_id] = (version, features)
+            self._entries.move_to_end(patient_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return features
+
+    def invalidate(self, patient_id: int) -> None:
+        with self._lock:
+            self._entries.pop(patient_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def encode_patients(patients: Sequence[Any], cache: Optional[PatientFeatureCache] = None) -> EncodedPatients:
+    encode = encode_patient if cache is None else cache.encode
+    encoded = [encode(patient) for patient in patients]
+    features = np.stack([vector for vector, _, _ in encoded]) if encoded else np.zeros((0, len(FEATURES)), np.float32)
+    risk_scores(features)
+    return EncodedPatients(features, [meds for _, meds, _ in encoded], [allergens for _, _, allergens in encoded])
+
+
+class ScoredCandidates(NamedTuple):
+    scores: np.ndarray  # (n, c) float32, -inf - кандидат исключен
+    excluded: np.ndarray  # (n, c) bool
+    contraindicated: np.ndarray
+    allergic: np.ndarray
+    renal_excluded: np.ndarray
+    interaction_rank: np.ndarray  # (n, c) int8
+    reduced_dose: np.ndarray
+    already_taking: np.ndarray
+
+
+class CompiledCatalog:
+    """Матрицы каталога одной версии; после сборки не изменяются.
+
+    Движок заменяет ссылку на скомпилированный каталог целиком, поэтому
+    запрос, начавший оценку, до конца работает с одной версией каталога.
+    """
+
+    def __init__(self, medications: List[Dict[str, Any]], generation: int = 0) -> None:
+        c = len(medications)
+        self.generation = generation
+        self.medications = medications
+        self.ids = np.array([m["id"] for m in medications], dtype=np.int64)
+        self.contraindications = np.zeros((c, len(CONDITION_CODES)), dtype=np.float32)
+        self.indications = np.zeros((c, len(CONDITION_CODES)), dtype=np.float32)
+        self.is_anticoagulant = np.zeros(c, dtype=bool)
+        self.rules: List[Optional[RenalRule]] = [None] * c
+        self.by_name: Dict[str, List[int]] = {}
+        # Словарь названий -> термин; торговое название и МНН препарата - один термин
+        vocabulary: Dict[str, int] = {}
+        terms = 0
+
+        def term_of(key: str) -> int:
+            nonlocal terms
+            term = vocabulary.get(key)
+            if term is None:
+                term = vocabulary[key] = terms
+                terms += 1
+            return term
+
+        declared: List[Tuple[int, str, int]] = []
+
+        for i, medication in enumerate(medications):
+            self.contraindications[i] = condition_flags(_texts(medication.get("contraindications")))
+            self.indications[i] = condition_flags(_texts(medication.get("indications")))
+            names = [medication["name"]] + ([medication["generic_name"]] if medication.get("generic_name") else [])
+            keys = [normalize_name(name) for name in names]
+            term = term_of(keys[0])
+            for key in keys:
+                vocabulary.setdefault(key, term)
+                self.by_name.setdefault(key, []).append(i)
+            if medication.get("drug_class"):
+                self.by_name.setdefault(normalize_name(medication["drug_class"]), []).append(i)
+            joined = " ".join(keys)
+            for stems, rule in ANTICOAGULANT_RULES:
+                if any(stem in joined for stem in stems):
+                    self.rules[i] = rule
+            drug_class = normalize_name(medication.get("drug_class") or "")
+            self.is_anticoagulant[i] = self.rules[i] is not None or "антикоагул" in drug_class or "anticoag" in drug_class
+            for item in parse_json_list(medication.get("drug_interactions")):
+                if isinstance(item, dict) and item.get("medication"):
+                    rank = SEVERITY_RANK.get(str(item.get("severity") or "").casefold(), 0)
+                    declared.append((i, normalize_name(item["medication"]), rank))
+
+        # Взаимодействие симметрично: пара описана в карточке любого из двух препаратов
+        for _, partner, _ in declared:
+            term_of(partner)
+        self.vocabulary = vocabulary
+        owners: Dict[int, List[int]] = {}
+        for i, medication in enumerate(medications):
+            owners.setdefault(vocabulary[normalize_name(medication["name"])], []).append(i)
+        # Обе ориентации заполняются сразу: транспонированная копия плотной матрицы
+        # c x terms обходила бы ее целиком, а np.zeros трогает только записанные страницы
+        ranks = np.zeros((c, terms), dtype=np.int8)
+        ranks_by_term = np.zeros((terms, c), dtype=np.int8)
+
+        def declare(i: int, term: int, rank: int) -> None:
+            if rank > ranks[i, term]:
+                ranks[i, term] = ranks_by_term[term, i] = rank
+
+        for i, partner, rank in declared:
+            term = vocabulary[partner]
+            declare(i, term, rank)
+            own_term = vocabulary[normalize_name(medications[i]["name"])]
+            for j in owners.get(term, ()):
+                declare(j, own_term, rank)
+        self.interaction_ranks = ranks
+        self.interaction_ranks_by_term = ranks_by_term
+
+        rule_value = lambda field, default: np.array(
+            [getattr(rule, field) if rule else default for rule in self.rules], dtype=np.float32
+        )
+        self.crcl_min = rule_value("crcl_min", 0)
+        self.crcl_reduce = rule_value("crcl_reduce", 0)
+        self.age_reduce = rule_value("age_reduce", np.inf)
+        self.weight_reduce = rule_value("weight_reduce", -np.inf)
+        self.creatinine_reduce = rule_value("creatinine_reduce", np.inf)
+        self.criteria_needed = rule_value("criteria_needed", np.inf)
+        self.bleeding_weight = rule_value("bleeding_weight", 0)
+
+    def _hits(self, names_per_patient: List[List[str]]) -> np.ndarray:
+        """(n, c) bool: препарат каталога совпал по названию, МНН или классу"""
+        hits = np.zeros((len(names_per_patient), len(self.medications)), dtype=bool)
+        for row, names in enumerate(names_per_patient):
+            for name in names:
+                columns = self.by_name.get(normalize_name(name))
+                if columns:
+                    hits[row, columns] = True
+        return hits
+
+
+class RecommendationEngine:
+    """Ранжирование всего каталога для пачки пациентов матричными операциями.
+
+    Каталог кодируется один раз: противопоказания и показания - булевы
+    матрицы по оси CONDITIONS, взаимодействия - матрица рангов тяжести
+    (кандидат x название препарата), дозирование - массивы порогов КК.
+    Оценка n пациентов - несколько матричных произведений (n x k) @ (k x c)
+    вместо перебора пар пациент/препарат в Python.
+    """
+
+    def __init__(self, feature_cache: Optional[PatientFeatureCache] = None) -> None:
+        self._lock = threading.RLock()
+        self._compile_lock = threading.Lock()
+        self._catalog: Dict[int, Dict[str, Any]] = {}
+        # Номер версии словаря _catalog; скомпилированный каталог актуален при совпадении
+        self._generation = 0
+        self._compiled: Optional[CompiledCatalog] = None
+        # Кеш признаков пациентов для запросов по одному пациенту (у пакетных заданий его нет)
+        self.feature_cache = feature_cache
+        self._compiles = 0
+        self._compile_seconds = 0.0
+        self._last_compile_seconds = 0.0
+
+    def build(self, medications: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._catalog = {m["id"]: m for m in medications if m.get("is_active", True)}
+            self._generation += 1
+
+    def update_medication(self, medication: Dict[str, Any]) -> None:
+        # Матрицы пересобираются при следующей оценке, а не на каждое изменение
+        with self._lock:
+            if medication.get("is_active", True):
+                self._catalog[medication["id"]] = medication
+            else:
+                self._catalog.pop(medication["id"], None)
+            self._generation += 1
+
+    def remove_medication(self, medication_id: int) -> None:
+        with self._lock:
+            self._catalog.pop(medication_id, None)
+            self._generation += 1
+
+    def __len__(self) -> int:
+        return len(self._catalog)
+
+    def _ensure_compiled(self) -> CompiledCatalog:
+        """Актуальный скомпилированный каталог; сборка - вне блокировки изменений"""
+        compiled = self._compiled
+        if compiled is not None and compiled.generation == self._generation:
+            return compiled
+        with self._compile_lock:
+            with self._lock:
+                generation = self._generation
+                medications = [self._catalog[key] for key in sorted(self._catalog)]
+            if self._compiled is None or self._compiled.generation != generation:
+                started = time.perf_counter()
+                self._compiled = CompiledCatalog(medications, generation)
+                elapsed = time.perf_counter() - started
+                self._compiles += 1
+                self._compile_seconds += elapsed
+                self._last_compile_seconds = elapsed
+            return self._compiled
+
+    def stats(self) -> Dict[str, float]:
+        """Сборки матриц каталога: сколько было и сколько времени заняли (секунды)"""
+        return {
+            "medications": len(self._catalog),
+            "compiles": self._compiles,
+            "compile_seconds": round(self._compile_seconds, 6),
+            "last_compile_seconds": round(self._last_compile_seconds, 6),
+        }
+
+    def compile(self) -> None:
+        """Собрать матрицы заранее (после перезагрузки каталога), а не в первом запросе"""
+        self._ensure_compiled()
+
+    def score(self, encoded: EncodedPatients, catalog: Optional[CompiledCatalog] = None) -> ScoredCandidates:
+        """Оценка всех кандидатов каталога для пачки пациентов"""
+        catalog = catalog or self._ensure_compiled()
+        features = encoded.features
+        n, c = len(features), len(catalog.medications)
+        conditions = features[:, len(NUMERIC_FEATURES):]
+
+        contraindicated = (conditions @ catalog.contraindications.T) > 0
+        indication = np.minimum(conditions @ catalog.indications.T, 2.0)
+        allergic = catalog._hits(encoded.allergens)
+        already_taking = catalog._hits(encoded.current_medications)
+
+        # Ранг взаимодействия с текущей терапией: строки (термин x кандидаты) матрицы
+        # рангов для всех пар (пациент, его препарат), максимум по пациенту - reduceat
+        rows, terms = [], []
+        for row, names in enumerate(encoded.current_medications):
+            for term in {catalog.vocabulary.get(normalize_name(name)) for name in names} - {None}:
+                rows.append(row)
+                terms.append(term)
+        interaction_rank = np.zeros((n, c), dtype=np.int8)
+        if rows:
+            rows = np.array(rows)
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            interaction_rank[rows[starts]] = np.maximum.reduceat(catalog.interaction_ranks_by_term[terms], starts, axis=0)
+
+        crcl = features[:, F["crcl"], None]
+        renal_excluded = crcl < catalog.crcl_min  # NaN (нет данных) -> False
+        criteria = (
+            (features[:, F["age"], None] >= catalog.age_reduce).astype(np.float32)
+            + (features[:, F["weight"], None] <= catalog.weight_reduce)
+            + (features[:, F["creatinine"], None] >= catalog.creatinine_reduce)
+        )
+        reduced_dose = ((crcl < catalog.crcl_reduce) | (criteria >= catalog.criteria_needed)) & ~renal_excluded
+
+        female = features[:, F["female"], None]
+        cha2ds2_vasc = features[:, F["cha2ds2_vasc"], None]
+        needs_anticoagulation = (
+            (conditions[:, CONDITION_CODES.index("af"), None] > 0) & (cha2ds2_vasc >= 2 + female)
+        ) | (conditions[:, CONDITION_CODES.index("vte"), None] > 0)
+        high_bleeding_risk = features[:, F["has_bled"], None] >= 3
+
+        # Слагаемые добавляются на месте в float32 - без временных матриц float64
+        term = lambda values, weight: np.multiply(values, weight, dtype=np.float32)
+        scores = term(indication, W_INDICATION)
+        scores += term(needs_anticoagulation & catalog.is_anticoagulant, W_ANTICOAGULATION)
+        scores -= term(np.minimum(interaction_rank, 3), W_INTERACTION)
+        scores -= term(high_bleeding_risk, W_BLEEDING) * catalog.bleeding_weight
+        scores -= term(reduced_dose, W_REDUCED_DOSE)
+        scores -= term(already_taking, W_ALREADY_TAKING)
+        excluded = contraindicated | allergic | renal_excluded | (interaction_rank >= SEVERITY_RANK["противопоказано"])
+        scores[excluded] = -np.inf
+        return ScoredCandidates(
+            scores, excluded, contraindicated, allergic, renal_excluded, interaction_rank, reduced_dose, already_taking
+        )
+
+    def top_candidates(self, patients: Sequence[Any], top_k: int = 3, chunk_size: int = 2048) -> Tuple[np.ndarray, np.ndarray]:
+        """Индексы и оценки top_k кандидатов для каждого пациента (по кускам - память O(chunk x c))"""
+        catalog = self._ensure_compiled()
+        k = min(top_k, len(catalog.medications))
+        indices = np.zeros((len(patients), k), dtype=np.int64)
+        scores = np.zeros((len(patients), k), dtype=np.float32)
+        for start in range(0, len(patients), chunk_size):
+            chunk = self.score(encode_patients(patients[start:start + chunk_size]), catalog).scores
+            if not k:
+                continue
+            top = np.argpartition(-chunk, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(chunk, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            indices[start:start + len(chunk)] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + len(chunk)] = np.take_along_axis(top_scores, order, axis=1)
+        return indices, scores
+
+    def recommend(self, patient: Any, alternatives: int = 2) -> Dict[str, Any]:
+        """Рекомендация для одного пациента в формате полей Prescription"""
+        return self.recommend_many([patient], alternatives)[0]
+
+    def recommend_many(self, patients: Sequence[Any], alternatives: int = 2) -> List[Dict[str, Any]]:
+        """Рекомендации для пачки пациентов: одна матричная оценка на всю пачку"""
+        catalog = self._ensure_compiled()
+        encoded = encode_patients(patients, self.feature_cache)
+        scored = self.score(encoded, catalog)
+        # Показанные пациенту препараты - для предупреждений об исключенных
+        relevant = (encoded.features[:, len(NUMERIC_FEATURES):] @ catalog.indications.T) > 0
+        return [self._recommendation(catalog, encoded, scored, relevant, r, alternatives) for r in range(len(patients))]
+
+    def _recommendation(self, catalog: CompiledCatalog, encoded: EncodedPatients, scored: ScoredCandidates,
+                        relevant: np.ndarray, r: int, alternatives: int) -> Dict[str, Any]:
+        features = encoded.features[r]
+        row = scored.scores[r]
+        # Рекомендуются только допустимые препараты с положительной оценкой (есть показание)
+        order = [i for i in np.argsort(-row, kind="stable") if np.isfinite(row[i]) and row[i] > 0]
+        chosen = order[:1 + alternatives]
+
+        def option(i: int) -> Dict[str, Any]:
+            medication, rule = catalog.medications[i], catalog.rules[i]
+            dosage = None
+            if rule is not None:
+                dosage = rule.reduced_dose if scored.reduced_dose[r, i] else rule.standard_dose
+            else:
+                dosage = next(iter(parse_json_list(medication.get("available_dosages"))), None)
+            return {
+                "id": int(medication["id"]),
+                "name": medication["name"],
+                "drug_class": medication.get("drug_class"),
+                "dosage": dosage,
+                "dose_reduced": bool(scored.reduced_dose[r, i]),
+                "score": round(float(row[i]), 3),
+                "interaction_severity": int(scored.interaction_rank[r, i]),
+            }
+
+        crcl = float(features[F["crcl"]])
+        scores = {
+            "cha2ds2_vasc": int(features[F["cha2ds2_vasc"]]),
+            "has_bled": int(features[F["has_bled"]]),
+            "crcl": None if np.isnan(crcl) else round(crcl, 1),
+        }
+        warnings = []
+        # Предупреждения - только по исключенным препаратам, показанным пациенту
+        for i in np.flatnonzero(scored.excluded[r] & relevant[r]):
+            name = catalog.medications[i]["name"]
+            if scored.allergic[r, i]:
+                warnings.append(f"{name}: аллергия у пациента")
+            elif scored.contraindicated[r, i]:
+                warnings.append(f"{name}: противопоказан при состояниях пациента")
+            elif scored.renal_excluded[r, i]:
+                warnings.append(f"{name}: противопоказан при КК {scores['crcl']} мл/мин")
+            else:
+                warnings.append(f"{name}: противопоказанное сочетание с текущей терапией")
+        for i in chosen:
+            if scored.interaction_rank[r, i] >= 2:
+                warnings.append(f"{catalog.medications[i]['name']}: взаимодействие с текущей терапией")
+        if scores["has_bled"] >= 3:
+            warnings.append(f"Высокий риск кровотечения (HAS-BLED {scores['has_bled']})")
+        if scores["crcl"] is None and any(catalog.rules[i] for i in chosen):
+            warnings.append("Нет данных для расчета клиренса креатинина - доза не скорректирована по функции почек")
+
+        monitoring_plan = []
+        for i in chosen[:1]:
+            rule = catalog.rules[i]
+            if rule is not None:
+                monitoring_plan.append({"parameter": rule.monitoring, "frequency": self._renal_frequency(scores["crcl"])})
+            monitoring_plan.extend(
+                item for item in parse_json_list(catalog.medications[i].get("monitoring_parameters")) if isinstance(item, dict)
+            )
+
+        options = [option(i) for i in chosen]
+        justification = None
+        if options:
+            primary = options[0]
+            justification = (
+                f"{primary['name']}: наибольшая оценка среди {len(order)} подходящих препаратов каталога"
+                f" (CHA2DS2-VASc {scores['cha2ds2_vasc']}, HAS-BLED {scores['has_bled']}"
+                + (f", КК {scores['crcl']} мл/мин" if scores["crcl"] is not None else "")
+                + (", доза снижена" if primary["dose_reduced"] else "") + ")"
+            )
+        return {
+            "ai_recommendations": {"primary": options[0] if options else None, "risk_scores": scores},
+            "alternative_options": options[1:],
+            "warnings": warnings,
+            "monitoring_plan": monitoring_plan,
+            "justification": justification,
+        }
+
+    @staticmethod
+    def _renal_frequency(crcl: Optional[float]) -> str:
+        # Правило «КК/10»: при сниженной функции почек контроль чаще
+        if crcl is None or crcl >= 60:
+            return "1 раз в год"
+        return f"каждые {max(1, int(crcl // 10))} мес."
+
+
+patient_feature_cache = PatientFeatureCache(settings.PATIENT_FEATURE_CACHE_SIZE)
+recommendation_engine = RecommendationEngine(patient_feature_cache)
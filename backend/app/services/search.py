@@ -0,0 +1,231 @@
+import math
+import re
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.services.interactions import parse_json_list
+
+# Транслитерация в общий латинский ключ: «аспирин» и «aspirin» дают одинаковые триграммы
+_CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh", "з": "z",
+    "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p",
+    "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch",
+    "ш": "sh", "щ": "sh", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "iu", "я": "ia",
+}
+# Латинские написания приводятся к произношению, как в русских названиях препаратов
+_LATIN_RULES = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"th"), "t"),
+    (re.compile(r"ck"), "k"),
+    (re.compile(r"qu"), "kv"),
+    (re.compile(r"c(?=[eiy])"), "ts"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"q"), "k"),
+]
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+# Доля триграмм запроса, которая должна совпасть (допускает 1-2 опечатки в слове)
+MIN_SIMILARITY = 0.5
+# Вес поля при ранжировании: торговое название важнее международного
+FIELD_WEIGHTS = (1.0, 0.9)
+# Сколько лучших по триграммам кандидатов переранжируется точной проверкой подстроки
+RERANK_FACTOR = 4
+
+def fold(text: str) -> str:
+    """Ключ поиска: регистр, ё/е, кириллица/латиница и пунктуация не различаются"""
+    text = text.casefold().replace("ё", "е")
+    for pattern, replacement in _LATIN_RULES:
+        text = pattern.sub(replacement, text)
+    text = "".join(_CYRILLIC.get(ch, ch) for ch in text)
+    return " ".join(_NON_WORD.split(text)).strip()
+
+
+def trigrams(key: str, prefix: bool = False) -> FrozenSet[str]:
+    """Триграммы слов ключа; для запроса последнее слово считается префиксом"""
+    grams = set()
+    words = key.split()
+    for i, word in enumerate(words):
+        padded = "  " + word + ("" if prefix and i == len(words) - 1 else " ")
+        for j in range(len(padded) - 2):
+            grams.add(padded[j:j + 3])
+    return frozenset(grams)
+
+
+class _TrigramTables(NamedTuple):
+    """Опубликованная версия индекса: после публикации не меняется"""
+    slots: Dict[int, int]  # medication.id -> слот
+    keys: List[Tuple[str, ...]]  # слот -> нормализованные поля
+    results: List[Optional[Dict[str, Any]]]  # слот -> результат поиска
+    sizes: np.ndarray  # поле x слот -> число триграмм
+    postings: List[Dict[str, np.ndarray]]  # поле -> триграмма -> слоты
+
+
+def _empty_tables(capacity: int) -> _TrigramTables:
+    return _TrigramTables(
+        {}, [], [], np.zeros((len(FIELD_WEIGHTS), capacity), dtype=np.float32), [{} for _ in FIELD_WEIGHTS]
+    )
+
+
+class TrigramIndex:
+    """Инвертированный триграммный индекс по name и generic_name.
+
+    Препарат занимает слот, списки вхождений - массивы номеров слотов (int32)
+    отдельно для каждого поля. Совпавшие триграммы считаются одним np.bincount
+    по всем слотам сразу, поэтому время запроса не зависит от того, насколько
+    «частые» триграммы в нем встретились. Все структуры публикуются одной
+    ссылкой на _TrigramTables: писатели под _lock собирают новую версию, а
+    поиск берет ссылку один раз и работает без блокировок.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tables = _empty_tables(capacity=16)
+
+    def __len__(self) -> int:
+        return sum(result is not None for result in self._tables.results)
+
+    @staticmethod
+    def _document(medication: Dict[str, Any]) -> Tuple[Tuple[str, ...], Dict[str, Any]]:
+        keys = (fold(medication["name"]), fold(medication.get("generic_name") or ""))
+        dosages = medication.get("available_dosages")
+        return keys, {
+            "id": medication["id"],
+            "name": medication["name"],
+            "generic_name": medication.get("generic_name"),
+            "drug_class": medication.get("drug_class"),
+            # Пустой список остается пустым списком, как в карточке препарата
+            "available_dosages": None if dosages is None else parse_json_list(dosages),
+        }
+
+    def build(self, medications: Iterable[Dict[str, Any]]) -> None:
+        """Полная сборка индекса по каталогу"""
+        documents = [self._document(m) for m in medications if m.get("is_active", True)]
+        postings: List[Dict[str, List[int]]] = [{} for _ in FIELD_WEIGHTS]
+        sizes = np.zeros((len(FIELD_WEIGHTS), max(16, len(documents))), dtype=np.float32)
+        for slot, (keys, _) in enumerate(documents):
+            for field, key in enumerate(keys):
+                grams = trigrams(key)
+                sizes[field, slot] = len(grams)
+                for gram in grams:
+                    postings[field].setdefault(gram, []).append(slot)
+        tables = _TrigramTables(
+            slots={result["id"]: slot for slot, (_, result) in enumerate(documents)},
+            keys=[keys for keys, _ in documents],
+            results=[result for _, result in documents],
+            sizes=sizes,
+            postings=[
+                {gram: np.array(slots, dtype=np.int32) for gram, slots in field.items()}
+                for field in postings
+            ],
+        )
+        with self._lock:
+            self._tables = tables
+
+    def update_medications(self, medications: Iterable[Dict[str, Any]]) -> None:
+        """Инкрементальное обновление пачки препаратов: меняются только затронутые списки вхождений"""
+        with self._lock:
+            current = self._tables
+            # Копируются контейнеры, а не массивы вхождений: измененный список заменяется новым массивом
+            tables = _TrigramTables(
+                dict(current.slots), list(current.keys), list(current.results),
+                current.sizes.copy(), [dict(postings) for postings in current.postings],
+            )
+            for medication in medications:
+                tables = self._apply(tables, medication)
+            self._tables = tables
+
+    def _apply(self, tables: _TrigramTables, medication: Dict[str, Any]) -> _TrigramTables:
+        active = medication.get("is_active", True)
+        keys, result = self._document(medication) if active else (("",) * len(FIELD_WEIGHTS), None)
+        slot = tables.slots.get(medication["id"])
+        if slot is None:
+            if result is None:
+                return tables
+            slot = len(tables.results)
+            if slot >= tables.sizes.shape[1]:
+                sizes = np.zeros((len(FIELD_WEIGHTS), tables.sizes.shape[1] * 2), dtype=np.float32)
+                sizes[:, :slot] = tables.sizes[:, :slot]
+                tables = tables._replace(sizes=sizes)
+            tables.keys.append(keys)
+            tables.results.append(None)
+            tables.slots[medication["id"]] = slot
+        old_keys = tables.keys[slot]
+        for field, postings in enumerate(tables.postings):
+            old_grams = trigrams(old_keys[field]) if tables.results[slot] is not None else frozenset()
+            new_grams = trigrams(keys[field])
+            for gram in new_grams - old_grams:
+                posting = postings.get(gram)
+                postings[gram] = np.array([slot], dtype=np.int32) if posting is None else np.append(posting, slot)
+            for gram in old_grams - new_grams:
+                posting = postings[gram]
+                posting = posting[posting != slot]
+                if len(posting):
+                    postings[gram] = posting
+                else:
+                    del postings[gram]
+            tables.sizes[field, slot] = len(new_grams)
+        tables.keys[slot] = keys
+        tables.results[slot] = result
+        return tables
+
+    def update_medication(self, medication: Dict[str, Any]) -> None:
+        self.update_medications([medication])
+
+    def remove_medication(self, medication_id: int) -> None:
+        self.update_medications([{"id": medication_id, "name": "", "is_active": False}])
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Ранжированный поиск с допуском опечаток"""
+        key = fold(query)
+        if not key:
+            return []
+        grams = trigrams(key, prefix=True)
+        need = max(1, math.ceil(len(grams) * MIN_SIMILARITY))
+        tables = self._tables
+        sizes, keys, results = tables.sizes, tables.keys, tables.results
+        capacity = sizes.shape[1]
+
+        # Векторная оценка: коэффициент Дайса по триграммам для каждого поля
+        scores = np.zeros(capacity, dtype=np.float32)
+        found = np.empty(0, dtype=np.int64)
+        for field, (weight, postings) in enumerate(zip(FIELD_WEIGHTS, tables.postings)):
+            lists = [postings[gram] for gram in grams if gram in postings]
+            if not lists:
+                continue
+            counts = np.bincount(np.concatenate(lists), minlength=capacity)[:capacity]
+            candidates = np.flatnonzero(counts >= need)
+            matched = counts[candidates]
+            # Все триграммы запроса, включая начало слова, - почти наверняка префикс
+            field_scores = (2.0 * matched / (len(grams) + sizes[field, candidates]) + (matched == len(grams))) * weight
+            scores[candidates] = np.maximum(scores[candidates], field_scores)
+            found = np.union1d(found, candidates)
+
+        if len(found) > limit * RERANK_FACTOR:
+            top = np.argpartition(-scores[found], limit * RERANK_FACTOR)[:limit * RERANK_FACTOR]
+            found = found[top]
+
+        # Точное переранжирование немногих кандидатов: префикс и вхождение подстроки
+        ranked = []
+        for slot in found.tolist():
+            result = results[slot] if slot < len(results) else None
+            if result is None:
+                continue
+            score = float(scores[slot])
+            for weight, field_key in zip(FIELD_WEIGHTS, keys[slot]):
+                if field_key.startswith(key):
+                    score += 0.5 * weight
+                    break
+                if key in field_key:
+                    score += 0.25 * weight
+                    break
+            ranked.append((-score, len(keys[slot][0]), result["id"], result))
+        ranked.sort(key=lambda item: item[:3])
+        return [item[3] for item in ranked[:limit]]
+
+
+medication_search_index = TrigramIndex()
@@ -0,0 +1,115 @@
+"""Бенчмарк индекса лекарственных взаимодействий.
+
+Синтетический каталог: 10k препаратов и 1M пар взаимодействий. Сравнивается
+проверка через InteractionIndex и «наивный» путь - разбор drug_interactions
+каждого препарата каталога на каждый запрос.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_interactions [--drugs 10000] [--pairs 1000000]
+"""
+import argparse
+import json
+import random
+import resource
+import time
+
+from app.services.interactions import InteractionIndex, normalize_name
+
+SEVERITIES = ["низкий", "средний", "высокий"]
+
+
+def generate_catalog(drugs: int, pairs: int, seed: int = 42):
+    rng = random.Random(seed)
+    keys = set()
+    while len(keys) < pairs:
+        a, b = rng.randrange(drugs), rng.randrange(drugs)
+        if a != b:
+            keys.add((min(a, b), max(a, b)))
+    declared = [[] for _ in range(drugs)]
+    for a, b in keys:
+        declared[a].append({
+            "medication": f"Препарат-{b}",
+            "severity": SEVERITIES[(a + b) % 3],
+            "description": "Синтетическое взаимодействие",
+            "management": "Контроль",
+        })
+    return [
+        {
+            "id": i + 1,
+            "name": f"Препарат-{i}",
+            "generic_name": f"Drug-{i}",
+            # В таблице medications взаимодействия лежат JSON-строкой
+            "drug_interactions": json.dumps(declared[i], ensure_ascii=False),
+            "is_active": True,
+        }
+        for i in range(drugs)
+    ]
+
+
+def naive_check(catalog, names):
+    wanted = {normalize_name(n) for n in names}
+    found = []
+    for medication in catalog:
+        interactions = json.loads(medication["drug_interactions"] or "[]")
+        if normalize_name(medication["name"]) not in wanted:
+            continue
+        for item in interactions:
+            if normalize_name(item["medication"]) in wanted:
+                found.append((medication["name"], item["medication"], item["severity"]))
+    return found
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drugs", type=int, default=10_000)
+    parser.add_argument("--pairs", type=int, default=1_000_000)
+    parser.add_argument("--k", type=int, default=12, help="препаратов в одной проверке")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    catalog = generate_catalog(args.drugs, args.pairs)
+    print(f"catalog: {args.drugs} drugs, {args.pairs} pairs, generated in {time.perf_counter() - started:.1f}s")
+
+    index = InteractionIndex()
+    started = time.perf_counter()
+    index.build(catalog)
+    print(f"build: {time.perf_counter() - started:.2f}s, {len(index)} pairs, "
+          f"maxrss {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} MB")
+
+    rng = random.Random(7)
+    batches = [
+        [{"name": f"Препарат-{rng.randrange(args.drugs)}"} for _ in range(args.k)]
+        for _ in range(args.requests)
+    ]
+    samples = []
+    for batch in batches:
+        started = time.perf_counter()
+        index.check(batch)
+        samples.append(time.perf_counter() - started)
+    print(f"index check k={args.k}: p50 {percentile(samples, 0.5) * 1e6:.1f}us "
+          f"p99 {percentile(samples, 0.99) * 1e6:.1f}us")
+
+    samples = []
+    for medication in rng.sample(catalog, 200):
+        started = time.perf_counter()
+        index.update_medication(medication)
+        samples.append(time.perf_counter() - started)
+    print(f"incremental update: p50 {percentile(samples, 0.5) * 1e6:.1f}us "
+          f"p99 {percentile(samples, 0.99) * 1e6:.1f}us")
+
+    samples = []
+    for batch in batches[:5]:
+        started = time.perf_counter()
+        naive_check(catalog, [m["name"] for m in batch])
+        samples.append(time.perf_counter() - started)
+    print(f"naive catalog scan k={args.k}: mean {sum(samples) / len(samples) * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
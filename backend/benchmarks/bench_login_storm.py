@@ -0,0 +1,119 @@
+"""Бенчмарк «массового входа»: задержка обычных эндпоинтов во время шторма логинов.
+
+Фоном идут --logins одновременных POST /auth/login (bcrypt стоимости
+BCRYPT_ROUNDS), параллельно последовательный зонд GET /medications/search
+по каталогу в памяти. Сравниваются хеширование в пуле потоков (workers=0)
+и в отдельном пуле процессов с ограниченной очередью (лишние входы - 503).
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_login_storm [--logins 200] [--workers 2] [--max-pending 16]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import insert, text
+
+from benchmarks.bench_search import generate_catalog, percentile
+
+PROBE_QUERIES = ["Варфарин", "амлодип", "bisoprolol", "Кло", "Розувастатин"]
+
+
+async def probe(client, stop: asyncio.Event, latencies: list):
+    i = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/api/v1/medications/search", params={"q": PROBE_QUERIES[i % len(PROBE_QUERIES)]})
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+        i += 1
+        await asyncio.sleep(0.005)
+
+
+async def storm(client, logins: int, users: int):
+    async def login(i):
+        response = await client.post(
+            "/api/v1/auth/login", data={"username": f"doctor{i % users}@medai.com", "password": "secret"}
+        )
+        return response.status_code
+
+    return await asyncio.gather(*(login(i) for i in range(logins)))
+
+
+async def run(asgi_app, logins: int, users: int, baseline_seconds: float):
+    transport = httpx.ASGITransport(app=asgi_app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        idle, loaded = [], []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, idle))
+        await asyncio.sleep(baseline_seconds)
+        stop.set()
+        await task
+
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, stop, loaded))
+        started = time.perf_counter()
+        statuses = await storm(client, logins, users)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await task
+    return idle, loaded, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="sqlite:///./bench_login.db")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+
+    os.environ.update({"MOCK_MODE": "false", "DATABASE_URL": args.url, "BCRYPT_ROUNDS": str(args.rounds)})
+    from app.core.security import get_password_hash, password_hasher
+    from app.db.database import dispose_async_engine, engine
+    from app.main import app
+    from app.models.user import User
+    from app.services.search import medication_search_index
+
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", args.url)
+    command.upgrade(config, "head")
+    hashed = get_password_hash("secret")
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM users"))
+        connection.execute(insert(User.__table__), [
+            {"email": f"doctor{i}@medai.com", "hashed_password": hashed} for i in range(args.users)
+        ])
+    medication_search_index.build(generate_catalog(20_000))
+
+    print(f"{args.logins} logins, bcrypt rounds {args.rounds}, cpu {os.cpu_count()}")
+    print(f"{'mode':<28} {'idle p50':>9} {'idle p99':>9} {'storm p50':>10} {'storm p99':>10} {'ok':>5} {'503':>5} {'time':>7}")
+    modes = (
+        ("threadpool", 0, args.logins),
+        (f"process pool x{args.workers}, queue {args.max_pending}", args.workers, args.max_pending),
+    )
+    for label, workers, max_pending in modes:
+        password_hasher.shutdown()
+        password_hasher.workers, password_hasher.max_pending = workers, max_pending
+
+        async def measure():
+            try:
+                return await run(app, args.logins, args.users, baseline_seconds=1.0)
+            finally:
+                await dispose_async_engine()
+
+        idle, loaded, statuses, elapsed = asyncio.run(measure())
+        print(f"{label:<28} {percentile(idle, 0.5) * 1e3:7.1f}ms {percentile(idle, 0.99) * 1e3:7.1f}ms"
+              f" {percentile(loaded, 0.5) * 1e3:8.1f}ms {percentile(loaded, 0.99) * 1e3:8.1f}ms"
+              f" {statuses.count(200):>5} {statuses.count(503):>5} {elapsed:6.1f}s")
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
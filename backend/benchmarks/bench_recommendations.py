@@ -0,0 +1,128 @@
+"""Бенчмарк движка рекомендаций: матричная оценка каталога против цикла по парам.
+
+--patients синтетических пациентов (возраст, вес, креатинин, диагнозы,
+текущая терапия, аллергии) и каталог из --catalog препаратов с показаниями,
+противопоказаниями и взаимодействиями. Матричный путь - RecommendationEngine
+.top_candidates (кусками по --chunk пациентов), эталон - те же правила в цикле
+Python по каждой паре пациент/препарат на --naive-patients пациентах
+с экстраполяцией на всю выборку.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_recommendations [--patients 10000] [--catalog 2000]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.services.interactions import normalize_name
+from app.services.recommendations import CONDITION_CODES, CONDITIONS, NUMERIC_FEATURES, RecommendationEngine, encode_patients
+from benchmarks.bench_search import generate_catalog
+
+ANTICOAGULANTS = ["Варфарин", "Апиксабан", "Ривароксабан", "Дабигатран", "Эдоксабан"]
+CONDITION_TEXTS = [stems[0].capitalize() for stems in CONDITIONS.values()]
+
+
+def build_catalog(size: int, seed: int = 42):
+    rng = random.Random(seed)
+    catalog = generate_catalog(size, seed)
+    for i, medication in enumerate(catalog):
+        if i < len(ANTICOAGULANTS):
+            medication.update(name=ANTICOAGULANTS[i], generic_name=ANTICOAGULANTS[i], drug_class="Антикоагулянты")
+        medication["indications"] = rng.sample(CONDITION_TEXTS, 2)
+        medication["contraindications"] = rng.sample(CONDITION_TEXTS, 2)
+        medication["drug_interactions"] = [
+            {"medication": rng.choice(catalog)["name"], "severity": rng.choice(["низкий", "средний", "высокий"])}
+            for _ in range(rng.randint(0, 4))
+        ]
+    return catalog
+
+
+def build_patients(count: int, catalog, seed: int = 7):
+    rng = random.Random(seed)
+    return [{
+        "age": rng.randint(30, 95),
+        "weight": rng.randint(45, 120),
+        "gender": rng.choice(["male", "female"]),
+        "diagnosis": rng.choice(CONDITION_TEXTS),
+        "comorbidities": rng.sample(CONDITION_TEXTS, rng.randint(0, 3)),
+        "lab_results": {"Креатинин": f"{rng.randint(60, 250)} мкмоль/л"},
+        "current_medications": [{"name": rng.choice(catalog)["name"]} for _ in range(rng.randint(0, 4))],
+        "allergies": [{"allergen": rng.choice(catalog)["name"]} for _ in range(rng.randint(0, 1))],
+    } for _ in range(count)]
+
+
+def naive_top(engine: RecommendationEngine, patients, top_k: int):
+    """Те же правила (без весов кровотечения и дозирования) - в цикле Python по парам"""
+    catalog = engine._ensure_compiled()
+    medications = catalog.medications
+    contraindications = [set(np.flatnonzero(row)) for row in catalog.contraindications]
+    indications = [set(np.flatnonzero(row)) for row in catalog.indications]
+    names = [{normalize_name(m["name"]), normalize_name(m.get("generic_name") or "")} for m in medications]
+    encoded = encode_patients(patients)
+    results = []
+    for features, current, allergens in zip(*encoded):
+        conditions = set(np.flatnonzero(features[len(NUMERIC_FEATURES):]))
+        current = {normalize_name(name) for name in current}
+        allergens = {normalize_name(name) for name in allergens}
+        scored = []
+        for c, medication in enumerate(medications):
+            if conditions & contraindications[c] or names[c] & allergens:
+                continue
+            rank = 0
+            for name in current:
+                term = catalog.vocabulary.get(name)
+                if term is not None:
+                    rank = max(rank, int(catalog.interaction_ranks[c, term]))
+            score = min(len(conditions & indications[c]), 2) - 0.8 * min(rank, 3) - 0.5 * bool(names[c] & current)
+            scored.append((score, c))
+        scored.sort(reverse=True)
+        results.append([c for _, c in scored[:top_k]])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--catalog", type=int, default=2_000)
+    parser.add_argument("--chunk", type=int, default=2048)
+    parser.add_argument("--naive-patients", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.catalog)
+    patients = build_patients(args.patients, catalog)
+    engine = RecommendationEngine()
+    started = time.perf_counter()
+    engine.build(catalog)
+    engine._ensure_compiled()
+    compile_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    encode_patients(patients)
+    encode_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine.top_candidates(patients, top_k=3, chunk_size=args.chunk)
+    matrix_time = time.perf_counter() - started
+
+    sample = patients[:args.naive_patients]
+    started = time.perf_counter()
+    naive_top(engine, sample, top_k=3)
+    naive_time = (time.perf_counter() - started) * len(patients) / max(1, len(sample))
+
+    started = time.perf_counter()
+    for patient in patients[:100]:
+        engine.recommend(patient)
+    single_time = (time.perf_counter() - started) / 100
+
+    print(f"{args.patients} patients x {args.catalog} medications, {len(CONDITION_CODES)} conditions")
+    print(f"catalog compile          {compile_time * 1e3:10.1f}ms")
+    print(f"encode patients          {encode_time:10.2f}s")
+    print(f"matrix scoring (+encode) {matrix_time:10.2f}s")
+    print(f"python loop (estimated)  {naive_time:10.2f}s   x{naive_time / matrix_time:.0f}")
+    print(f"single recommend()       {single_time * 1e3:10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
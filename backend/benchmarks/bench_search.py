@@ -0,0 +1,105 @@
+"""Бенчмарк триграммного поиска по каталогу препаратов.
+
+Синтетический каталог на 100k торговых названий (кириллица) с международными
+названиями (латиница). Запросы: префиксы, опечатки, латинский ввод и короткие
+префиксы из 1-2 букв. Для сравнения - линейный проход как в прежнем мок-режиме.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_search [--size 100000]
+"""
+import argparse
+import random
+import time
+
+from app.services.search import TrigramIndex
+
+PREFIXES = ["Амло", "Бисо", "Вар", "Гепа", "Дабига", "Эно", "Кло", "Лоза", "Мета", "Небив",
+            "Пера", "Рива", "Сима", "Тика", "Фуро", "Цефа", "Апи", "Ато", "Розу", "Кандe"]
+MIDDLES = ["про", "ли", "кса", "ди", "ма", "фе", "то", "ре", "ни", "за", "во", "бе", "ту", "ра"]
+SUFFIXES = ["пин", "лол", "фарин", "рин", "тран", "парин", "пидогрел", "ртан", "ксабан",
+            "статин", "семид", "золин", "мин", "грел", "прил"]
+LATIN = {"а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "з": "z", "и": "i",
+         "к": "c", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s",
+         "т": "t", "у": "u", "ф": "ph", "ц": "c", "э": "e", "e": "e"}
+
+
+def generate_catalog(size: int, seed: int = 42):
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(size):
+        name = rng.choice(PREFIXES) + "".join(rng.choice(MIDDLES) for _ in range(rng.randint(0, 2)))
+        name += rng.choice(SUFFIXES)
+        generic = "".join(LATIN.get(ch, ch) for ch in name.lower())
+        catalog.append({
+            "id": i + 1,
+            "name": f"{name} {rng.choice(['', 'Ретард', 'Форте', 'Тева', 'Канон'])}".strip(),
+            "generic_name": generic,
+            "drug_class": "Синтетический",
+            "available_dosages": ["5 мг"],
+            "is_active": True,
+        })
+    return catalog
+
+
+def make_queries(catalog, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    queries = {"prefix": [], "typo": [], "latin": [], "short": []}
+    for _ in range(count):
+        med = rng.choice(catalog)
+        name = med["name"].split()[0]
+        queries["prefix"].append(name[:rng.randint(3, len(name))])
+        pos = rng.randrange(1, len(name) - 1)
+        queries["typo"].append(name[:pos] + name[pos + 1:])
+        queries["latin"].append(med["generic_name"][:rng.randint(4, len(med["generic_name"]))])
+        queries["short"].append(name[:rng.randint(1, 2)])
+    return queries
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    catalog = generate_catalog(args.size)
+    index = TrigramIndex()
+    started = time.perf_counter()
+    index.build(catalog)
+    print(f"build: {len(index)} medications in {time.perf_counter() - started:.2f}s")
+
+    everything = []
+    for kind, queries in make_queries(catalog, args.queries).items():
+        samples = []
+        hits = 0
+        for query in queries:
+            started = time.perf_counter()
+            results = index.search(query, 10)
+            samples.append(time.perf_counter() - started)
+            hits += bool(results)
+        everything.extend(samples)
+        print(f"{kind:>6}: p50 {percentile(samples, 0.5) * 1e3:.2f}ms p99 {percentile(samples, 0.99) * 1e3:.2f}ms "
+              f"non-empty {hits * 100 // len(queries)}%")
+    print(f"   all: p50 {percentile(everything, 0.5) * 1e3:.2f}ms p99 {percentile(everything, 0.99) * 1e3:.2f}ms")
+
+    samples = []
+    for medication in random.Random(1).sample(catalog, 200):
+        started = time.perf_counter()
+        index.update_medication(dict(medication, name=medication["name"] + " Н"))
+        samples.append(time.perf_counter() - started)
+    print(f"update: p50 {percentile(samples, 0.5) * 1e3:.2f}ms p99 {percentile(samples, 0.99) * 1e3:.2f}ms")
+
+    # Прежний путь: подстрока по всему списку на каждый запрос
+    started = time.perf_counter()
+    for query in make_queries(catalog, 20)["prefix"]:
+        q = query.lower()
+        [m for m in catalog if q in m["name"].lower()][:10]
+    print(f" naive: mean {(time.perf_counter() - started) / 20 * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Бенчмарк сериализации списков пациентов и назначений.
+
+Для страниц из --sizes элементов сравниваются:
+
+- response_model - путь FastAPI для эндпоинта, который возвращает схемы:
+  повторная валидация по response_model, jsonable_encoder и json.dumps
+  (JSONResponse) или orjson (ORJSONResponse);
+- schema_response - app.core.responses: байты из TypeAdapter.dump_json
+  без второй валидации;
+- ORM - от строк ORM: model_validate в репозитории и затем response_model
+  против одной валидации from_attributes и schema_response.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_serialization [--sizes 100 1000] [--repeat 50]
+"""
+import argparse
+import asyncio
+import gc
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from pydantic import TypeAdapter
+
+from app.core.responses import schema_response
+from app.models.patient import Patient as PatientRow
+from app.models.prescription import Prescription as PrescriptionRow
+from app.schemas.patient import Patient as PatientSchema
+from app.schemas.prescription import Prescription as PrescriptionSchema
+from benchmarks.bench_search import percentile
+
+MEDICATIONS = ["Варфарин", "Апиксабан", "Ривароксабан", "Дабигатран", "Бисопролол", "Аторвастатин", "Метформин"]
+CONDITIONS = ["Фибрилляция предсердий", "Артериальная гипертензия", "Сахарный диабет 2 типа", "ХСН"]
+
+
+def build_patients(count: int, rng: random.Random) -> List[dict]:
+    created = datetime(2024, 1, 1)
+    return [{
+        "id": i + 1,
+        "doctor_id": 1,
+        "full_name": f"Пациент {i + 1}",
+        "age": rng.randint(18, 95),
+        "gender": rng.choice(["male", "female"]),
+        "weight": float(rng.randint(45, 120)),
+        "height": float(rng.randint(150, 195)),
+        "phone": f"+7 900 {i:07d}",
+        "email": f"patient{i}@example.com",
+        "diagnosis": rng.choice(CONDITIONS),
+        "comorbidities": rng.sample(CONDITIONS, 2),
+        "lab_results": {"Креатинин": f"{rng.randint(60, 250)} мкмоль/л", "МНО": round(rng.uniform(0.9, 3.5), 1)},
+        "current_medications": [{"name": name, "dosage": "5 мг"} for name in rng.sample(MEDICATIONS, 3)],
+        "allergies": [{"allergen": rng.choice(MEDICATIONS), "reaction": "сыпь"}],
+        "previous_anticoagulants": [],
+        "created_at": created + timedelta(minutes=i),
+        "updated_at": None,
+    } for i in range(count)]
+
+
+def build_prescriptions(count: int, rng: random.Random) -> List[dict]:
+    created = datetime(2024, 1, 1)
+    return [{
+        "id": i + 1,
+        "patient_id": i + 1,
+        "doctor_id": 1,
+        "recommended_medications": [{"id": 1, "name": rng.choice(MEDICATIONS), "score": 0.9}],
+        "dosage": {"amount": "5 мг", "frequency": "2 раза в день"},
+        "duration": "3 месяца",
+        "instructions": "Контроль МНО еженедельно",
+        "status": "active",
+        "is_ai_generated": True,
+        "ai_recommendations": {"risk": "средний", "score": 0.82},
+        "justification": "Высокий риск инсульта по CHA2DS2-VASc",
+        "alternative_options": [{"name": name} for name in rng.sample(MEDICATIONS, 2)],
+        "warnings": ["Взаимодействие с НПВП"],
+        "monitoring_plan": [{"parameter": "МНО", "frequency": "еженедельно"}],
+        "created_at": created + timedelta(minutes=i),
+        "updated_at": None,
+    } for i in range(count)]
+
+
+def measure(repeat: int, call) -> float:
+    """Медиана времени одного вызова, мс (сборщик мусора отключен, как в timeit)"""
+    samples = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - started) * 1e3)
+    finally:
+        gc.enable()
+    return percentile(samples, 50)
+
+
+def bench(name: str, schema, row_class, rows: List[dict], repeat: int) -> None:
+    adapter = TypeAdapter(List[schema])
+    field = create_response_field(name=f"Response_{name}", type_=List[schema])
+    items = [schema(**row) for row in rows]
+    orm_rows = [row_class(**row) for row in rows]
+
+    loop = asyncio.new_event_loop()
+
+    def response_model(content, response_class):
+        # Как fastapi.routing: валидация по response_model, затем рендер классом ответа
+        content = loop.run_until_complete(serialize_response(field=field, response_content=content, is_coroutine=True))
+        return response_class(content).body
+
+    results = {
+        "response_model + JSONResponse": measure(repeat, lambda: response_model(items, JSONResponse)),
+        "response_model + ORJSONResponse": measure(repeat, lambda: response_model(items, ORJSONResponse)),
+        "schema_response": measure(repeat, lambda: schema_response(adapter, items).body),
+        # От строк ORM: model_validate в репозитории + ответ эндпоинта
+        "ORM: model_validate + response_model": measure(
+            repeat, lambda: response_model([schema.model_validate(row) for row in orm_rows], JSONResponse)
+        ),
+        "ORM: from_attributes + schema_response": measure(
+            repeat, lambda: schema_response(adapter, adapter.validate_python(orm_rows, from_attributes=True)).body
+        ),
+    }
+    loop.close()
+    assert schema_response(adapter, items).body == schema_response(
+        adapter, adapter.validate_python(orm_rows, from_attributes=True)
+    ).body
+    baseline = results["response_model + JSONResponse"]
+    print(f"{name}, {len(rows)} items")
+    for label, elapsed in results.items():
+        print(f"  {label:<40} {elapsed:8.2f}ms  x{baseline / elapsed:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    for size in args.sizes:
+        bench("patients", PatientSchema, PatientRow, build_patients(size, rng), args.repeat)
+        bench("prescriptions", PrescriptionSchema, PrescriptionRow, build_prescriptions(size, rng), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+"""Синтетические данные для бенчмарков и нагрузочных тестов.
+
+Врачи, каталог препаратов с графом взаимодействий, пациенты с
+сопутствующими заболеваниями (частота растет с возрастом, связанные
+болезни встречаются вместе), анализами и терапией по заболеваниям,
+аллергиями и назначениями. Генерация детерминирована: один seed и одни
+размеры дают те же строки в том же порядке на любой машине, поэтому
+прогоны разных коммитов сравнимы. Пациенты выдаются потоком пачками -
+1M пациентов генератор целиком в памяти не держит.
+
+Загрузка - в хранилище моков (load_memory) или в БД по схеме миграций
+(load_sql; SQLite или MySQL), запуск из каталога backend:
+    python -m benchmarks.datagen --url sqlite:///./bench.db --patients 1000000
+    python -m benchmarks.datagen --stats --patients 1000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from benchmarks.bench_search import LATIN, MIDDLES, PREFIXES, SUFFIXES
+
+BENCH_PASSWORD = "bench-password"
+# Точка отсчета дат: от datetime.now() строки менялись бы от прогона к прогону
+EPOCH = datetime(2024, 1, 1)
+
+
+class Drug(NamedTuple):
+    name: str
+    generic_name: str
+    drug_class: str
+    dosages: Tuple[str, ...]
+    frequency: str
+
+
+DRUGS = [
+    Drug("Варфарин", "Warfarin", "Антикоагулянты", ("2.5 мг", "5 мг"), "1 раз в день"),
+    Drug("Апиксабан", "Apixaban", "Антикоагулянты", ("2.5 мг", "5 мг"), "2 раза в день"),
+    Drug("Ривароксабан", "Rivaroxaban", "Антикоагулянты", ("15 мг", "20 мг"), "1 раз в день"),
+    Drug("Дабигатран", "Dabigatran", "Антикоагулянты", ("110 мг", "150 мг"), "2 раза в день"),
+    Drug("Аспирин", "Acetylsalicylic acid", "Антиагреганты", ("75 мг", "100 мг"), "1 раз в день"),
+    Drug("Клопидогрел", "Clopidogrel", "Антиагреганты", ("75 мг",), "1 раз в день"),
+    Drug("Амлодипин", "Amlodipine", "Блокаторы кальциевых каналов", ("5 мг", "10 мг"), "1 раз в день"),
+    Drug("Лизиноприл", "Lisinopril", "Ингибиторы АПФ", ("5 мг", "10 мг", "20 мг"), "1 раз в день"),
+    Drug("Лозартан", "Losartan", "Антагонисты рецепторов ангиотензина", ("50 мг", "100 мг"), "1 раз в день"),
+    Drug("Бисопролол", "Bisoprolol", "Бета-блокаторы", ("2.5 мг", "5 мг", "10 мг"), "1 раз в день"),
+    Drug("Метопролол", "Metoprolol", "Бета-блокаторы", ("25 мг", "50 мг"), "2 раза в день"),
+    Drug("Аторвастатин", "Atorvastatin", "Статины", ("20 мг", "40 мг"), "1 раз в день"),
+    Drug("Розувастатин", "Rosuvastatin", "Статины", ("10 мг", "20 мг"), "1 раз в день"),
+    Drug("Метформин", "Metformin", "Бигуаниды", ("500 мг", "850 мг", "1000 мг"), "2 раза в день"),
+    Drug("Гликлазид", "Gliclazide", "Производные сульфонилмочевины", ("30 мг", "60 мг"), "1 раз в день"),
+    Drug("Фуросемид", "Furosemide", "Диуретики", ("40 мг",), "1 раз в день"),
+    Drug("Спиронолактон", "Spironolactone", "Диуретики", ("25 мг", "50 мг"), "1 раз в день"),
+    Drug("Дигоксин", "Digoxin", "Сердечные гликозиды", ("0.25 мг",), "1 раз в день"),
+    Drug("Амиодарон", "Amiodarone", "Антиаритмики", ("200 мг",), "1 раз в день"),
+    Drug("Омепразол", "Omeprazole", "Ингибиторы протонной помпы", ("20 мг",), "1 раз в день"),
+    Drug("Ибупрофен", "Ibuprofen", "НПВС", ("200 мг", "400 мг"), "3 раза в день"),
+    Drug("Диклофенак", "Diclofenac", "НПВС", ("50 мг",), "2 раза в день"),
+    Drug("Левотироксин", "Levothyroxine", "Гормоны щитовидной железы", ("50 мкг", "100 мкг"), "1 раз в день"),
+    Drug("Кларитромицин", "Clarithromycin", "Макролиды", ("500 мг",), "2 раза в день"),
+    Drug("Флуконазол", "Fluconazole", "Противогрибковые", ("150 мг",), "1 раз в день"),
+    Drug("Метотрексат", "Methotrexate", "Цитостатики", ("2.5 мг",), "1 раз в неделю"),
+]
+
+# Известные взаимодействия основного каталога: (препарат, препарат, тяжесть, описание, тактика)
+KNOWN_INTERACTIONS = [
+    ("Варфарин", "Аспирин", "высокий", "Усиление антикоагулянтного эффекта, риск кровотечения", "Контроль МНО"),
+    ("Варфарин", "Клопидогрел", "высокий", "Риск кровотечения", "Избегать сочетания"),
+    ("Варфарин", "Ибупрофен", "высокий", "Риск ЖКТ-кровотечения", "Заменить НПВС"),
+    ("Варфарин", "Диклофенак", "высокий", "Риск ЖКТ-кровотечения", "Заменить НПВС"),
+    ("Варфарин", "Амиодарон", "высокий", "Рост МНО", "Снизить дозу варфарина, контроль МНО"),
+    ("Варфарин", "Флуконазол", "высокий", "Рост МНО", "Контроль МНО"),
+    ("Варфарин", "Кларитромицин", "средний", "Рост МНО", "Контроль МНО"),
+    ("Варфарин", "Омепразол", "низкий", "Незначительный рост МНО", "Контроль МНО"),
+    ("Апиксабан", "Аспирин", "высокий", "Риск кровотечения", "Оценить необходимость антиагреганта"),
+    ("Апиксабан", "Кларитромицин", "средний", "Рост концентрации апиксабана", "Контроль кровотечений"),
+    ("Ривароксабан", "Аспирин", "высокий", "Риск кровотечения", "Оценить необходимость антиагреганта"),
+    ("Ривароксабан", "Кларитромицин", "средний", "Рост концентрации ривароксабана", "Контроль кровотечений"),
+    ("Дабигатран", "Амиодарон", "средний", "Рост концентрации дабигатрана", "Снизить дозу"),
+    ("Дабигатран", "Аспирин", "высокий", "Риск кровотечения", "Оценить необходимость антиагреганта"),
+    ("Клопидогрел", "Омепразол", "средний", "Снижение антиагрегантного эффекта", "Заменить на пантопразол"),
+    ("Аспирин", "Ибупрофен", "средний", "Снижение кардиопротекции аспирина", "Разнести прием"),
+    ("Аспирин", "Метотрексат", "высокий", "Усиление токсичности метотрексата", "Снизить дозу"),
+    ("Лизиноприл", "Спиронолактон", "высокий", "Гиперкалиемия", "Контроль калия"),
+    ("Лозартан", "Спиронолактон", "высокий", "Гиперкалиемия", "Контроль калия"),
+    ("Дигоксин", "Амиодарон", "высокий", "Рост концентрации дигоксина", "Снизить дозу дигоксина вдвое"),
+    ("Дигоксин", "Кларитромицин", "средний", "Рост концентрации дигоксина", "Контроль концентрации"),
+    ("Дигоксин", "Фуросемид", "средний", "Гипокалиемия усиливает токсичность", "Контроль калия"),
+    ("Аторвастатин", "Кларитромицин", "высокий", "Риск миопатии", "Приостановить статин"),
+    ("Аторвастатин", "Амиодарон", "средний", "Риск миопатии", "Не более 40 мг аторвастатина"),
+    ("Метформин", "Фуросемид", "низкий", "Рост концентрации метформина", "Контроль функции почек"),
+    ("Бисопролол", "Амиодарон", "средний", "Брадикардия", "Контроль ЧСС"),
+    ("Метопролол", "Амиодарон", "средний", "Брадикардия", "Контроль ЧСС"),
+    ("Лизиноприл", "Ибупрофен", "средний", "Снижение гипотензивного эффекта, риск ОПП", "Контроль креатинина"),
+]
+SEVERITIES = ("низкий", "средний", "высокий")
+
+
+class Condition(NamedTuple):
+    base_rate: float  # доля у пациентов 40 лет
+    rate_per_decade: float  # прирост доли за каждые 10 лет сверх 40
+    drugs: Tuple[str, ...]  # препараты лечения, пациент получает 1-2 из них
+    labs: Tuple[str, ...]  # анализы, отклоняющиеся от нормы при заболевании
+
+
+# Порядок важен: заболевание вероятнее вдвое, если у пациента уже есть связанное из CONDITION_LINKS
+CONDITIONS = {
+    "Гипертония": Condition(0.25, 0.08, ("Амлодипин", "Лизиноприл", "Лозартан", "Бисопролол"), ("АД", "ЧСС")),
+    "Гиперлипидемия": Condition(0.15, 0.04, ("Аторвастатин", "Розувастатин"), ("ЛПНП", "Холестерин")),
+    "Сахарный диабет 2 типа": Condition(0.07, 0.03, ("Метформин", "Гликлазид"), ("Глюкоза", "HbA1c")),
+    "ИБС": Condition(0.04, 0.04, ("Аспирин", "Клопидогрел", "Аторвастатин", "Метопролол"), ("ЛПНП",)),
+    "Фибрилляция предсердий": Condition(0.01, 0.03, ("Варфарин", "Апиксабан", "Ривароксабан", "Дабигатран"), ("МНО", "ЧСС")),
+    "Хроническая сердечная недостаточность": Condition(0.01, 0.03, ("Фуросемид", "Спиронолактон", "Дигоксин", "Бисопролол"), ("NT-proBNP", "Калий")),
+    "Хроническая болезнь почек": Condition(0.03, 0.03, (), ("Креатинин", "СКФ", "Калий")),
+    "ГЭРБ": Condition(0.08, 0.01, ("Омепразол",), ()),
+    "Остеоартрит": Condition(0.04, 0.05, ("Ибупрофен", "Диклофенак"), ("СОЭ",)),
+    "Гипотиреоз": Condition(0.03, 0.01, ("Левотироксин",), ("ТТГ",)),
+}
+CONDITION_LINKS = {
+    "Гиперлипидемия": ("Гипертония",),
+    "Сахарный диабет 2 типа": ("Гипертония", "Гиперлипидемия"),
+    "ИБС": ("Гипертония", "Гиперлипидемия", "Сахарный диабет 2 типа"),
+    "Фибрилляция предсердий": ("Гипертония", "ИБС"),
+    "Хроническая сердечная недостаточность": ("ИБС", "Фибрилляция предсердий"),
+    "Хроническая болезнь почек": ("Гипертония", "Сахарный диабет 2 типа"),
+}
+# Анализ -> (норма, отклонение при заболевании): функции от rng
+LABS = {
+    "АД": (lambda rng: f"{rng.randint(110, 135)}/{rng.randint(70, 85)}", lambda rng: f"{rng.randint(140, 180)}/{rng.randint(88, 105)}"),
+    "ЧСС": (lambda rng: str(rng.randint(60, 85)), lambda rng: str(rng.randint(85, 130))),
+    "Холестерин": (lambda rng: f"{rng.uniform(3.5, 5.2):.1f} ммоль/л", lambda rng: f"{rng.uniform(5.5, 8.5):.1f} ммоль/л"),
+    "ЛПНП": (lambda rng: f"{rng.uniform(1.5, 3.0):.1f} ммоль/л", lambda rng: f"{rng.uniform(3.0, 5.5):.1f} ммоль/л"),
+    "Глюкоза": (lambda rng: f"{rng.uniform(4.0, 5.8):.1f} ммоль/л", lambda rng: f"{rng.uniform(6.5, 12.0):.1f} ммоль/л"),
+    "HbA1c": (lambda rng: f"{rng.uniform(4.5, 5.9):.1f}%", lambda rng: f"{rng.uniform(6.5, 10.0):.1f}%"),
+    "МНО": (lambda rng: f"{rng.uniform(0.9, 1.2):.1f}", lambda rng: f"{rng.uniform(1.8, 3.5):.1f}"),
+    "NT-proBNP": (lambda rng: f"{rng.randint(20, 120)} пг/мл", lambda rng: f"{rng.randint(400, 5000)} пг/мл"),
+    "Калий": (lambda rng: f"{rng.uniform(3.6, 5.0):.1f} ммоль/л", lambda rng: f"{rng.uniform(5.1, 6.2):.1f} ммоль/л"),
+    "Креатинин": (lambda rng: f"{rng.randint(60, 105)} мкмоль/л", lambda rng: f"{rng.randint(120, 300)} мкмоль/л"),
+    "СКФ": (lambda rng: f"{rng.randint(75, 110)} мл/мин", lambda rng: f"{rng.randint(15, 59)} мл/мин"),
+    "СОЭ": (lambda rng: f"{rng.randint(2, 15)} мм/ч", lambda rng: f"{rng.randint(20, 45)} мм/ч"),
+    "ТТГ": (lambda rng: f"{rng.uniform(0.5, 4.0):.1f} мЕд/л", lambda rng: f"{rng.uniform(4.5, 15.0):.1f} мЕд/л"),
+    "Гемоглобин": (lambda rng: f"{rng.randint(120, 160)} г/л", lambda rng: f"{rng.randint(85, 115)} г/л"),
+}
+# Анализы, которые есть почти у всех
+BASE_LABS = ("Гемоглобин", "Креатинин", "Глюкоза")
+ALLERGENS = [("Пенициллин", "Крапивница"), ("Аспирин", "Бронхоспазм"), ("Сульфаниламиды", "Сыпь"),
+             ("Ибупрофен", "Отек Квинке"), ("Йод", "Крапивница"), ("Цефалоспорины", "Сыпь")]
+SURNAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+            "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семенов", "Егоров"]
+MALE_NAMES = ["Александр", "Сергей", "Дмитрий", "Андрей", "Алексей", "Иван", "Михаил", "Николай"]
+FEMALE_NAMES = ["Елена", "Ольга", "Наталья", "Татьяна", "Ирина", "Анна", "Мария", "Светлана"]
+PATRONYMICS = ["Александров", "Сергеев", "Владимиров", "Петров", "Иванов", "Николаев", "Викторов", "Юрьев"]
+SPECIALTIES = ["Терапевт", "Кардиолог", "Эндокринолог", "Невролог", "Нефролог"]
+PRESCRIPTION_STATUSES = ("draft", "active", "active", "active", "completed", "cancelled")
+
+
+def _full_name(rng: random.Random, gender: str) -> str:
+    if gender == "female":
+        return f"{rng.choice(SURNAMES)}а {rng.choice(FEMALE_NAMES)} {rng.choice(PATRONYMICS)}на"
+    return f"{rng.choice(SURNAMES)} {rng.choice(MALE_NAMES)} {rng.choice(PATRONYMICS)}ич"
+
+
+class SyntheticData:
+    """Генератор набора: врачи 1..doctors, препараты 1..medications, пациенты 1..patients.
+
+    id в строках - порядковые номера в наборе; загрузчик, которому нужны
+    другие id (хранилище моков с демо-строками), переводит ссылки сам.
+    """
+
+    def __init__(self, seed: int = 42, doctors: int = 100, patients: int = 10_000, medications: int = 2_000,
+                 interactions_per_drug: float = 3.0) -> None:
+        self.seed = seed
+        self.doctors = doctors
+        self.patients = patients
+        self.medications = max(medications, len(DRUGS))
+        self.interactions_per_drug = interactions_per_drug
+        self._catalog: Optional[List[Dict[str, Any]]] = None
+
+    def users(self, hashed_password: Optional[str] = None) -> List[Dict[str, Any]]:
+        rng = random.Random(f"{self.seed}:users")
+        return [
+            {
+                "id": doctor_id,
+                "email": self.doctor_email(doctor_id),
+                "hashed_password": hashed_password,
+                "full_name": _full_name(rng, rng.choice(("male", "female"))),
+                "specialty": SPECIALTIES[doctor_id % len(SPECIALTIES)],
+                "workplace": f"Городская поликлиника №{rng.randint(1, 200)}",
+                "is_active": True,
+                "is_verified": True,
+                "created_at": EPOCH - timedelta(days=rng.randint(30, 3000)),
+            }
+            for doctor_id in range(1, self.doctors + 1)
+        ]
+
+    @staticmethod
+    def doctor_email(doctor_id: int) -> str:
+        return f"doctor{doctor_id}@bench.medai.com"
+
+    def catalog(self) -> List[Dict[str, Any]]:
+        """Основные препараты с известными взаимодействиями плюс синтетический хвост каталога.
+
+        Взаимодействия хвоста: в среднем interactions_per_drug на препарат,
+        треть - с основными препаратами (как у варфарина в жизни, у них много связей).
+        """
+        if self._catalog is not None:
+            return self._catalog
+        rng = random.Random(f"{self.seed}:catalog")
+        catalog = [
+            {"name": drug.name, "generic_name": drug.generic_name, "drug_class": drug.drug_class,
+             "available_dosages": list(drug.dosages), "drug_interactions": []}
+            for drug in DRUGS
+        ]
+        names = {drug.name for drug in DRUGS}
+        while len(catalog) < self.medications:
+            name = rng.choice(PREFIXES) + "".join(rng.choice(MIDDLES) for _ in range(rng.randint(0, 2))) + rng.choice(SUFFIXES)
+            generic = "".join(LATIN.get(ch, ch) for ch in name.lower())
+            name = f"{name} {rng.choice(['', 'Ретард', 'Форте', 'Тева', 'Канон'])}".strip()
+            if name in names:
+                name = f"{name} {len(catalog)}"
+            names.add(name)
+            catalog.append({
+                "name": name, "generic_name": generic, "drug_class": f"Синтетический класс {rng.randint(1, 40)}",
+                "available_dosages": [f"{rng.choice((5, 10, 20, 50, 100))} мг"], "drug_interactions": [],
+            })
+
+        by_name = {medication["name"]: medication for medication in catalog}
+        for a, b, severity, description, management in KNOWN_INTERACTIONS:
+            by_name[a]["drug_interactions"].append(
+                {"medication": b, "severity": severity, "description": description, "management": management}
+            )
+        tail_pairs = int((len(catalog) - len(DRUGS)) * self.interactions_per_drug / 2)
+        seen = set()
+        while len(seen) < tail_pairs:
+            a = rng.randrange(len(DRUGS), len(catalog))
+            b = rng.randrange(len(DRUGS)) if rng.random() < 0.33 else rng.randrange(len(DRUGS), len(catalog))
+            if a == b or (min(a, b), max(a, b)) in seen:
+                continue
+            seen.add((min(a, b), max(a, b)))
+            catalog[a]["drug_interactions"].append({
+                "medication": catalog[b]["name"], "severity": rng.choice(SEVERITIES),
+                "description": "Синтетическое взаимодействие", "management": "Контроль",
+            })
+
+        for medication_id, medication in enumerate(catalog, start=1):
+            medication.update({
+                "id": medication_id,
+                "indications": [],
+                "contraindications": [],
+                "side_effects": [],
+                "monitoring_parameters": [],
+                "is_active": True,
+                "created_at": EPOCH,
+                "updated_at": None,
+            })
+        self._catalog = catalog
+        return catalog
+
+    def _conditions(self, rng: random.Random, age: int) -> List[str]:
+        found: List[str] = []
+        decades = max(0.0, (age - 40) / 10)
+        for name, condition in CONDITIONS.items():
+            rate = condition.base_rate + condition.rate_per_decade * decades
+            if any(linked in found for linked in CONDITION_LINKS.get(name, ())):
+                rate *= 2
+            if rng.random() < min(rate, 0.9):
+                found.append(name)
+        return found
+
+    def _patient(self, rng: random.Random, number: int, drugs: Dict[str, Drug]) -> Dict[str, Any]:
+        gender = "female" if rng.random() < 0.55 else "male"
+        age = min(98, max(18, int(rng.gauss(58, 16))))
+        conditions = self._conditions(rng, age)
+
+        medications: Dict[str, Dict[str, Any]] = {}
+        for name in conditions:
+            options = CONDITIONS[name].drugs
+            for drug_name in rng.sample(options, min(len(options), rng.randint(1, 2))):
+                drug = drugs[drug_name]
+                medications.setdefault(drug_name, {
+                    "name": drug_name, "dosage": rng.choice(drug.dosages), "frequency": drug.frequency,
+                })
+        abnormal = {lab for name in conditions for lab in CONDITIONS[name].labs}
+        labs = {lab: LABS[lab][lab in abnormal](rng) for lab in (*BASE_LABS, *sorted(abnormal)) if lab in LABS}
+        allergies = [
+            {"allergen": allergen, "severity": rng.choice(SEVERITIES), "reaction": reaction}
+            for allergen, reaction in rng.sample(ALLERGENS, rng.choices((0, 1, 2), (85, 12, 3))[0])
+        ]
+        created_at = EPOCH - timedelta(minutes=(self.patients - number) * 7)
+        return {
+            "id": number,
+            "doctor_id": number % self.doctors + 1,
+            "full_name": _full_name(rng, gender),
+            "age": age,
+            "gender": gender,
+            "weight": round(rng.gauss(64 if gender == "female" else 80, 12), 1),
+            "height": round(rng.gauss(164 if gender == "female" else 177, 7), 1),
+            "phone": f"+7 (9{rng.randint(10, 99)}) {rng.randint(100, 999)}-{rng.randint(10, 99)}-{rng.randint(10, 99)}",
+            "email": None,
+            "diagnosis": conditions[0] if conditions else "Здоров",
+            "comorbidities": conditions[1:],
+            "lab_results": labs,
+            "current_medications": list(medications.values()),
+            "allergies": allergies,
+            "previous_anticoagulants": [],
+            "created_at": created_at,
+            "updated_at": None,
+        }
+
+    def _prescriptions(self, rng: random.Random, patient: Dict[str, Any], ids: Dict[str, int]) -> List[Dict[str, Any]]:
+        prescriptions = []
+        medications = patient["current_medications"]
+        for _ in range(rng.choices((0, 1, 2, 3), (30, 45, 18, 7))[0] if medications else 0):
+            chosen = rng.sample(medications, rng.randint(1, len(medications)))
+            prescriptions.append({
+                "patient_id": patient["id"],
+                "doctor_id": patient["doctor_id"],
+                "recommended_medications": [{"id": ids[item["name"]], **item} for item in chosen],
+                "duration": rng.choice(("14 дней", "30 дней", "90 дней", "постоянно")),
+                "status": rng.choice(PRESCRIPTION_STATUSES),
+                "is_ai_generated": rng.random() < 0.6,
+                "created_at": patient["created_at"] + timedelta(days=rng.randint(0, 60)),
+                "updated_at": None,
+            })
+        return prescriptions
+
+    def patient_batches(self, batch_size: int = 10_000) -> Iterator[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """(пациенты, их назначения) пачками; назначения без id, в порядке пациентов"""
+        rng = random.Random(f"{self.seed}:patients")
+        drugs = {drug.name: drug for drug in DRUGS}
+        ids = {medication["name"]: medication["id"] for medication in self.catalog()[:len(DRUGS)]}
+        for start in range(1, self.patients + 1, batch_size):
+            patients, prescriptions = [], []
+            for number in range(start, min(start + batch_size, self.patients + 1)):
+                patient = self._patient(rng, number, drugs)
+                patients.append(patient)
+                prescriptions.extend(self._prescriptions(rng, patient, ids))
+            yield patients, prescriptions
+
+
+class LoadedData(NamedTuple):
+    """Что загружено: врачи (id, email) и выборка id пациентов каждого врача для сценариев"""
+    doctors: List[Tuple[int, str]]
+    patients_by_doctor: Dict[int, List[int]]
+    password: str
+
+
+def _sample(patients_by_doctor: Dict[int, List[int]], doctor_id: int, patient_id: int, limit: int) -> None:
+    ids = patients_by_doctor.setdefault(doctor_id, [])
+    if len(ids) < limit:
+        ids.append(patient_id)
+
+
+def load_memory(data: SyntheticData, hashed_password: Optional[str], batch_size: int = 10_000,
+                sample_per_doctor: int = 1000) -> LoadedData:
+    """Добавить набор к хранилищу моков (демо-строки остаются, id выдаются следующие).
+
+    Индексы каталога строятся при старте приложения - загружать до него.
+    """
+    from app import mock_data
+
+    doctor_ids, doctors = {}, []
+    for user in data.users(hashed_password):
+        row = mock_data.MOCK_USERS.insert({key: value for key, value in user.items() if key != "id"})
+        doctor_ids[user["id"]] = row["id"]
+        doctors.append((row["id"], row["email"]))
+    for medication in data.catalog():
+        mock_data.MOCK_MEDICATIONS.insert({key: value for key, value in medication.items() if key != "id"})
+
+    patients_by_doctor: Dict[int, List[int]] = {}
+    for patients, prescriptions in data.patient_batches(batch_size):
+        patient_ids = {}
+        for patient in patients:
+            row = mock_data.MOCK_PATIENTS.insert(
+                {**{key: value for key, value in patient.items() if key != "id"}, "doctor_id": doctor_ids[patient["doctor_id"]]}
+            )
+            patient_ids[patient["id"]] = row["id"]
+            _sample(patients_by_doctor, row["doctor_id"], row["id"], sample_per_doctor)
+        for prescription in prescriptions:
+            mock_data.MOCK_PRESCRIPTIONS.insert({
+                **prescription,
+                "patient_id": patient_ids[prescription["patient_id"]],
+                "doctor_id": doctor_ids[prescription["doctor_id"]],
+            })
+    return LoadedData(doctors, patients_by_doctor, BENCH_PASSWORD)
+
+
+def load_sql(data: SyntheticData, url: str, hashed_password: str, batch_size: int = 10_000,
+             sample_per_doctor: int = 1000) -> LoadedData:
+    """Схема миграциями alembic и набор в пустые таблицы (прежние данные удаляются).
+
+    Набор с теми же размерами, уже лежащий в БД, повторно не загружается:
+    1M пациентов в SQLite грузятся минуты. Назначения, созданные сценарием
+    prescription_create прежних прогонов, при этом остаются.
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine, func, insert, select, text
+    from sqlalchemy.orm import Session
+
+    from app.db.database import Base
+    from app.models import Medication, Patient, Prescription, User
+    from app.services.interactions import interaction_index
+    from app.services.patient_sync import sync_patient_therapy
+
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+    engine = create_engine(url)
+
+    def loaded() -> LoadedData:
+        doctors = [(doctor_id, data.doctor_email(doctor_id)) for doctor_id in range(1, data.doctors + 1)]
+        patients_by_doctor: Dict[int, List[int]] = {}
+        for patient_id in range(1, data.patients + 1):
+            _sample(patients_by_doctor, patient_id % data.doctors + 1, patient_id, sample_per_doctor)
+        return LoadedData(doctors, patients_by_doctor, BENCH_PASSWORD)
+
+    with engine.begin() as connection:
+        counts = (
+            connection.scalar(select(func.count(User.id)).where(User.email.like("%@bench.medai.com"))),
+            connection.scalar(select(func.count(Patient.id))),
+            connection.scalar(select(func.count(Medication.id))),
+        )
+        if counts == (data.doctors, data.patients, len(data.catalog())):
+            return loaded()
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(text(f"DELETE FROM {table.name}"))
+        connection.execute(insert(User.__table__), data.users(hashed_password))
+        connection.execute(insert(Medication.__table__), data.catalog())
+
+    # Строки patient_medications ссылаются на препараты каталога через индекс взаимодействий
+    interaction_index.build(data.catalog())
+    for patients, prescriptions in data.patient_batches(batch_size):
+        with Session(engine) as db:
+            db.execute(insert(Patient.__table__), patients)
+            if prescriptions:
+                db.execute(insert(Prescription.__table__), prescriptions)
+            sync_patient_therapy(
+                db,
+                current_medications={patient["id"]: patient["current_medications"] for patient in patients},
+                allergies={patient["id"]: patient["allergies"] for patient in patients},
+            )
+            db.commit()
+    engine.dispose()
+    return loaded()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///./bench.db")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--medications", type=int, default=2_000)
+    parser.add_argument("--stats", action="store_true", help="только сводка по набору, без загрузки")
+    args = parser.parse_args()
+    data = SyntheticData(args.seed, args.doctors, args.patients, args.medications)
+
+    started = time.perf_counter()
+    if args.stats:
+        conditions, medications, prescriptions = {}, 0, 0
+        for patients, batch_prescriptions in data.patient_batches():
+            prescriptions += len(batch_prescriptions)
+            for patient in patients:
+                medications += len(patient["current_medications"])
+                for name in (patient["diagnosis"], *patient["comorbidities"]):
+                    conditions[name] = conditions.get(name, 0) + 1
+        pairs = sum(len(medication["drug_interactions"]) for medication in data.catalog())
+        print(f"{data.patients} patients, {prescriptions} prescriptions, "
+              f"{medications / data.patients:.2f} medications per patient, {pairs} interaction pairs")
+        for name, count in sorted(conditions.items(), key=lambda item: -item[1]):
+            print(f"  {name:<40} {count / data.patients:6.1%}")
+    else:
+        from app.core.security import get_password_hash
+        load_sql(data, args.url, get_password_hash(BENCH_PASSWORD))
+        print(f"loaded {data.patients} patients into {args.url}")
+    print(f"{time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
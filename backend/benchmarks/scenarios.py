@@ -0,0 +1,209 @@
+"""Сценарные бенчмарки API на синтетическом наборе (benchmarks.datagen).
+
+Сценарии - основные пути врача: login (bcrypt), list (первая страница
+пациентов), search (поиск по каталогу), patient_card (карточка
+/patients/{id}/summary), interaction_check и prescription_create (пишет в
+хранилище, поэтому идет последним). Запросы каждого сценария строятся из
+seed заранее - от прогона к прогону одни и те же - и идут через
+httpx.ASGITransport в --concurrency потоков запросов, без сети. Перед
+замером - --warmup запросов, не попадающих в статистику.
+
+Результат - пропускная способность, p50/p95/p99 и ошибки по сценариям -
+пишется в JSON (--output) вместе с коммитом и параметрами набора; --compare
+печатает разницу с прежним JSON (например, с прогона родительского коммита).
+
+Запуск из каталога backend:
+    python -m benchmarks.scenarios --backend memory --patients 100000 --output bench-memory.json
+    python -m benchmarks.scenarios --backend sql --url sqlite:///./bench.db --compare bench-base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.bench_search import make_queries, percentile
+from benchmarks.datagen import BENCH_PASSWORD, DRUGS, SyntheticData, load_memory, load_sql
+
+SCENARIOS = ("login", "list", "search", "patient_card", "interaction_check", "prescription_create")
+# (метод, путь, именованные аргументы httpx)
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+def build_requests(scenario: str, count: int, loaded, tokens: Dict[int, str], catalog, seed: int) -> List[Request]:
+    rng = random.Random(f"{seed}:{scenario}")
+    doctors = [doctor for doctor in loaded.doctors if loaded.patients_by_doctor.get(doctor[0])]
+    search_queries = [query for queries in make_queries(catalog, count, seed).values() for query in queries]
+    requests = []
+    for _ in range(count):
+        doctor_id, email = rng.choice(doctors)
+        headers = {"Authorization": f"Bearer {tokens[doctor_id]}"}
+        patient_id = rng.choice(loaded.patients_by_doctor[doctor_id])
+        drug = rng.choice(DRUGS)
+        if scenario == "login":
+            requests.append(("POST", "/api/v1/auth/login", {"data": {"username": email, "password": loaded.password}}))
+        elif scenario == "list":
+            requests.append(("GET", "/api/v1/patients/", {"params": {"limit": 50}, "headers": headers}))
+        elif scenario == "search":
+            requests.append(("GET", "/api/v1/medications/search", {"params": {"q": rng.choice(search_queries)}}))
+        elif scenario == "patient_card":
+            requests.append(("GET", f"/api/v1/patients/{patient_id}/summary", {"headers": headers}))
+        elif scenario == "interaction_check":
+            body = {"patient_id": patient_id, "recommended_medications": [{"name": drug.name}]}
+            requests.append(("POST", "/api/v1/prescriptions/check-interactions", {"json": body, "headers": headers}))
+        elif scenario == "prescription_create":
+            body = {
+                "patient_id": patient_id,
+                "recommended_medications": [{"name": drug.name, "dosage": drug.dosages[0], "frequency": drug.frequency}],
+                "duration": "30 дней",
+            }
+            requests.append(("POST", "/api/v1/prescriptions/", {"json": body, "headers": headers}))
+        else:
+            raise ValueError(f"Неизвестный сценарий: {scenario!r}")
+    return requests
+
+
+async def run_requests(client: httpx.AsyncClient, requests: List[Request], concurrency: int):
+    latencies, errors = [], 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, url, kwargs in queue:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, errors
+
+
+def summarize(elapsed: float, latencies: List[float], errors: int) -> Dict[str, float]:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1e3, 3),
+        "p50_ms": round(percentile(latencies, 0.5) * 1e3, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1e3, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1e3, 3),
+    }
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    def delta(name: str, key: str) -> str:
+        before = (baseline or {}).get("scenarios", {}).get(name, {}).get(key)
+        if not before:
+            return ""
+        return f" ({(results['scenarios'][name][key] / before - 1) * 100:+.0f}%)"
+
+    print(f"{'scenario':<20} {'req/s':>16} {'p50':>18} {'p95':>18} {'p99':>18} {'errors':>7}")
+    for name, stats in results["scenarios"].items():
+        print(f"{name:<20} {stats['throughput']:>9.0f}{delta(name, 'throughput'):>7} "
+              + " ".join(f"{stats[key]:>9.2f}ms{delta(name, key):>7}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+              + f" {stats['errors']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "sql", "sql_async"), default="memory")
+    parser.add_argument("--url", default="sqlite:///./bench.db", help="БД для бэкендов sql и sql_async")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--medications", type=int, default=2_000)
+    parser.add_argument("--requests", type=int, default=2000, help="запросов на сценарий")
+    parser.add_argument("--login-requests", type=int, default=200, help="запросов входа (каждый - bcrypt)")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="по умолчанию - BCRYPT_ROUNDS приложения")
+    parser.add_argument("--output", help="куда записать результаты (JSON)")
+    parser.add_argument("--compare", help="JSON прежнего прогона для сравнения")
+    args = parser.parse_args()
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    # prescription_create пишет в хранилище - остальные сценарии идут до него
+    scenarios.sort(key=lambda name: name == "prescription_create")
+
+    # Настройки читаются при импорте app - задаем их до него
+    os.environ.update({"MOCK_MODE": str(args.backend == "memory").lower(), "REPOSITORY_BACKEND": args.backend})
+    if args.backend != "memory":
+        os.environ["DATABASE_URL"] = args.url
+    if args.bcrypt_rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    from app.core.config import settings
+    from app.core.security import create_access_token, get_password_hash
+    from app.main import app
+
+    data = SyntheticData(args.seed, args.doctors, args.patients, args.medications)
+    started = time.perf_counter()
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    if args.backend == "memory":
+        loaded = load_memory(data, hashed_password)
+    else:
+        loaded = load_sql(data, args.url, hashed_password)
+    print(f"{args.backend}: {args.patients} patients, {len(data.catalog())} medications loaded "
+          f"in {time.perf_counter() - started:.1f}s; concurrency {args.concurrency}")
+    tokens = {doctor_id: create_access_token(subject=doctor_id) for doctor_id, _ in loaded.doctors}
+
+    results = {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "database": None if args.backend == "memory" else args.url.split(":", 1)[0],
+        "dataset": {"seed": args.seed, "doctors": args.doctors, "patients": args.patients, "medications": args.medications},
+        "concurrency": args.concurrency,
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "scenarios": {},
+    }
+
+    async def measure():
+        await app.router.startup()
+        try:
+            # Ошибки приложения считаются, а не прерывают прогон
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+                for name in scenarios:
+                    count = args.login_requests if name == "login" else args.requests
+                    requests = build_requests(name, args.warmup + count, loaded, tokens, data.catalog(), args.seed)
+                    await run_requests(client, requests[:args.warmup], args.concurrency)
+                    results["scenarios"][name] = summarize(*await run_requests(client, requests[args.warmup:], args.concurrency))
+        finally:
+            await app.router.shutdown()
+
+    asyncio.run(measure())
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        print(f"compared with {baseline.get('commit')} ({baseline.get('timestamp')})")
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()